@@ -1,10 +1,10 @@
-import React, { useState, useEffect, createContext, useContext } from 'react';
+import React, { useState, useEffect, useCallback, useRef, createContext, useContext } from 'react';
 import { HashRouter, Routes, Route, Navigate } from 'react-router-dom';
 import { Layout } from './components/Layout';
 import { Home } from './pages/Home';
 import { EventView } from './pages/EventView';
 import { Admin } from './pages/Admin';
-import { AppState, Event, Photo, UploadProgress } from './types';
+import { AppState, Event, EventSummary, Photo, UploadProgress } from './types';
 import * as db from './services/db';
 import { ThemeProvider } from './context/ThemeContext';
 
@@ -19,20 +19,28 @@ export const useAppStore = () => {
 };
 
 const AppProvider: React.FC<{ children: React.ReactNode }> = ({ children }) => {
-  const [events, setEvents] = useState<Event[]>([]);
+  const [events, setEvents] = useState<EventSummary[]>([]);
   const [photos, setPhotos] = useState<Photo[]>([]);
   const [loading, setLoading] = useState(true);
+  // Photos are fetched per event when a gallery is opened; boot only loads the event summaries.
+  const loadedSlugs = useRef<Set<string>>(new Set());
+
+  const loadEventPhotos = useCallback(async (slug: string) => {
+    const eventPhotos = await db.getPhotosByEvent(slug);
+    loadedSlugs.current.add(slug);
+    setPhotos(prev => [...prev.filter(p => p.eventSlug !== slug), ...eventPhotos]);
+  }, []);
 
   const refreshData = async () => {
     setLoading(true);
     try {
-      const [allEvents, allPhotos] = await Promise.all([
-        db.getEvents(),
-        db.getAllPhotos()
-      ]);
+      const summaries = await db.getEventSummaries();
       // Sort events by date descending
-      setEvents(allEvents.sort((a, b) => new Date(b.date).getTime() - new Date(a.date).getTime()));
-      setPhotos(allPhotos);
+      setEvents(summaries.sort((a, b) => new Date(b.date).getTime() - new Date(a.date).getTime()));
+      const slugs = new Set(summaries.map(event => event.slug));
+      loadedSlugs.current = new Set([...loadedSlugs.current].filter(slug => slugs.has(slug)));
+      setPhotos(prev => prev.filter(p => loadedSlugs.current.has(p.eventSlug)));
+      await Promise.all([...loadedSlugs.current].map(loadEventPhotos));
     } catch (err) {
       console.error("Failed to load data", err);
     } finally {
@@ -103,13 +111,19 @@ const AppProvider: React.FC<{ children: React.ReactNode }> = ({ children }) => {
     await refreshData();
   };
 
+  const setWatermark = async (eventId: string, watermarkText: string | null) => {
+    await db.setEventWatermark(eventId, watermarkText);
+    // Image URLs carry the watermark version, so loaded galleries are refetched too.
+    await refreshData();
+  };
+
   const togglePhotoFavorite = async (photoId: string, isFavorite: boolean) => {
     await db.setPhotoFavorite(photoId, isFavorite);
     await refreshData();
   };
 
   return (
-    <AppContext.Provider value={{ events, photos, loading, refreshData, addEvent, deleteEvent, addPhotos, deletePhoto, deletePhotos, updatePhotoCaption, setCoverPhoto, togglePhotoFavorite }}>
+    <AppContext.Provider value={{ events, photos, loading, refreshData, loadEventPhotos, addEvent, deleteEvent, addPhotos, deletePhoto, deletePhotos, updatePhotoCaption, setCoverPhoto, setWatermark, togglePhotoFavorite }}>
       {children}
     </AppContext.Provider>
   );
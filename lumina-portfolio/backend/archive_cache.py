@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, Optional, Protocol
+from uuid import uuid4
+
+from .config import get_settings
+from .metrics import get_metrics
+from .zipstream import ZipStream
+
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 1024 * 1024
+STALE_PARTIAL_SECONDS = 3600
+
+
+class Archive(Protocol):
+    """Anything the download routes can stream: a live ZipStream, a cached file or a running build."""
+
+    @property
+    def size(self) -> Optional[int]: ...
+
+    def iter_range(self, start: int, stop: Optional[int]) -> Iterator[bytes]: ...
+
+
+def _read_range(handle: BinaryIO, start: int, stop: Optional[int]) -> Iterator[bytes]:
+    with handle:
+        handle.seek(start)
+        remaining = None if stop is None else stop - start
+        while remaining is None or remaining > 0:
+            chunk = handle.read(READ_SIZE if remaining is None else min(READ_SIZE, remaining))
+            if not chunk:
+                return
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+class _CachedArchive:
+    def __init__(self, path: Path) -> None:
+        self._handle = path.open("rb")
+        self.size: Optional[int] = os.fstat(self._handle.fileno()).st_size
+
+    def iter_range(self, start: int, stop: Optional[int]) -> Iterator[bytes]:
+        return _read_range(self._handle, start, stop)
+
+
+class _ArchiveBuild:
+    """A single archive being written to disk by a background thread.
+
+    Any number of readers can follow the file while it grows, so every request
+    for the same archive shares one build and still receives bytes immediately.
+    """
+
+    def __init__(self, cache: "ArchiveCache", slug: str, target: Path, archive: ZipStream) -> None:
+        self.cache = cache
+        self.slug = slug
+        self.target = target
+        self.partial = target.with_name(f"{target.stem}.{uuid4().hex}.partial")
+        self.size = archive.size
+        self.stale = False
+        self._archive = archive
+        self._written = 0
+        self._done = False
+        self._error: Optional[BaseException] = None
+        self._condition = threading.Condition()
+        self.partial.parent.mkdir(parents=True, exist_ok=True)
+        self._output = self.partial.open("wb")
+
+    def start(self) -> None:
+        threading.Thread(target=self._run, name=f"archive-build-{self.slug}", daemon=True).start()
+
+    def _run(self) -> None:
+        try:
+            with self._output, get_metrics().stage("zip.build"):
+                for chunk in self._archive:
+                    self._output.write(chunk)
+                    self._output.flush()
+                    with self._condition:
+                        self._written += len(chunk)
+                        self._condition.notify_all()
+        except BaseException as exc:  # noqa: BLE001 - surfaced to every reader
+            logger.exception("Failed to build archive %s", self.target)
+            with self._condition:
+                self._error = exc
+        finally:
+            with self._condition:
+                self._done = True
+                self._condition.notify_all()
+            self.cache._finish(self, success=self._error is None)
+
+    def open_reader(self) -> "_BuildReader":
+        return _BuildReader(self, self.partial.open("rb"))
+
+
+class _BuildReader:
+    def __init__(self, build: _ArchiveBuild, handle: BinaryIO) -> None:
+        self._build = build
+        self._handle = handle
+        self.size = build.size
+
+    def iter_range(self, start: int, stop: Optional[int]) -> Iterator[bytes]:
+        build = self._build
+        with self._handle:
+            position = start
+            self._handle.seek(start)
+            while stop is None or position < stop:
+                with build._condition:
+                    while build._written <= position and not build._done:
+                        build._condition.wait()
+                    if build._error is not None:
+                        raise RuntimeError("Archive build failed") from build._error
+                    available = build._written - position
+                if available <= 0:
+                    return
+                if stop is not None:
+                    available = min(available, stop - position)
+                chunk = self._handle.read(min(available, READ_SIZE))
+                if not chunk:
+                    return
+                position += len(chunk)
+                yield chunk
+
+
+class ArchiveCache:
+    """On-disk cache of event archives keyed by the exact set of photos they contain.
+
+    Builds are single-flight per key, the least recently served archives are
+    evicted once ``max_bytes`` is exceeded, and ``invalidate`` drops everything
+    cached for an event when its photos change.
+    """
+
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._builds: Dict[Path, _ArchiveBuild] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path(self, slug: str, key: str) -> Path:
+        return self.root / slug / f"{key}.zip"
+
+    def get(self, slug: str, key: str, archive: ZipStream) -> Archive:
+        """Return a readable archive for ``key``, starting a shared build on a miss."""
+
+        if not self.enabled or (archive.size is not None and archive.size > self.max_bytes):
+            return archive
+
+        path = self._path(slug, key)
+        with self._lock:
+            build = self._builds.get(path)
+            if build is not None:
+                return build.open_reader()
+            try:
+                cached = _CachedArchive(path)
+            except FileNotFoundError:
+                build = _ArchiveBuild(self, slug, path, archive)
+                self._builds[path] = build
+                reader = build.open_reader()
+                build.start()
+                return reader
+            os.utime(path)
+            return cached
+
+    def invalidate(self, slug: str) -> None:
+        """Forget every archive cached for ``slug``; running builds are discarded when they finish."""
+
+        if not self.enabled:
+            return
+        with self._lock:
+            for build in self._builds.values():
+                if build.slug == slug:
+                    build.stale = True
+            for path in (self.root / slug).glob("*.zip"):
+                path.unlink(missing_ok=True)
+
+    def _finish(self, build: _ArchiveBuild, *, success: bool) -> None:
+        with self._lock:
+            self._builds.pop(build.target, None)
+            if success and not build.stale:
+                os.replace(build.partial, build.target)
+            else:
+                build.partial.unlink(missing_ok=True)
+        if success:
+            self._evict()
+
+    def _evict(self) -> None:
+        now = time.time()
+        archives = []
+        for path in self.root.glob("*/*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if path.suffix == ".partial":
+                if now - stat.st_mtime > STALE_PARTIAL_SECONDS:
+                    path.unlink(missing_ok=True)
+                continue
+            archives.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in archives)
+        with self._lock:
+            for _, size, path in sorted(archives):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+            for directory in self.root.iterdir():
+                if directory.is_dir() and not any(directory.iterdir()):
+                    try:
+                        directory.rmdir()
+                    except OSError:
+                        pass
+
+
+@lru_cache()
+def get_archive_cache() -> ArchiveCache:
+    """Return the process-wide archive cache configured from settings."""
+
+    settings = get_settings()
+    return ArchiveCache(settings.archive_cache_dir, settings.archive_cache_max_bytes)
+
+
+@lru_cache()
+def get_compression_executor() -> ThreadPoolExecutor:
+    """Return the process-wide thread pool that deflates archive entries ahead of the writer."""
+
+    workers = get_settings().archive_compress_workers or os.cpu_count() or 1
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="archive-deflate")
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 from pydantic import AnyHttpUrl
 from pydantic_settings import BaseSettings
@@ -19,7 +19,50 @@ class Settings(BaseSettings):
     api_prefix: str = "/api"
     cors_origins: List[AnyHttpUrl | str] = ["*"]
     database_url: str = f"sqlite:///{(DATA_DIR / 'lumina.db').as_posix()}"
+    database_profile: Literal["default", "production"] = "default"
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_mmap_size: int = 256 * 1024**2
+    sqlite_cache_size_kib: int = 64 * 1024
+    sqlite_busy_timeout_ms: int = 5000
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0
+    max_image_pixels: int = 250_000_000
     max_image_width: int = 2000
+    thumbnail_width: int = 480
+    rendition_format: Literal["webp", "jpeg"] = "webp"
+    rendition_quality: int = 82
+    image_workers: Optional[int] = None
+    image_queue_depth: Optional[int] = None
+    image_queue_timeout: float = 30.0
+    job_concurrency: Optional[int] = None
+    job_poll_interval: float = 2.0
+    job_max_attempts: int = 5
+    job_retry_backoff: float = 5.0
+    job_lease_seconds: int = 300
+    job_retention_hours: int = 24
+    reaper_batch_size: int = 200
+    reaper_batch_interval: float = 0.5
+    reaper_poll_interval: float = 60.0
+    archive_cache_dir: Path = DATA_DIR / "archives"
+    archive_cache_max_bytes: int = 20 * 1024**3
+    archive_compress_workers: Optional[int] = None
+    archive_compress_lookahead_bytes: int = 64 * 1024**2
+    upload_session_ttl_hours: int = 24
+    watermark_cache_dir: Path = DATA_DIR / "watermarks"
+    watermark_cache_max_bytes: int = 5 * 1024**3
+    watermark_font: Optional[Path] = None
+    watermark_original_quality: int = 92
+    variant_cache_dir: Path = DATA_DIR / "variants"
+    variant_cache_max_bytes: int = 5 * 1024**3
+    avif_quality: int = 60
+    metrics_enabled: bool = True
+    slow_request_seconds: Optional[float] = None
+    profile_dir: Path = DATA_DIR / "profiles"
+    read_cache_ttl: float = 30.0
+    read_cache_max_entries: int = 1024
+    read_cache_max_bytes: int = 64 * 1024**2
     uploads_dir: Path = UPLOADS_DIR
     frontend_dist: Optional[Path] = (BASE_DIR.parent / "dist").resolve()
 
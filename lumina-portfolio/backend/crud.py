@@ -1,15 +1,77 @@
 from __future__ import annotations
 
-import shutil
-from pathlib import Path
-from typing import List
+import base64
+import binascii
+import logging
+import os
+from pathlib import Path, PurePath
+from typing import Dict, FrozenSet, List, Optional, Tuple
 from uuid import UUID
 
 from fastapi import HTTPException, status
+from pydantic import TypeAdapter
+from sqlalchemy import and_, case, delete, false, func, insert, literal, or_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
 from sqlmodel import Session, select
 
+from . import storage
+from . import fastjson, variants
+from . import watermark as watermarks
+from .archive_cache import get_archive_cache
 from .config import Settings
-from .models import Event, EventCreate, EventRead, Photo, PhotoRead
+from .http_cache import weak_etag
+from .models import (
+    Blob,
+    Event,
+    EventCreate,
+    EventRead,
+    EventSummary,
+    METADATA_FIELDS,
+    Job,
+    JobRead,
+    JobStats,
+    Photo,
+    PhotoBulkResult,
+    PhotoRead,
+    PhotoFilters,
+    PhotoUpload,
+    Tombstone,
+    UploadSession,
+    UploadSessionCreate,
+    UploadSessionRead,
+    photo_taken_at,
+    timestamp_ms,
+)
+from .read_cache import CachedPayload, get_read_cache
+
+logger = logging.getLogger(__name__)
+
+JOB_PROCESS_PHOTO = "process_photo"
+# Event slugs that would be shadowed by fixed routes under ``/events``.
+RESERVED_SLUGS = frozenset({"summary"})
+
+_event_list_adapter = TypeAdapter(List[EventRead])
+_event_summary_adapter = TypeAdapter(List[EventSummary])
+# Everything ``_photo_document`` reads; listings select these as plain rows instead of loading ``Photo`` objects.
+_PHOTO_COLUMNS = (
+    Photo.id,
+    Photo.event_id,
+    Photo.event_slug,
+    Photo.filename,
+    Photo.name,
+    Photo.content_type,
+    Photo.content_hash,
+    Photo.caption,
+    Photo.width,
+    Photo.height,
+    Photo.size,
+    Photo.uploaded_at,
+    Photo.thumbnail_filename,
+    Photo.web_filename,
+    Photo.is_favorite,
+    *(getattr(Photo, name) for name in METADATA_FIELDS),
+)
 
 
 def _event_upload_dir(settings: Settings, slug: str, *, ensure: bool = False) -> Path:
@@ -22,28 +84,171 @@ def _event_upload_dir(settings: Settings, slug: str, *, ensure: bool = False) ->
     return event_dir
 
 
-def _photo_url(photo: Photo) -> str:
-    return f"/static/{photo.event_slug}/{photo.filename}"
-
-
-def _serialize_photo(photo: Photo) -> PhotoRead:
-    return PhotoRead(
-        id=photo.id,
-        eventId=photo.event_id,
-        eventSlug=photo.event_slug,
-        filename=photo.filename,
-        name=photo.name,
-        type=photo.content_type,
-        caption=photo.caption,
-        width=photo.width,
-        height=photo.height,
-        size=photo.size,
-        uploadedAt=photo.uploaded_at,
-        url=_photo_url(photo),
-        isFavorite=photo.is_favorite,
+def _bump_event_version(session: Session, event_id: UUID) -> None:
+    """Advance the event's version in the current transaction so cached listings revalidate."""
+
+    session.exec(update(Event).where(Event.id == event_id).values(version=Event.version + 1))
+
+
+def _adjust_event_stats(session: Session, changes: Dict[UUID, Tuple[int, int, int]]) -> None:
+    """Add ``(photos, favorites, bytes)`` to each event's counters and advance its version, in one UPDATE."""
+
+    if not changes:
+        return
+
+    def delta(index: int):
+        return case({event_id: change[index] for event_id, change in changes.items()}, value=Event.id, else_=0)
+
+    session.exec(
+        update(Event)
+        .where(Event.id.in_(list(changes)))
+        .values(
+            version=Event.version + 1,
+            photo_count=Event.photo_count + delta(0),
+            favorite_count=Event.favorite_count + delta(1),
+            total_bytes=Event.total_bytes + delta(2),
+        )
     )
 
 
+def _invalidate_event(slug: str, *, archives: bool = True) -> None:
+    """Drop data cached for an event after it changed; call after the commit."""
+
+    get_read_cache().invalidate(slug)
+    if archives:
+        get_archive_cache().invalidate(slug)
+
+
+def _photo_url(photo: Photo, filename: str | None = None) -> str:
+    return f"/static/{storage.photo_relpath(photo, filename)}"
+
+
+def _photo_files(photo: Photo) -> List[str]:
+    """Return every file stored for ``photo`` relative to its event folder."""
+
+    return [name for name in (photo.filename, photo.thumbnail_filename, photo.web_filename) if name]
+
+
+def _metadata(source: object) -> Dict[str, object]:
+    """Capture metadata columns of a photo, blob or upload."""
+
+    return {name: getattr(source, name) for name in METADATA_FIELDS}
+
+
+def _release_blobs(session: Session, counts: Dict[str, int]) -> List[Tuple[str, List[str]]]:
+    """Drop references to blobs in the current transaction.
+
+    Blobs nobody references any more are deleted and returned as
+    ``(digest, filenames)`` so their files can be removed after the commit.
+    """
+
+    if not counts:
+        return []
+    decrement = case(counts, value=Blob.digest, else_=0)
+    session.exec(update(Blob).where(Blob.digest.in_(list(counts))).values(ref_count=Blob.ref_count - decrement))
+    orphans = session.exec(select(Blob).where(Blob.digest.in_(list(counts)), Blob.ref_count <= 0)).all()
+    released = []
+    for blob in orphans:
+        released.append((blob.digest, [name for name in (blob.filename, blob.thumbnail_filename, blob.web_filename) if name]))
+        session.delete(blob)
+    return released
+
+
+def lock_blob_store(session: Session) -> None:
+    """Hold the database write lock until the session's transaction ends.
+
+    Uploads move a new blob's file into place inside the transaction that
+    inserts its row, and deletes check for a re-created row and unlink inside
+    one of these, so the two can never interleave.
+    """
+
+    session.exec(update(Blob).where(false()).values(ref_count=Blob.ref_count))
+
+
+def _unlink_blobs(session: Session, settings: Settings, released: List[Tuple[str, List[str]]]) -> None:
+    """Remove files of released blobs, unless a concurrent upload has re-created the blob."""
+
+    if not released:
+        return
+    lock_blob_store(session)
+    recreated = set(session.exec(select(Blob.digest).where(Blob.digest.in_([digest for digest, _ in released]))).all())
+    for digest, filenames in released:
+        if digest in recreated:
+            continue
+        paths = storage.blob_files(settings, digest, *filenames)
+        for path in paths:
+            path.unlink(missing_ok=True)
+        variants.get_variant_cache().discard(path.relative_to(settings.uploads_dir).as_posix() for path in paths)
+    session.commit()
+
+
+def _image_version(event: Event | None) -> Optional[int]:
+    """Version stamped on an event's image URLs; it changes whenever the event's watermark does."""
+
+    return event.watermark_version if event is not None else None
+
+
+def _image_versions(session: Session) -> Dict[UUID, int]:
+    return dict(session.exec(select(Event.id, Event.watermark_version)).all())
+
+
+def _photo_document(photo, version: Optional[int] = None) -> Dict[str, object]:
+    """The API view of a photo as plain JSON-ready values, in ``PhotoRead`` field order.
+
+    ``photo`` is a ``Photo`` or a row of ``_PHOTO_COLUMNS``. Images are served
+    by the format-negotiating endpoint when ``version`` is known.
+    """
+
+    if version is not None:
+        url, thumbnail_url, web_url = (variants.image_url(photo.id, size, version) for size in ("original", "thumbnail", "web"))
+    else:
+        url, thumbnail_url, web_url = (
+            _photo_url(photo),
+            _photo_url(photo, photo.thumbnail_filename),
+            _photo_url(photo, photo.web_filename),
+        )
+    return {
+        "id": photo.id,
+        "eventId": photo.event_id,
+        "eventSlug": photo.event_slug,
+        # Stored names embed the content digest; clients get one derived from the photo id instead.
+        "filename": f"{photo.id}{PurePath(photo.filename).suffix}",
+        "name": photo.name,
+        "type": photo.content_type,
+        "caption": photo.caption,
+        "width": photo.width,
+        "height": photo.height,
+        "size": photo.size,
+        "uploadedAt": photo.uploaded_at,
+        "capturedAt": photo.captured_at,
+        "cameraMake": photo.camera_make,
+        "cameraModel": photo.camera_model,
+        "lens": photo.lens_model,
+        "orientation": photo.orientation,
+        "latitude": photo.latitude,
+        "longitude": photo.longitude,
+        "blurhash": photo.blurhash,
+        "dominantColor": photo.dominant_color,
+        "url": url,
+        "thumbnailUrl": thumbnail_url,
+        "webUrl": web_url,
+        "isFavorite": photo.is_favorite,
+    }
+
+
+def _serialize_photo(photo: Photo, version: Optional[int] = None) -> PhotoRead:
+    return PhotoRead(**_photo_document(photo, version))
+
+
+def project_photos(documents: List[Dict[str, object]], fields: FrozenSet[str] | None) -> List[Dict[str, object]]:
+    """Keep only ``fields`` of each photo document, in ``PhotoRead`` order."""
+
+    if not fields:
+        return documents
+    keys = [key for key in PhotoRead.model_fields if key in fields]
+    return [{key: document[key] for key in keys} for document in documents]
+
+
 def serialize_event(event: Event) -> EventRead:
     return EventRead(
         id=event.id,
@@ -56,11 +261,140 @@ def serialize_event(event: Event) -> EventRead:
         createdAt=event.created_at,
     )
 
+def events_etag(session: Session, *parts: object) -> str:
+    """Weak validator covering every event and, through their versions, every photo."""
+
+    rows = session.exec(select(Event.id, Event.version).order_by(Event.id)).all()
+    return weak_etag("events", *parts, *(f"{event_id}:{version}" for event_id, version in rows))
+
+
+def event_etag(event: Event, *parts: object) -> str:
+    return weak_etag("event", event.id, event.version, *parts)
+
+
 def list_events(session: Session) -> List[EventRead]:
     events = session.exec(select(Event).order_by(Event.date.desc())).all()
     return [serialize_event(event) for event in events]
 
 
+def list_events_payload(session: Session) -> CachedPayload:
+    def build() -> CachedPayload:
+        etag = events_etag(session)
+        return CachedPayload(body=_event_list_adapter.dump_json(list_events(session)), etag=etag)
+
+    return get_read_cache().get_or_build((None, "events"), build)
+
+
+def list_event_summaries(session: Session) -> List[EventSummary]:
+    """Every event with its counters and cover image, in one query that does not grow with the photo count.
+
+    Events without a chosen cover fall back to their first uploaded photo.
+    """
+
+    first_photo = select(Photo.id).where(Photo.event_id == Event.id).order_by(Photo.uploaded_at, Photo.id).limit(1).scalar_subquery()
+    rows = session.exec(select(Event, func.coalesce(Event.cover_photo_id, first_photo)).order_by(Event.date.desc())).all()
+    return [
+        EventSummary(
+            **serialize_event(event).model_dump(),
+            photoCount=event.photo_count,
+            favoriteCount=event.favorite_count,
+            totalBytes=event.total_bytes,
+            coverUrl=variants.image_url(cover_id, "web", event.watermark_version) if cover_id else None,
+        )
+        for event, cover_id in rows
+    ]
+
+
+def event_summaries_payload(session: Session) -> CachedPayload:
+    def build() -> CachedPayload:
+        etag = events_etag(session, "summary")
+        return CachedPayload(body=_event_summary_adapter.dump_json(list_event_summaries(session)), etag=etag)
+
+    return get_read_cache().get_or_build((None, "event-summaries"), build)
+
+
+def get_event_payload(session: Session, slug: str) -> CachedPayload:
+    def build() -> CachedPayload:
+        event = get_event_or_404(session, slug=slug)
+        return CachedPayload(body=serialize_event(event).model_dump_json().encode(), etag=event_etag(event))
+
+    return get_read_cache().get_or_build((slug, "event"), build)
+
+
+def _photo_page_payload(
+    etag: str, photos: List[Dict[str, object]], next_cursor: str | None, fields: FrozenSet[str] | None
+) -> CachedPayload:
+    documents = project_photos(photos, fields)
+    if len(documents) > fastjson.STREAM_THRESHOLD:
+        return CachedPayload(body=b"", etag=etag, next_cursor=next_cursor, documents=documents)
+    return CachedPayload(body=fastjson.dumps(documents), etag=etag, next_cursor=next_cursor)
+
+
+def all_photos_payload(
+    session: Session,
+    *,
+    limit: int | None = None,
+    cursor: str | None = None,
+    fields: FrozenSet[str] | None = None,
+    sort: str = "uploaded",
+    descending: bool = False,
+    filters: PhotoFilters | None = None,
+) -> CachedPayload:
+    """Serialized photo page across all events; cached and streamed like ``event_photos_payload``."""
+
+    query = (limit, cursor, fields, sort, descending, filters)
+
+    def build() -> CachedPayload:
+        etag = events_etag(session, "photos", limit, cursor, sorted(fields or ()), sort, descending, filters)
+        photos, next_cursor = list_all_photos(
+            session,
+            limit=limit,
+            cursor=cursor,
+            sort=sort,
+            descending=descending,
+            filters=filters,
+        )
+        return _photo_page_payload(etag, photos, next_cursor, fields)
+
+    return get_read_cache().get_or_build((None, ("photos", *query)), build)
+
+
+def event_photos_payload(
+    session: Session,
+    slug: str,
+    *,
+    limit: int | None = None,
+    cursor: str | None = None,
+    fields: FrozenSet[str] | None = None,
+    sort: str = "uploaded",
+    descending: bool = False,
+    filters: PhotoFilters | None = None,
+) -> CachedPayload:
+    """Serialized photo page for an event, served from the read cache when possible.
+
+    Pages longer than ``fastjson.STREAM_THRESHOLD`` are returned unencoded
+    for the route to stream, and are not cached.
+    """
+
+    query = (limit, cursor, fields, sort, descending, filters)
+
+    def build() -> CachedPayload:
+        event = get_event_or_404(session, slug=slug)
+        etag = event_etag(event, "photos", limit, cursor, sorted(fields or ()), sort, descending, filters)
+        photos, next_cursor = list_photos_for_event(
+            session,
+            event=event,
+            limit=limit,
+            cursor=cursor,
+            sort=sort,
+            descending=descending,
+            filters=filters,
+        )
+        return _photo_page_payload(etag, photos, next_cursor, fields)
+
+    return get_read_cache().get_or_build((slug, ("photos", *query)), build)
+
+
 def get_event_or_404(session: Session, *, event_id: UUID | None = None, slug: str | None = None) -> Event:
     if event_id:
         event = session.get(Event, event_id)
@@ -75,6 +409,10 @@ def get_event_or_404(session: Session, *, event_id: UUID | None = None, slug: st
 
 
 def create_event(session: Session, payload: EventCreate, settings: Settings) -> EventRead:
+    if payload.slug.startswith("_"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Slug cannot start with an underscore")
+    if payload.slug in RESERVED_SLUGS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Slug is reserved")
     existing = session.exec(select(Event).where(Event.slug == payload.slug)).first()
     if existing:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Slug already exists")
@@ -91,24 +429,53 @@ def create_event(session: Session, payload: EventCreate, settings: Settings) ->
     session.refresh(event)
 
     _event_upload_dir(settings, event.slug, ensure=True)
+    _invalidate_event(event.slug, archives=False)
 
     return serialize_event(event)
 
 
 def delete_event(session: Session, event_id: UUID, settings: Settings) -> None:
-    event = get_event_or_404(session, event_id=event_id)
-    photos = session.exec(select(Photo).where(Photo.event_id == event.id)).all()
-    uploads_dir = _event_upload_dir(settings, event.slug)
+    """Delete an event, its photos and its uploads with set-based statements in one transaction.
 
-    for photo in photos:
-        photo_path = uploads_dir / photo.filename
-        if photo_path.exists():
-            photo_path.unlink()
-        session.delete(photo)
+    The event is gone as soon as this commits. Files are not touched here:
+    blobs nobody references any more, the legacy upload folder, cached renders
+    and upload parts are recorded as tombstones for the background reaper.
+    """
 
+    event = get_event_or_404(session, event_id=event_id)
+    now = timestamp_ms()
+    hashes = select(Photo.content_hash).where(Photo.event_id == event.id, Photo.content_hash.is_not(None))
+    references = (
+        select(func.count())
+        .select_from(Photo)
+        .where(Photo.event_id == event.id, Photo.content_hash == Blob.digest)
+        .scalar_subquery()
+    )
+    session.exec(update(Blob).where(Blob.digest.in_(hashes)).values(ref_count=Blob.ref_count - references))
+    orphaned = and_(Blob.digest.in_(hashes), Blob.ref_count <= 0)
+    session.exec(
+        insert(Tombstone).from_select(
+            ["kind", "target", "created_at"],
+            select(literal("blob"), Blob.digest, literal(now)).where(orphaned),
+        )
+    )
+    session.exec(delete(Blob).where(orphaned))
+    session.exec(delete(Photo).where(Photo.event_id == event.id))
+
+    upload_ids = session.exec(select(UploadSession.id).where(UploadSession.event_id == event.id)).all()
+    session.exec(delete(UploadSession).where(UploadSession.event_id == event.id))
+    # Blob jobs stay: photos in other events may share the blob, and the job skips itself once it is gone.
+    session.exec(delete(Job).where(Job.event_id == event.id, Job.status == "queued", Job.content_hash.is_(None)))
+    leftovers = [
+        ("tree", _event_upload_dir(settings, event.slug)),
+        ("tree", watermarks.get_watermark_cache().root / event.id.hex),
+        ("tree", variants.get_variant_cache().root / event.slug),
+        *(("file", storage.upload_part_path(settings, upload_id)) for upload_id in upload_ids),
+    ]
+    session.add_all(Tombstone(kind=kind, target=str(path), created_at=now) for kind, path in leftovers if path.exists())
     session.delete(event)
     session.commit()
-    shutil.rmtree(uploads_dir, ignore_errors=True)
+    _invalidate_event(event.slug)
 
 
 def set_event_cover(session: Session, event_id: UUID, photo_id: UUID) -> EventRead:
@@ -117,47 +484,417 @@ def set_event_cover(session: Session, event_id: UUID, photo_id: UUID) -> EventRe
     if not photo or photo.event_id != event_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Photo does not belong to this event")
     event.cover_photo_id = photo_id
+    event.version += 1
     session.add(event)
     session.commit()
     session.refresh(event)
+    _invalidate_event(event.slug, archives=False)
     return serialize_event(event)
 
 
-def register_photo(
-    session: Session,
-    *,
-    event: Event,
-    filename: str,
-    original_name: str,
-    content_type: str | None,
-    width: int,
-    height: int,
-    size: int,
-) -> PhotoRead:
+def _add_photo(session: Session, settings: Settings, event: Event, upload: PhotoUpload) -> Photo:
     photo = Photo(
         event_id=event.id,
         event_slug=event.slug,
-        filename=filename,
-        name=original_name,
-        content_type=content_type,
-        width=width,
-        height=height,
-        size=size,
+        filename=upload.filename,
+        name=upload.original_name,
+        content_type=upload.content_type,
+        width=upload.width,
+        height=upload.height,
+        size=upload.size,
+        content_hash=upload.content_hash,
+        thumbnail_filename=upload.thumbnail_filename,
+        web_filename=upload.web_filename,
+        **_metadata(upload),
     )
     session.add(photo)
+    created = _reference_blob(session, upload)
+    if created and upload.content_hash:
+        if upload.staged_path is None:
+            # The blob this upload was matched to was deleted before the transaction began; it has no bytes to store.
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Stored file was removed meanwhile; retry the upload")
+        # Renditions of a deleted blob went with it; the new one gets its own.
+        photo.thumbnail_filename = photo.web_filename = None
+    if created:
+        enqueue_job(
+            session,
+            JOB_PROCESS_PHOTO,
+            event_id=event.id,
+            photo_id=photo.id,
+            content_hash=upload.content_hash,
+            max_attempts=settings.job_max_attempts,
+        )
+    elif upload.content_hash:
+        # Another upload stored these bytes first; share its file, renditions and metadata.
+        blob = session.get(Blob, upload.content_hash)
+        photo.filename = blob.filename
+        photo.thumbnail_filename = blob.thumbnail_filename
+        photo.web_filename = blob.web_filename
+        for name, value in _metadata(blob).items():
+            setattr(photo, name, value)
+    session.flush()
+    _store_staged_file(settings, upload, created)
+    return photo
+
+
+def _store_staged_file(settings: Settings, upload: PhotoUpload, created: bool) -> None:
+    """Move a new blob's bytes into the store, or drop them when the blob already existed.
+
+    Runs after the blob row has been written, while the registering
+    transaction holds the write lock (see ``lock_blob_store``).
+    """
+
+    staged = upload.staged_path
+    if staged is None:
+        return
+    if not created:
+        staged.unlink(missing_ok=True)
+        return
+    destination = storage.blob_dir(settings, upload.content_hash) / upload.filename
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(staged, destination)
+
+
+def set_event_watermark(session: Session, event_id: UUID, text: str | None) -> EventRead:
+    """Change an event's watermark; images rendered for the previous text are discarded."""
+
+    event = get_event_or_404(session, event_id=event_id)
+    text = (text or "").strip() or None
+    if text == event.watermark_text:
+        return serialize_event(event)
+    event.watermark_text = text
+    event.watermark_version += 1
+    event.version += 1
+    session.add(event)
     session.commit()
-    session.refresh(photo)
-    return _serialize_photo(photo)
+    session.refresh(event)
+    _invalidate_event(event.slug)
+    watermarks.get_watermark_cache().purge(event.id, keep_version=event.watermark_version)
+    return serialize_event(event)
+
+
+def register_photo(session: Session, settings: Settings, *, event: Event, upload: PhotoUpload) -> PhotoRead:
+    """Register a single stored upload, committing it together with any pending changes in ``session``."""
 
+    photo = _add_photo(session, settings, event, upload)
+    _adjust_event_stats(session, {event.id: (1, 0, photo.size)})
+    session.commit()
+    _invalidate_event(event.slug)
+    return _serialize_photo(photo, _image_version(event))
 
-def list_photos_for_event(session: Session, *, event: Event) -> List[PhotoRead]:
-    photos = session.exec(select(Photo).where(Photo.event_id == event.id).order_by(Photo.uploaded_at)).all()
-    return [_serialize_photo(photo) for photo in photos]
 
+def register_photos(
+    session: Session,
+    settings: Settings,
+    *,
+    event: Event,
+    uploads: List[PhotoUpload],
+) -> List[PhotoRead]:
+    """Register a batch of stored uploads in one transaction.
 
-def list_all_photos(session: Session) -> List[PhotoRead]:
-    photos = session.exec(select(Photo).order_by(Photo.uploaded_at)).all()
-    return [_serialize_photo(photo) for photo in photos]
+    Each row is inserted inside its own savepoint, so a row the database rejects
+    is skipped without rolling back the rest of the batch. Responses are built
+    from the in-memory rows, avoiding a refresh query per photo. Content-addressed
+    uploads take a reference on their blob; renditions are only queued for the
+    upload that first stores a blob, duplicates reuse whatever it already has.
+    """
+
+    created: List[PhotoRead] = []
+    # pysqlite only sends BEGIN ahead of DML, never ahead of SAVEPOINT, so without a write first each
+    # RELEASE below would commit on its own. Taking the blob store's write lock opens the transaction.
+    lock_blob_store(session)
+    for upload in uploads:
+        try:
+            with session.begin_nested():
+                photo = _add_photo(session, settings, event, upload)
+        except SQLAlchemyError:
+            logger.exception("Failed to register upload %s for event %s", upload.filename, event.slug)
+            continue
+        created.append(_serialize_photo(photo, _image_version(event)))
+
+    if created:
+        _adjust_event_stats(session, {event.id: (len(created), 0, sum(photo.size for photo in created))})
+    session.commit()
+    if created:
+        _invalidate_event(event.slug)
+    return created
+
+
+def find_blob(session: Session, digest: str) -> Optional[Blob]:
+    return session.get(Blob, digest)
+
+
+def blob_upload(blob: Blob, original_name: str, staged_path: Optional[Path] = None) -> PhotoUpload:
+    """Describe a new photo that reuses an already stored blob.
+
+    ``staged_path`` keeps the upload's own copy of the bytes until it is
+    registered, in case the blob is deleted in the meantime.
+    """
+
+    return PhotoUpload(
+        filename=blob.filename,
+        original_name=original_name,
+        content_type=blob.content_type,
+        width=blob.width,
+        height=blob.height,
+        size=blob.size,
+        content_hash=blob.digest,
+        thumbnail_filename=blob.thumbnail_filename,
+        web_filename=blob.web_filename,
+        staged_path=staged_path,
+        **_metadata(blob),
+    )
+
+
+def _reference_blob(session: Session, upload: PhotoUpload) -> bool:
+    """Take a reference on the upload's blob; returns True when this upload created it.
+
+    The row is inserted with ``ON CONFLICT DO NOTHING``, so concurrent uploads
+    of the same new bytes all succeed and exactly one of them creates the blob.
+    """
+
+    if not upload.content_hash:
+        return True
+    statement = (
+        sqlite_insert(Blob)
+        .values(
+            digest=upload.content_hash,
+            filename=upload.filename,
+            content_type=upload.content_type,
+            width=upload.width,
+            height=upload.height,
+            size=upload.size,
+            ref_count=1,
+            created_at=timestamp_ms(),
+        )
+        .on_conflict_do_nothing(index_elements=[Blob.digest])
+    )
+    if session.exec(statement).rowcount == 1:
+        return True
+    session.exec(update(Blob).where(Blob.digest == upload.content_hash).values(ref_count=Blob.ref_count + 1))
+    return False
+
+
+def record_blob_processing(
+    session: Session,
+    digest: str,
+    renditions: Dict[str, str] | None = None,
+    metadata: Dict[str, object] | None = None,
+) -> bool:
+    """Store renditions and metadata on a blob and copy them to every photo sharing it.
+
+    Values that are not given keep the blob's current ones, so calling this
+    with only a digest brings new references up to date with an already
+    processed blob. Returns False when the blob is gone.
+    """
+
+    blob = session.get(Blob, digest)
+    if not blob:
+        return False
+    values = {"thumbnail_filename": blob.thumbnail_filename, "web_filename": blob.web_filename, **_metadata(blob)}
+    if renditions is not None:
+        values.update(thumbnail_filename=renditions.get("thumbnail"), web_filename=renditions.get("web"))
+    if metadata is not None:
+        values.update((name, metadata.get(name)) for name in METADATA_FIELDS)
+    session.exec(update(Blob).where(Blob.digest == digest).values(**values))
+    session.exec(update(Photo).where(Photo.content_hash == digest).values(**values))
+    events = session.exec(select(Event.id, Event.slug).join(Photo, Photo.event_id == Event.id).where(Photo.content_hash == digest).distinct()).all()
+    for event_id, _ in events:
+        _bump_event_version(session, event_id)
+    session.commit()
+    for _, slug in events:
+        _invalidate_event(slug, archives=False)
+    return True
+
+
+def record_photo_processing(
+    session: Session,
+    photo_id: UUID,
+    renditions: Dict[str, str],
+    metadata: Dict[str, object] | None = None,
+) -> bool:
+    """Record generated renditions and metadata on a photo; returns False when the photo no longer exists."""
+
+    photo = session.get(Photo, photo_id)
+    if not photo:
+        return False
+    photo.thumbnail_filename = renditions.get("thumbnail")
+    photo.web_filename = renditions.get("web")
+    for name in METADATA_FIELDS if metadata is not None else ():
+        setattr(photo, name, metadata.get(name))
+    session.add(photo)
+    _bump_event_version(session, photo.event_id)
+    session.commit()
+    _invalidate_event(photo.event_slug, archives=False)
+    return True
+
+
+PHOTO_SORTS = ("uploaded", "captured")
+
+
+def encode_cursor(sort_key: int, photo_id: UUID) -> str:
+    raw = f"{sort_key}:{photo_id.hex}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        sort_key, photo_id = raw.split(":", 1)
+        return int(sort_key), UUID(hex=photo_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+
+
+def _filter_photos(statement, filters: PhotoFilters | None):
+    if filters is None:
+        return statement
+    if filters.camera:
+        statement = statement.where(Photo.camera_model == filters.camera)
+    if filters.lens:
+        statement = statement.where(Photo.lens_model == filters.lens)
+    if filters.captured_after is not None:
+        statement = statement.where(Photo.captured_at >= filters.captured_after)
+    if filters.captured_before is not None:
+        statement = statement.where(Photo.captured_at < filters.captured_before)
+    if filters.geotagged is not None:
+        statement = statement.where(Photo.latitude.is_not(None) if filters.geotagged else Photo.latitude.is_(None))
+    return statement
+
+
+def _list_photos_page(
+    session: Session,
+    statement,
+    *,
+    limit: int | None,
+    cursor: str | None,
+    versions: Dict[UUID, int],
+    sort: str = "uploaded",
+    descending: bool = False,
+    filters: PhotoFilters | None = None,
+) -> Tuple[List[Dict[str, object]], Optional[str]]:
+    """Run a filtered query over ``_PHOTO_COLUMNS`` and return one keyset page of photo documents.
+
+    Photos are ordered by ``(sort key, id)``, where the sort key is the upload
+    time or, for ``captured``, the capture time falling back to the upload
+    time. Both orders are served by composite indexes. The second element is
+    the cursor for the following page, or ``None`` when this page is the last
+    one (or no ``limit`` was requested).
+    """
+
+    if sort not in PHOTO_SORTS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown sort: {sort}")
+    key = photo_taken_at() if sort == "captured" else Photo.uploaded_at
+    statement = _filter_photos(statement, filters)
+    if cursor:
+        sort_key, photo_id = decode_cursor(cursor)
+        if descending:
+            after = or_(key < sort_key, and_(key == sort_key, Photo.id < photo_id))
+        else:
+            after = or_(key > sort_key, and_(key == sort_key, Photo.id > photo_id))
+        statement = statement.where(after)
+    statement = statement.order_by(key.desc(), Photo.id.desc()) if descending else statement.order_by(key, Photo.id)
+    if limit is not None:
+        statement = statement.limit(limit + 1)
+
+    photos = session.exec(statement).all()
+    next_cursor = None
+    if limit is not None and len(photos) > limit:
+        photos = photos[:limit]
+        last = photos[-1]
+        last_key = last.captured_at if sort == "captured" and last.captured_at is not None else last.uploaded_at
+        next_cursor = encode_cursor(last_key, last.id)
+    return [_photo_document(photo, versions.get(photo.event_id)) for photo in photos], next_cursor
+
+
+def list_photos_for_event(
+    session: Session,
+    *,
+    event: Event,
+    limit: int | None = None,
+    cursor: str | None = None,
+    sort: str = "uploaded",
+    descending: bool = False,
+    filters: PhotoFilters | None = None,
+) -> Tuple[List[Dict[str, object]], Optional[str]]:
+    statement = select(*_PHOTO_COLUMNS).where(Photo.event_id == event.id)
+    return _list_photos_page(
+        session,
+        statement,
+        limit=limit,
+        cursor=cursor,
+        versions={event.id: event.watermark_version},
+        sort=sort,
+        descending=descending,
+        filters=filters,
+    )
+
+
+def list_photo_records(
+    session: Session,
+    *,
+    event_id: UUID,
+    ids: Optional[List[UUID]] = None,
+    favorites_only: bool = False,
+) -> List[Photo]:
+    """Return the event's photo rows in archive order, optionally only the given ids or favorites."""
+
+    statement = select(Photo).where(Photo.event_id == event_id)
+    if ids is not None:
+        statement = statement.where(Photo.id.in_(ids))
+    if favorites_only:
+        statement = statement.where(Photo.is_favorite)
+    return list(session.exec(statement.order_by(Photo.uploaded_at, Photo.id)).all())
+
+
+def list_all_photos(
+    session: Session,
+    *,
+    limit: int | None = None,
+    cursor: str | None = None,
+    sort: str = "uploaded",
+    descending: bool = False,
+    filters: PhotoFilters | None = None,
+) -> Tuple[List[Dict[str, object]], Optional[str]]:
+    return _list_photos_page(
+        session,
+        select(*_PHOTO_COLUMNS),
+        limit=limit,
+        cursor=cursor,
+        versions=_image_versions(session),
+        sort=sort,
+        descending=descending,
+        filters=filters,
+    )
+
+
+def get_photo_with_event_or_404(session: Session, photo_id: UUID) -> Tuple[Photo, Event]:
+    row = session.exec(select(Photo, Event).join(Event, Event.id == Photo.event_id).where(Photo.id == photo_id)).first()
+    if not row:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Photo not found")
+    return row[0], row[1]
+
+
+def find_photo_by_file_or_404(session: Session, relpath: str) -> Tuple[Photo, Event, str]:
+    """Resolve a file path under the uploads root to its photo, the photo's event and the size the file holds.
+
+    When several events share the bytes, a watermarked event wins so its
+    watermark cannot be sidestepped through another event's copy.
+    """
+
+    folder, _, name = relpath.rpartition("/")
+    sizes = {"original": Photo.filename, "thumbnail": Photo.thumbnail_filename, "web": Photo.web_filename}
+    statement = select(Photo, Event).join(Event, Event.id == Photo.event_id).where(or_(*(column == name for column in sizes.values())))
+    if folder.startswith(f"{storage.BLOBS_DIRNAME}/"):
+        statement = statement.where(Photo.content_hash.is_not(None))
+    else:
+        statement = statement.where(Photo.content_hash.is_(None), Photo.event_slug == folder)
+    row = session.exec(statement.order_by(Event.watermark_text.is_(None)).limit(1)).first()
+    if not row:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Photo not found")
+    photo, event = row
+    size = next(size for size, column in sizes.items() if getattr(photo, column.key) == name)
+    return photo, event, size
 
 
 def update_photo_caption(session: Session, photo_id: UUID, caption: str) -> PhotoRead:
@@ -166,34 +903,280 @@ def update_photo_caption(session: Session, photo_id: UUID, caption: str) -> Phot
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Photo not found")
     photo.caption = caption
     session.add(photo)
+    _bump_event_version(session, photo.event_id)
     session.commit()
     session.refresh(photo)
-    return _serialize_photo(photo)
+    _invalidate_event(photo.event_slug, archives=False)
+    return _serialize_photo(photo, _image_version(session.get(Event, photo.event_id)))
 
 
 def update_photo_favorite(session: Session, photo_id: UUID, is_favorite: bool) -> PhotoRead:
     photo = session.get(Photo, photo_id)
     if not photo:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Photo not found")
+    change = int(is_favorite) - int(photo.is_favorite)
     photo.is_favorite = is_favorite
     session.add(photo)
+    _adjust_event_stats(session, {photo.event_id: (0, change, 0)})
     session.commit()
     session.refresh(photo)
-    return _serialize_photo(photo)
+    _invalidate_event(photo.event_slug, archives=False)
+    return _serialize_photo(photo, _image_version(session.get(Event, photo.event_id)))
+
+
+def _bulk_targets(session: Session, photo_ids: List[UUID]) -> Tuple[List[UUID], List[UUID], Dict[UUID, str]]:
+    """Split ``photo_ids`` into existing and missing ids and collect the events they belong to."""
+
+    ids = list(dict.fromkeys(photo_ids))
+    rows = session.exec(select(Photo.id, Photo.event_id, Photo.event_slug).where(Photo.id.in_(ids))).all()
+    found = {photo_id for photo_id, _, _ in rows}
+    events = {event_id: slug for _, event_id, slug in rows}
+    return [photo_id for photo_id in ids if photo_id in found], [photo_id for photo_id in ids if photo_id not in found], events
+
+
+def _bump_event_versions(session: Session, event_ids: List[UUID]) -> None:
+    if event_ids:
+        session.exec(update(Event).where(Event.id.in_(event_ids)).values(version=Event.version + 1))
+
+
+def set_photos_favorite(session: Session, photo_ids: List[UUID], is_favorite: bool) -> PhotoBulkResult:
+    """Flag or unflag many photos with one UPDATE."""
+
+    affected, missing, events = _bulk_targets(session, photo_ids)
+    if affected:
+        flipped = dict(
+            session.exec(
+                select(Photo.event_id, func.count(Photo.id))
+                .where(Photo.id.in_(affected), Photo.is_favorite != is_favorite)
+                .group_by(Photo.event_id)
+            ).all()
+        )
+        sign = 1 if is_favorite else -1
+        session.exec(update(Photo).where(Photo.id.in_(affected)).values(is_favorite=is_favorite))
+        _adjust_event_stats(session, {event_id: (0, sign * flipped.get(event_id, 0), 0) for event_id in events})
+        session.commit()
+    for slug in events.values():
+        _invalidate_event(slug, archives=False)
+    return PhotoBulkResult(affected=affected, missing=missing)
+
+
+def set_photo_captions(session: Session, captions: Dict[UUID, str]) -> PhotoBulkResult:
+    """Give each photo its own caption with one ``UPDATE ... SET caption = CASE id ...``."""
+
+    affected, missing, events = _bulk_targets(session, list(captions))
+    if affected:
+        caption = case({photo_id: captions[photo_id] for photo_id in affected}, value=Photo.id)
+        session.exec(update(Photo).where(Photo.id.in_(affected)).values(caption=caption))
+        _bump_event_versions(session, list(events))
+        session.commit()
+    for slug in events.values():
+        _invalidate_event(slug, archives=False)
+    return PhotoBulkResult(affected=affected, missing=missing)
+
+
+def delete_photos(session: Session, settings: Settings, photo_ids: List[UUID]) -> PhotoBulkResult:
+    """Delete many photos in one transaction and remove their files afterwards.
+
+    Rows go with a single ``DELETE ... WHERE id IN``; blob references are
+    released per digest, and stored files are only unlinked once the commit
+    has succeeded.
+    """
+
+    ids = list(dict.fromkeys(photo_ids))
+    photos = session.exec(select(Photo).where(Photo.id.in_(ids))).all()
+    found = {photo.id for photo in photos}
+    missing = [photo_id for photo_id in ids if photo_id not in found]
+    if not photos:
+        return PhotoBulkResult(affected=[], missing=missing)
+
+    references: Dict[str, int] = {}
+    legacy_files: List[Path] = []
+    legacy_sources: List[str] = []
+    by_event: Dict[UUID, List[UUID]] = {}
+    slugs: Dict[UUID, str] = {}
+    removed: Dict[UUID, Tuple[int, int, int]] = {}
+    for photo in photos:
+        if photo.content_hash:
+            references[photo.content_hash] = references.get(photo.content_hash, 0) + 1
+        else:
+            uploads_dir = _event_upload_dir(settings, photo.event_slug)
+            legacy_files.extend(uploads_dir / name for name in _photo_files(photo))
+            legacy_sources.append(storage.photo_relpath(photo))
+        by_event.setdefault(photo.event_id, []).append(photo.id)
+        slugs[photo.event_id] = photo.event_slug
+        count, favorites, size = removed.get(photo.event_id, (0, 0, 0))
+        removed[photo.event_id] = (count - 1, favorites - photo.is_favorite, size - photo.size)
+
+    affected = [photo_id for photo_id in ids if photo_id in found]
+    released = _release_blobs(session, references)
+    session.exec(update(Event).where(Event.cover_photo_id.in_(affected)).values(cover_photo_id=None))
+    _adjust_event_stats(session, removed)
+    session.exec(delete(Photo).where(Photo.id.in_(affected)))
+    session.commit()
+
+    for path in legacy_files:
+        path.unlink(missing_ok=True)
+    variants.get_variant_cache().discard(legacy_sources)
+    _unlink_blobs(session, settings, released)
+    watermark_cache = watermarks.get_watermark_cache()
+    for event_id, event_photo_ids in by_event.items():
+        watermark_cache.discard(event_id, event_photo_ids)
+        _invalidate_event(slugs[event_id])
+    return PhotoBulkResult(affected=affected, missing=missing)
 
 
 def delete_photo(session: Session, settings: Settings, photo_id: UUID) -> None:
-    photo = session.get(Photo, photo_id)
-    if not photo:
+    if not delete_photos(session, settings, [photo_id]).affected:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Photo not found")
-    uploads_dir = _event_upload_dir(settings, photo.event_slug)
-    file_path = uploads_dir / photo.filename
-    if file_path.exists():
-        file_path.unlink()
-    event = session.get(Event, photo.event_id)
-    if event and event.cover_photo_id == photo_id:
-        event.cover_photo_id = None
-        session.add(event)
-    session.delete(photo)
+
+
+def serialize_upload_session(upload: UploadSession) -> UploadSessionRead:
+    return UploadSessionRead(
+        id=upload.id,
+        eventId=upload.event_id,
+        filename=upload.name,
+        contentType=upload.content_type,
+        size=upload.size,
+        received=upload.received,
+        createdAt=upload.created_at,
+        updatedAt=upload.updated_at,
+    )
+
+
+def _prune_upload_sessions(session: Session, settings: Settings) -> None:
+    """Forget resumable uploads nobody has touched within the retention window."""
+
+    cutoff = timestamp_ms() - settings.upload_session_ttl_hours * 3600 * 1000
+    stale = session.exec(select(UploadSession).where(UploadSession.updated_at < cutoff)).all()
+    for upload in stale:
+        session.delete(upload)
+    session.commit()
+    for upload in stale:
+        storage.upload_part_path(settings, upload.id).unlink(missing_ok=True)
+
+
+def create_upload_session(
+    session: Session,
+    settings: Settings,
+    *,
+    event: Event,
+    payload: UploadSessionCreate,
+) -> UploadSessionRead:
+    if payload.size <= 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload size must be positive")
+    _prune_upload_sessions(session, settings)
+    upload = UploadSession(
+        event_id=event.id,
+        name=payload.filename,
+        content_type=payload.contentType,
+        size=payload.size,
+    )
+    storage.upload_part_path(settings, upload.id).touch()
+    session.add(upload)
+    session.commit()
+    session.refresh(upload)
+    return serialize_upload_session(upload)
+
+
+def get_upload_session_or_404(session: Session, upload_id: UUID) -> UploadSession:
+    upload = session.get(UploadSession, upload_id)
+    if not upload:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+    return upload
+
+
+def record_upload_progress(session: Session, upload: UploadSession, end: int) -> UploadSessionRead:
+    """Advance the resume offset to ``end`` unless another request already got further."""
+
+    session.exec(
+        update(UploadSession)
+        .where(UploadSession.id == upload.id)
+        .values(
+            received=case((UploadSession.received < end, end), else_=UploadSession.received),
+            updated_at=timestamp_ms(),
+        )
+    )
+    session.commit()
+    session.refresh(upload)
+    return serialize_upload_session(upload)
+
+
+def complete_upload_session(
+    session: Session,
+    settings: Settings,
+    *,
+    upload: UploadSession,
+    event: Event,
+    stored: PhotoUpload,
+) -> PhotoRead:
+    """Register the assembled file and drop its upload session in the same transaction."""
+
+    session.delete(upload)
+    return register_photo(session, settings, event=event, upload=stored)
+
+
+def delete_upload_session(session: Session, settings: Settings, upload_id: UUID) -> None:
+    upload = get_upload_session_or_404(session, upload_id)
+    session.delete(upload)
     session.commit()
+    storage.upload_part_path(settings, upload_id).unlink(missing_ok=True)
 
+
+def serialize_job(job: Job) -> JobRead:
+    return JobRead(
+        id=job.id,
+        kind=job.kind,
+        eventId=job.event_id,
+        photoId=job.photo_id,
+        status=job.status,
+        attempts=job.attempts,
+        maxAttempts=job.max_attempts,
+        lastError=job.last_error,
+        createdAt=job.created_at,
+        updatedAt=job.updated_at,
+    )
+
+
+def enqueue_job(
+    session: Session,
+    kind: str,
+    *,
+    event_id: UUID | None = None,
+    photo_id: UUID | None = None,
+    content_hash: str | None = None,
+    max_attempts: int = 5,
+) -> Job:
+    """Add a job to the session; it becomes visible to workers when the caller commits."""
+
+    job = Job(kind=kind, event_id=event_id, photo_id=photo_id, content_hash=content_hash, max_attempts=max_attempts)
+    session.add(job)
+    return job
+
+
+def list_jobs(
+    session: Session,
+    *,
+    event_id: UUID | None = None,
+    job_status: str | None = None,
+    limit: int = 100,
+) -> List[JobRead]:
+    statement = select(Job).order_by(Job.created_at.desc()).limit(limit)
+    if event_id:
+        statement = statement.where(Job.event_id == event_id)
+    if job_status:
+        statement = statement.where(Job.status == job_status)
+    return [serialize_job(job) for job in session.exec(statement).all()]
+
+
+def get_job_or_404(session: Session, job_id: UUID) -> JobRead:
+    job = session.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return serialize_job(job)
+
+
+def job_stats(session: Session, *, event_id: UUID | None = None) -> JobStats:
+    statement = select(Job.status, func.count()).group_by(Job.status)
+    if event_id:
+        statement = statement.where(Job.event_id == event_id)
+    return JobStats(**{job_status: count for job_status, count in session.exec(statement).all()})
@@ -1,18 +1,95 @@
 from __future__ import annotations
 
+from sqlalchemy import event, inspect, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.schema import CreateIndex
 from sqlmodel import Session, SQLModel, create_engine
 
-from .config import get_settings
+from .config import Settings, get_settings
+from .models import Event, event_stats
+from .search import install_search_index
+
+
+def _engine_options(settings: Settings) -> dict:
+    """Return ``create_engine`` keyword arguments for the configured database profile."""
+
+    is_sqlite = settings.database_url.startswith("sqlite")
+    connect_args: dict = {"check_same_thread": False} if is_sqlite else {}
+    if settings.database_profile != "production":
+        return {"connect_args": connect_args}
+
+    if is_sqlite:
+        connect_args["timeout"] = settings.sqlite_busy_timeout_ms / 1000
+    return {
+        "connect_args": connect_args,
+        "poolclass": QueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_pre_ping": True,
+    }
+
+
+def _install_sqlite_pragmas(engine, settings: Settings) -> None:
+    """Tune every new SQLite connection for concurrent readers and writers."""
+
+    in_memory = make_url(settings.database_url).database in (None, "", ":memory:")
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, _connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            if not in_memory:
+                cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+            cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+            cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+            cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+            cursor.execute(f"PRAGMA cache_size={-int(settings.sqlite_cache_size_kib)}")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+        finally:
+            cursor.close()
+
 
 settings = get_settings()
-connect_args = {"check_same_thread": False} if settings.database_url.startswith("sqlite") else {}
-engine = create_engine(settings.database_url, connect_args=connect_args)
+engine = create_engine(settings.database_url, **_engine_options(settings))
+if settings.database_profile == "production" and settings.database_url.startswith("sqlite"):
+    _install_sqlite_pragmas(engine, settings)
+
+
+def _upgrade_schema() -> None:
+    """Add columns and indexes that were introduced after a table was first created."""
+
+    inspector = inspect(engine)
+    added = set()
+    with engine.begin() as connection:
+        for table in SQLModel.metadata.tables.values():
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column.type.compile(dialect=engine.dialect)}'
+                if column.server_default is not None:
+                    ddl += f" NOT NULL DEFAULT {column.server_default.arg}"
+                connection.exec_driver_sql(ddl)
+                added.add((table.name, column.name))
+            # Reflection cannot see expression indexes, so let the database skip existing ones by name.
+            for index in table.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+        stats = event_stats()
+        if any((Event.__tablename__, name) in added for name in stats):
+            # Counters that were just added start at zero; fill them from the existing photos once.
+            connection.execute(update(Event).values(**stats))
+        install_search_index(connection)
 
 
 def init_db() -> None:
     """Create database tables."""
 
     SQLModel.metadata.create_all(engine)
+    _upgrade_schema()
 
 
 def get_session():
@@ -20,4 +97,3 @@ def get_session():
 
     with Session(engine) as session:
         yield session
-
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, Iterator, Sequence
+from uuid import UUID
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+    logger.warning("orjson is not installed; JSON listings fall back to the slower standard library encoder.")
+
+MEDIA_TYPE = "application/json"
+ARRAY_CHUNK_SIZE = 500
+# Listings longer than this are streamed rather than encoded into one body.
+STREAM_THRESHOLD = 2000
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """Encode plain data (dicts, lists, strings, numbers, UUIDs) as compact UTF-8 JSON."""
+
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=_default).encode()
+
+
+def iter_array(items: Sequence[Any], chunk_size: int = ARRAY_CHUNK_SIZE) -> Iterator[bytes]:
+    """Encode ``items`` as one JSON array, yielding it ``chunk_size`` elements at a time."""
+
+    yield b"["
+    for start in range(0, len(items), chunk_size):
+        body = dumps(list(items[start : start + chunk_size]))[1:-1]
+        yield b"," + body if start else body
+    yield b"]"
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+from fastapi import Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+class CacheControlMiddleware:
+    """Adds ``Cache-Control`` to successful responses whose path starts with a configured prefix.
+
+    Built frontend assets carry a content hash in their names, so anything
+    served from those paths can be cached by browsers and CDNs forever.
+    """
+
+    def __init__(self, app: ASGIApp, rules: Iterable[Tuple[str, str]]) -> None:
+        self.app = app
+        self.rules = tuple(rules)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
+        cache_control = next((value for prefix, value in self.rules if path.startswith(prefix)), None)
+        if cache_control is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cache_control(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] in (200, 206, 304):
+                headers = MutableHeaders(scope=message)
+                headers.setdefault("cache-control", cache_control)
+            await send(message)
+
+        await self.app(scope, receive, send_with_cache_control)
+
+
+def weak_etag(*parts: object) -> str:
+    digest = hashlib.sha1("\0".join(str(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def not_modified(request: Request, etag: str, headers: Dict[str, str]) -> Optional[Response]:
+    """Return a 304 carrying ``headers`` when the client's ``If-None-Match`` covers ``etag``."""
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={**headers, "ETag": etag})
+    return None
+
+
+def conditional_response(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Tag ``response`` with ``etag`` and return a 304 when the client already holds it."""
+
+    headers = {"ETag": etag, "Cache-Control": REVALIDATE}
+    cached = not_modified(request, etag, headers)
+    if cached is None:
+        response.headers.update(headers)
+    return cached
+
+
+def payload_response(
+    request: Request, body: Union[bytes, Iterable[bytes]], etag: str, headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """Send pre-serialized JSON, or a 304 when the client's copy is still current.
+
+    ``body`` is either the whole document or an iterator of chunks to stream.
+    """
+
+    headers = {**(headers or {}), "ETag": etag, "Cache-Control": REVALIDATE}
+    cached = not_modified(request, etag, headers)
+    if cached is not None:
+        return cached
+    if isinstance(body, bytes):
+        return Response(content=body, media_type="application/json", headers=headers)
+    return StreamingResponse(body, media_type="application/json", headers=headers)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache, partial
+from typing import Any, Callable, Optional, TypeVar
+
+from PIL import Image
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    from pillow_heif import register_heif_opener
+except ModuleNotFoundError:
+    register_heif_opener = None
+    logger.warning("pillow-heif is not installed; HEIC uploads will fail to process.")
+
+T = TypeVar("T")
+
+
+class WorkerQueueFull(Exception):
+    """No pool slot freed up within the queue timeout; callers should retry after ``retry_after`` seconds."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("Image processing queue is full, please retry shortly")
+        self.retry_after = retry_after
+
+
+def configure_pillow() -> None:
+    """Register the HEIF opener and align Pillow's decompression-bomb guard with ``max_image_pixels``.
+
+    Runs on import for the serving process and as the initializer of every pool
+    process, so tasks see the same Pillow setup whatever module they come from.
+    """
+
+    if register_heif_opener is not None:
+        register_heif_opener()
+    # Uploads are rejected above ``max_image_pixels`` before they are decoded; keep Pillow's own
+    # guard at the same ceiling (it raises at twice the value) for anything else.
+    Image.MAX_IMAGE_PIXELS = get_settings().max_image_pixels or None
+
+
+configure_pillow()
+
+
+class ImageWorkerPool:
+    """Runs Pillow work in a process pool so decoding never blocks the event loop.
+
+    At most ``max_pending`` jobs are queued or running at once; callers beyond that
+    wait for a slot and get ``WorkerQueueFull`` once ``queue_timeout`` seconds have passed.
+    A worker that dies (e.g. killed for memory on a huge decode) breaks the
+    executor; the jobs it had in flight fail and a fresh executor takes over.
+    """
+
+    def __init__(self, *, max_workers: int, max_pending: int, queue_timeout: float) -> None:
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def start(self) -> None:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=configure_pillow,
+            )
+            logger.info("Started image worker pool with %s processes", self.max_workers)
+
+    def _replace_broken(self, executor: ProcessPoolExecutor) -> None:
+        if self._executor is not executor:
+            return
+        logger.error("An image worker process died; restarting the pool")
+        self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+        self.start()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        self._slots = None
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Execute ``fn(*args, **kwargs)`` in a worker process and await its result."""
+
+        self.start()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        # Release the semaphore we acquired even if ``shutdown`` replaces it meanwhile.
+        slots = self._slots
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError as exc:
+            raise WorkerQueueFull(max(1, int(self.queue_timeout))) from exc
+        try:
+            loop = asyncio.get_running_loop()
+            call = partial(fn, *args, **kwargs)
+            executor = self._executor
+            try:
+                future = loop.run_in_executor(executor, call)
+            except BrokenProcessPool:
+                # The pool broke before this job was submitted, so it is safe to run on a fresh one.
+                self._replace_broken(executor)
+                executor = self._executor
+                future = loop.run_in_executor(executor, call)
+            try:
+                return await future
+            except BrokenProcessPool:
+                self._replace_broken(executor)
+                raise
+        finally:
+            slots.release()
+
+
+@lru_cache()
+def get_image_worker() -> ImageWorkerPool:
+    """Return the process-wide image worker pool configured from settings."""
+
+    settings = get_settings()
+    max_workers = settings.image_workers or os.cpu_count() or 1
+    return ImageWorkerPool(
+        max_workers=max_workers,
+        max_pending=settings.image_queue_depth or max_workers * 4,
+        queue_timeout=settings.image_queue_timeout,
+    )
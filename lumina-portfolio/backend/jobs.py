@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import delete, or_, update
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from . import crud, renditions, storage
+from .config import Settings, get_settings
+from .database import engine
+from .image_worker import get_image_worker
+from .metadata import extract_metadata
+from .placeholders import compute_placeholder
+from .models import Job, Photo, timestamp_ms
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Job, Settings], Awaitable[None]]
+
+
+async def process_photo(job: Job, settings: Settings) -> None:
+    """Generate renditions, a loading placeholder and capture metadata for a freshly uploaded photo.
+
+    Jobs for content-addressed uploads process the blob and run as long as any
+    photo still references it, whichever photo queued them.
+    """
+
+    with Session(engine) as session:
+        digest = job.content_hash
+        photo = None
+        if digest is None:
+            photo = session.get(Photo, job.photo_id)
+            if not photo:
+                return
+            # Jobs queued before they carried the digest.
+            digest = photo.content_hash
+        if digest:
+            blob = crud.find_blob(session, digest)
+            if not blob:
+                return
+            if blob.thumbnail_filename:
+                # Another upload of the same bytes already rendered this blob.
+                crud.record_blob_processing(session, digest)
+                return
+            destination = storage.blob_dir(settings, digest)
+            stem = digest
+            source = destination / blob.filename
+        else:
+            destination = Path(settings.uploads_dir) / photo.event_slug / renditions.RENDITIONS_DIRNAME
+            stem = Path(photo.filename).stem
+            source = storage.photo_path(settings, photo)
+
+    pool = get_image_worker()
+    placeholder: Dict[str, Optional[str]] = {}
+
+    async def _render() -> Dict[str, str]:
+        created = await pool.run(
+            renditions.generate_renditions,
+            source,
+            destination,
+            stem,
+            specs=renditions.rendition_specs(settings),
+            image_format=settings.rendition_format,
+            quality=settings.rendition_quality,
+        )
+        # The thumbnail is already small and upright, so the placeholder never decodes the original again.
+        thumbnail = created.get("thumbnail")
+        try:
+            placeholder.update(await pool.run(compute_placeholder, destination / thumbnail if thumbnail else source))
+        except Exception as exc:
+            logger.warning("Could not compute a placeholder for %s: %r", source, exc)
+        return created
+
+    created, metadata = await asyncio.gather(_render(), pool.run(extract_metadata, source), return_exceptions=True)
+    if isinstance(created, BaseException):
+        raise created
+    if isinstance(metadata, BaseException):
+        # Unreadable EXIF must not hold back the renditions; the photo simply sorts by upload time.
+        logger.warning("Could not read metadata from %s: %r", source, metadata)
+        metadata = None
+    if placeholder:
+        metadata = {**(metadata or {}), **placeholder}
+
+    def _record() -> None:
+        with Session(engine) as session:
+            if digest:
+                recorded = crud.record_blob_processing(session, digest, created, metadata)
+            else:
+                recorded = crud.record_photo_processing(
+                    session,
+                    job.photo_id,
+                    {name: f"{renditions.RENDITIONS_DIRNAME}/{filename}" for name, filename in created.items()},
+                    metadata,
+                )
+            if not recorded:
+                # The photo was deleted while we were rendering; drop the orphaned files.
+                for filename in created.values():
+                    (destination / filename).unlink(missing_ok=True)
+
+    await run_in_threadpool(_record)
+
+
+HANDLERS: Dict[str, JobHandler] = {
+    crud.JOB_PROCESS_PHOTO: process_photo,
+}
+
+
+class JobWorker:
+    """Polls the ``job`` table and runs due jobs on the event loop.
+
+    Jobs are claimed with a lease, so work held by a crashed process becomes
+    claimable again once the lease expires, and several uvicorn workers can
+    share one queue. Failed jobs are retried with exponential backoff until
+    ``max_attempts`` is reached.
+    """
+
+    def __init__(self, settings: Settings, handlers: Dict[str, JobHandler]) -> None:
+        self.settings = settings
+        self.handlers = handlers
+        self.concurrency = settings.job_concurrency or get_image_worker().max_workers
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running: Dict[asyncio.Task, UUID] = {}
+        self._last_prune = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._loop(), name="job-worker")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        interrupted = [job_id for task, job_id in self._running.items() if not task.done()]
+        for task in list(self._running):
+            task.cancel()
+        await asyncio.gather(self._task, *self._running, return_exceptions=True)
+        self._task = None
+        self._running.clear()
+        if interrupted:
+            await run_in_threadpool(self._release, interrupted)
+
+    def notify(self) -> None:
+        """Wake the worker so newly committed jobs start without waiting for the next poll."""
+
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self._fill_slots()
+                await run_in_threadpool(self._prune_finished)
+            except Exception:  # pragma: no cover - keep the loop alive on database hiccups
+                logger.exception("Job worker iteration failed")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.settings.job_poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fill_slots(self) -> None:
+        while len(self._running) < self.concurrency:
+            job = await run_in_threadpool(self._claim_next)
+            if job is None:
+                return
+            task = asyncio.create_task(self._execute(job))
+            self._running[task] = job.id
+            task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._running.pop(task, None)
+        self.notify()
+
+    def _claim_next(self) -> Optional[Job]:
+        now = timestamp_ms()
+        due = or_(
+            (Job.status == "queued") & (Job.run_after <= now),
+            (Job.status == "running") & (Job.locked_until < now),
+        )
+        with Session(engine) as session:
+            while True:
+                job = session.exec(select(Job).where(due).order_by(Job.run_after).limit(1)).first()
+                if job is None:
+                    return None
+                claimed = session.exec(
+                    update(Job)
+                    .where(Job.id == job.id, due)
+                    .values(
+                        status="running",
+                        attempts=Job.attempts + 1,
+                        locked_until=now + self.settings.job_lease_seconds * 1000,
+                        updated_at=now,
+                    )
+                )
+                session.commit()
+                if claimed.rowcount == 1:
+                    session.refresh(job)
+                    session.expunge(job)
+                    return job
+
+    async def _execute(self, job: Job) -> None:
+        handler = self.handlers.get(job.kind)
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind {job.kind!r}")
+            await handler(job, self.settings)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.exception("Job %s (%s) failed on attempt %s", job.id, job.kind, job.attempts)
+            await run_in_threadpool(self._finish, job.id, exc, job.attempts >= job.max_attempts, job.attempts)
+        else:
+            await run_in_threadpool(self._finish, job.id, None, False, job.attempts)
+
+    def _finish(self, job_id: UUID, error: Exception | None, exhausted: bool, attempts: int) -> None:
+        now = timestamp_ms()
+        values: dict = {"updated_at": now, "locked_until": None}
+        if error is None:
+            values.update(status="done", last_error=None)
+        elif exhausted:
+            values.update(status="failed", last_error=repr(error))
+        else:
+            backoff_ms = int(self.settings.job_retry_backoff * 1000 * 2 ** (attempts - 1))
+            values.update(status="queued", last_error=repr(error), run_after=now + backoff_ms)
+        with Session(engine) as session:
+            session.exec(update(Job).where(Job.id == job_id).values(**values))
+            session.commit()
+
+    def _release(self, job_ids: List[UUID]) -> None:
+        """Hand jobs interrupted by shutdown back to the queue without counting the attempt."""
+
+        with Session(engine) as session:
+            session.exec(
+                update(Job)
+                .where(Job.id.in_(job_ids), Job.status == "running")
+                .values(status="queued", attempts=Job.attempts - 1, locked_until=None, updated_at=timestamp_ms())
+            )
+            session.commit()
+
+    def _prune_finished(self) -> None:
+        now = timestamp_ms()
+        if now - self._last_prune < 3600 * 1000:
+            return
+        self._last_prune = now
+        cutoff = now - self.settings.job_retention_hours * 3600 * 1000
+        with Session(engine) as session:
+            session.exec(delete(Job).where(Job.status == "done", Job.updated_at < cutoff))
+            session.commit()
+
+
+@lru_cache()
+def get_job_worker() -> JobWorker:
+    """Return the process-wide job worker."""
+
+    return JobWorker(get_settings(), HANDLERS)
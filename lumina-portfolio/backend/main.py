@@ -1,12 +1,20 @@
 from __future__ import annotations
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from .config import get_settings
-from .database import init_db
-from .routers import admin, events, photos
+from .database import engine, init_db
+from .http_cache import IMMUTABLE, CacheControlMiddleware
+from .image_worker import WorkerQueueFull, get_image_worker
+from .jobs import get_job_worker
+from .metrics import CONTENT_TYPE, MetricsMiddleware, SlowRequestProfiler, get_metrics, profile_sync_endpoints
+from .reaper import get_reaper
+from .routers import admin, events, images, jobs, photos, search, uploads
+from .routers.pagination import NEXT_CURSOR_HEADER
+from .routers.uploads import UPLOAD_OFFSET_HEADER
 
 settings = get_settings()
 app = FastAPI(
@@ -22,13 +30,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, UPLOAD_OFFSET_HEADER, "ETag"],
 )
+app.add_middleware(CacheControlMiddleware, rules=[("/assets/", IMMUTABLE)])
+
+
+@app.exception_handler(WorkerQueueFull)
+async def handle_worker_queue_full(request: Request, exc: WorkerQueueFull) -> JSONResponse:
+    return JSONResponse(
+        {"detail": str(exc)},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 
 app.include_router(admin.router, prefix=settings.api_prefix)
 app.include_router(events.router, prefix=settings.api_prefix)
 app.include_router(photos.router, prefix=settings.api_prefix)
+app.include_router(images.router, prefix=settings.api_prefix)
+app.include_router(jobs.router, prefix=settings.api_prefix)
+app.include_router(uploads.router, prefix=settings.api_prefix)
+app.include_router(search.router, prefix=settings.api_prefix)
 
-app.mount("/static", StaticFiles(directory=settings.uploads_dir), name="static")
+app.include_router(images.static_router)
 
 
 @app.get("/health", tags=["meta"])
@@ -36,9 +60,32 @@ def healthcheck() -> dict[str, str]:
     return {"status": "ok"}
 
 
+if settings.metrics_enabled:
+    get_metrics().instrument_engine(engine)
+    profiler = None
+    if settings.slow_request_seconds is not None:
+        profiler = SlowRequestProfiler(settings.slow_request_seconds, settings.profile_dir)
+        profile_sync_endpoints(app.routes)
+    app.add_middleware(MetricsMiddleware, metrics=get_metrics(), profiler=profiler)
+
+    @app.get("/metrics", tags=["meta"], include_in_schema=False)
+    def metrics() -> Response:
+        return Response(get_metrics().render(), media_type=CONTENT_TYPE)
+
+
 @app.on_event("startup")
-def handle_startup() -> None:
+async def handle_startup() -> None:
     init_db()
+    get_image_worker().start()
+    get_job_worker().start()
+    get_reaper().start()
+
+
+@app.on_event("shutdown")
+async def handle_shutdown() -> None:
+    await get_reaper().stop()
+    await get_job_worker().stop()
+    get_image_worker().shutdown()
 
 
 if settings.frontend_dist and settings.frontend_dist.exists():
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from PIL import ExifTags, Image
+
+from .models import METADATA_FIELDS
+
+_DATETIME_ORIGINAL = 0x9003
+_DATETIME_DIGITIZED = 0x9004
+_OFFSET_TIME_ORIGINAL = 0x9011
+_LENS_MODEL = 0xA434
+_GPS_LATITUDE_REF = 0x0001
+_GPS_LATITUDE = 0x0002
+_GPS_LONGITUDE_REF = 0x0003
+_GPS_LONGITUDE = 0x0004
+
+
+def _text(value: Any) -> Optional[str]:
+    if isinstance(value, bytes):
+        value = value.decode("utf-8", "replace")
+    if not isinstance(value, str):
+        return None
+    value = value.replace("\x00", "").strip()
+    return value[:255] or None
+
+
+def _timestamp(value: Any, offset: Any) -> Optional[int]:
+    """Convert an EXIF ``YYYY:MM:DD HH:MM:SS`` stamp to epoch milliseconds.
+
+    Cameras record local time; without an ``OffsetTimeOriginal`` tag it is read
+    as UTC, which keeps the ordering within a shoot correct.
+    """
+
+    text = _text(value)
+    if not text:
+        return None
+    try:
+        moment = datetime.strptime(text[:19], "%Y:%m:%d %H:%M:%S")
+    except ValueError:
+        return None
+    tz = timezone.utc
+    offset_text = _text(offset)
+    if offset_text and len(offset_text) == 6 and offset_text[0] in "+-":
+        try:
+            delta = timedelta(hours=int(offset_text[1:3]), minutes=int(offset_text[4:6]))
+        except ValueError:
+            delta = timedelta()
+        tz = timezone(delta if offset_text[0] == "+" else -delta)
+    return int(moment.replace(tzinfo=tz).timestamp() * 1000)
+
+
+def _coordinate(value: Any, ref: Any) -> Optional[float]:
+    try:
+        degrees, minutes, seconds = (float(part) for part in value)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    result = degrees + minutes / 60 + seconds / 3600
+    if _text(ref) in ("S", "W"):
+        result = -result
+    return round(result, 7)
+
+
+def extract_metadata(path: Path) -> Dict[str, Any]:
+    """Read capture time, camera, lens, orientation and GPS position without decoding pixels."""
+
+    metadata: Dict[str, Any] = dict.fromkeys(METADATA_FIELDS)
+    with Image.open(path) as image:
+        exif = image.getexif()
+    if not exif:
+        return metadata
+
+    details = exif.get_ifd(ExifTags.IFD.Exif)
+    gps = exif.get_ifd(ExifTags.IFD.GPSInfo)
+    metadata["captured_at"] = _timestamp(
+        details.get(_DATETIME_ORIGINAL) or details.get(_DATETIME_DIGITIZED) or exif.get(ExifTags.Base.DateTime),
+        details.get(_OFFSET_TIME_ORIGINAL),
+    )
+    metadata["camera_make"] = _text(exif.get(ExifTags.Base.Make))
+    metadata["camera_model"] = _text(exif.get(ExifTags.Base.Model))
+    metadata["lens_model"] = _text(details.get(_LENS_MODEL))
+    orientation = exif.get(ExifTags.Base.Orientation)
+    metadata["orientation"] = orientation if isinstance(orientation, int) and 1 <= orientation <= 8 else None
+    if gps:
+        latitude = _coordinate(gps.get(_GPS_LATITUDE), gps.get(_GPS_LATITUDE_REF))
+        longitude = _coordinate(gps.get(_GPS_LONGITUDE), gps.get(_GPS_LONGITUDE_REF))
+        if latitude is not None and longitude is not None and abs(latitude) <= 90 and abs(longitude) <= 180:
+            metadata["latitude"], metadata["longitude"] = latitude, longitude
+    return metadata
@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import cProfile
+import contextvars
+import functools
+import inspect
+import logging
+import pstats
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+_QUERY_OPERATIONS = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE", "PRAGMA", "BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "CREATE", "ALTER"})
+_UNMATCHED = "<unmatched>"
+
+# Set for the duration of each instrumented request; read by stage timers and the profiler.
+_request_started: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_started", default=None)
+_active_profiles: contextvars.ContextVar[Optional[List[cProfile.Profile]]] = contextvars.ContextVar("active_profiles", default=None)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Family:
+    """A named metric with a fixed set of label names; children are keyed by label values."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: non-cumulative bucket counts (the last one is +Inf), sum of observations.
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(labels, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._values.items())
+        lines = self.header()
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                bucket = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, bucket)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Metrics:
+    """The application's metrics, rendered in the Prometheus text exposition format.
+
+    Values live in process memory, so with several server workers every
+    process reports its own series and the scraper sums them.
+    """
+
+    def __init__(self) -> None:
+        self.requests = Counter("lumina_http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status"))
+        self.request_duration = Histogram(
+            "lumina_http_request_duration_seconds", "Time from receiving a request until its response finished.", ("method", "route")
+        )
+        self.in_flight = Gauge("lumina_http_requests_in_flight", "Requests currently being handled.", ("method", "route"))
+        self.stage_duration = Histogram("lumina_stage_duration_seconds", "Time spent in named steps of the upload and archive paths.", ("stage",))
+        self.queries = Counter("lumina_db_queries_total", "Database statements executed, by SQL verb.", ("operation",))
+        self.query_duration = Histogram("lumina_db_query_duration_seconds", "Database statement execution time.", ("operation",), QUERY_BUCKETS)
+        self.query_errors = Counter("lumina_db_query_errors_total", "Database statements that raised.", ("operation",))
+        self._families: Tuple[_Family, ...] = (
+            self.requests,
+            self.request_duration,
+            self.in_flight,
+            self.stage_duration,
+            self.queries,
+            self.query_duration,
+            self.query_errors,
+        )
+
+    def render(self) -> str:
+        return "\n".join(line for family in self._families for line in family.render()) + "\n"
+
+    def stage(self, name: str):
+        """Time the enclosed block as ``name``; works across ``await``."""
+
+        return self.stage_duration.time(name)
+
+    def observe_since_request_start(self, name: str) -> None:
+        """Record the time since the current request arrived as stage ``name``, e.g. body parsing before the endpoint."""
+
+        started = _request_started.get()
+        if started is not None:
+            self.stage_duration.observe(time.perf_counter() - started, name)
+
+    def instrument_engine(self, engine: Engine) -> None:
+        """Count and time every statement ``engine`` executes."""
+
+        def operation(statement: str) -> str:
+            verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+            return verb if verb in _QUERY_OPERATIONS else "OTHER"
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+            conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after(conn, cursor, statement, parameters, context, executemany) -> None:
+            started = conn.info["metrics_query_start"].pop()
+            name = operation(statement)
+            self.queries.inc(name)
+            self.query_duration.observe(time.perf_counter() - started, name)
+
+        @event.listens_for(engine, "handle_error")
+        def _error(context) -> None:
+            starts = context.connection.info.get("metrics_query_start") if context.connection is not None else None
+            if starts:
+                starts.pop()
+            self.query_errors.inc(operation(context.statement or ""))
+
+
+class SlowRequestProfiler:
+    """Profiles requests with cProfile and keeps the captures of those slower than ``threshold`` seconds.
+
+    Only one request is profiled at a time, because a thread can run a single
+    profiler; requests arriving meanwhile are served unprofiled. Work other
+    requests do on the event loop during the capture shows up in it too.
+    Synchronous endpoints run in the threadpool and are captured there, see
+    :func:`profile_sync_endpoints`.
+    """
+
+    def __init__(self, threshold: float, directory: Path) -> None:
+        self.threshold = threshold
+        self.directory = Path(directory)
+        self._busy = threading.Lock()
+
+    def begin(self) -> Optional[Tuple[List[cProfile.Profile], contextvars.Token]]:
+        if not self._busy.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows one profiler per process; another tool holds it.
+            self._busy.release()
+            return None
+        profiles = [profile]
+        token = _active_profiles.set(profiles)
+        return profiles, token
+
+    async def finish(self, capture: Tuple[List[cProfile.Profile], contextvars.Token], elapsed: float, method: str, path: str) -> None:
+        profiles, token = capture
+        profiles[0].disable()
+        _active_profiles.reset(token)
+        self._busy.release()
+        if elapsed >= self.threshold:
+            await run_in_threadpool(self._dump, profiles, elapsed, method, path)
+
+    def _dump(self, profiles: List[cProfile.Profile], elapsed: float, method: str, path: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", path).strip("-") or "root"
+        target = self.directory / f"{time.strftime('%Y%m%dT%H%M%S')}-{method.lower()}-{slug[:80]}-{int(elapsed * 1000)}ms.prof"
+        pstats.Stats(*profiles).dump_stats(str(target))
+        logger.warning("Slow request %s %s took %.2fs; profile written to %s", method, path, elapsed, target)
+
+
+def profile_sync_endpoints(routes: Sequence[object]) -> None:
+    """Let the slow-request profiler see synchronous endpoints, which FastAPI runs in worker threads.
+
+    Each wrapped call starts its own profiler in the worker thread while a
+    capture is active; the captures are merged when the request finishes.
+    From Python 3.12 cProfile is built on ``sys.monitoring``, which admits a
+    single profiler per process that already sees every thread, so the
+    request's own capture covers the call and no second one is started.
+    """
+
+    for route in routes:
+        if not isinstance(route, APIRoute) or inspect.iscoroutinefunction(route.dependant.call):
+            continue
+        route.dependant.call = _profiled(route.dependant.call)
+
+
+def _profiled(call: Callable) -> Callable:
+    @functools.wraps(call)
+    def wrapper(*args, **kwargs):
+        profiles = _active_profiles.get()
+        if profiles is None:
+            return call(*args, **kwargs)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return call(*args, **kwargs)
+        profiles.append(profile)
+        try:
+            return call(*args, **kwargs)
+        finally:
+            profile.disable()
+
+    return wrapper
+
+
+class MetricsMiddleware:
+    """Records latency, status and concurrency of every HTTP request under its route template.
+
+    Paths are labelled by the route that matches them (``/api/events/{slug}``)
+    rather than the raw URL, so ids do not create new series.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: "Metrics", profiler: Optional[SlowRequestProfiler] = None) -> None:
+        self.app = app
+        self.metrics = metrics
+        self.profiler = profiler
+
+    @staticmethod
+    def _route(scope: Scope) -> str:
+        partial = None
+        for route in getattr(scope.get("app"), "routes", ()):
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", "") or "/"
+            if match == Match.PARTIAL and partial is None:
+                # Path matches but the method does not; used only if no route accepts the method.
+                partial = getattr(route, "path", "") or "/"
+        return partial or _UNMATCHED
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self._route(scope)
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.metrics.in_flight.inc(method, route)
+        started = time.perf_counter()
+        token = _request_started.set(started)
+        capture = self.profiler.begin() if self.profiler is not None else None
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_started.reset(token)
+            self.metrics.in_flight.dec(method, route)
+            self.metrics.request_duration.observe(elapsed, method, route)
+            self.metrics.requests.inc(method, route, str(status_code))
+            if capture is not None:
+                await self.profiler.finish(capture, elapsed, method, scope["path"])
+
+
+@lru_cache()
+def get_metrics() -> Metrics:
+    """Return the process-wide metrics registry."""
+
+    return Metrics()
@@ -2,10 +2,13 @@ from __future__ import annotations
 
 import time
 from datetime import date
-from typing import Optional
+from pathlib import Path
+from typing import List, Literal, Optional
 from uuid import UUID, uuid4
 
 from pydantic import BaseModel, ConfigDict
+from pydantic import Field as PydanticField
+from sqlalchemy import Index, func, select
 from sqlmodel import Field, SQLModel
 
 
@@ -26,10 +29,39 @@ class Event(SQLModel, table=True):
     watermark_text: Optional[str] = None
     cover_photo_id: Optional[UUID] = Field(default=None, foreign_key="photo.id")
     created_at: int = Field(default_factory=timestamp_ms, index=True)
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
+    watermark_version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
+    # Denormalized from the event's photos; kept current by every mutation in ``crud``.
+    photo_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    favorite_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    total_bytes: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
 
-class Photo(SQLModel, table=True):
+class PhotoMetadata(SQLModel):
+    """Details read from a photo during upload processing: EXIF capture data and a loading placeholder."""
+
+    captured_at: Optional[int] = None
+    camera_make: Optional[str] = None
+    camera_model: Optional[str] = None
+    lens_model: Optional[str] = None
+    orientation: Optional[int] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    blurhash: Optional[str] = None
+    dominant_color: Optional[str] = None
+
+
+METADATA_FIELDS = tuple(PhotoMetadata.model_fields)
+
+
+class Photo(PhotoMetadata, table=True):
     """Persisted photo representation."""
 
+    __table_args__ = (
+        Index("ix_photo_uploaded_at_id", "uploaded_at", "id"),
+        Index("ix_photo_event_id_uploaded_at_id", "event_id", "uploaded_at", "id"),
+        Index("ix_photo_event_id_camera_model", "event_id", "camera_model"),
+    )
+
     id: UUID = Field(default_factory=uuid4, primary_key=True, index=True)
     event_id: UUID = Field(foreign_key="event.id", index=True)
     event_slug: str = Field(index=True)
@@ -40,9 +72,94 @@ class Photo(SQLModel, table=True):
     width: int
     height: int
     size: int
+    content_hash: Optional[str] = Field(default=None, index=True)
+    thumbnail_filename: Optional[str] = None
+    web_filename: Optional[str] = None
     uploaded_at: int = Field(default_factory=timestamp_ms, index=True)
     is_favorite: bool = Field(default=False, index=True)
 
+
+def photo_taken_at():
+    """Sort key for capture order; photos without a capture time fall back to their upload time."""
+
+    return func.coalesce(Photo.captured_at, Photo.uploaded_at)
+
+
+Index("ix_photo_taken_at_id", photo_taken_at(), Photo.id)
+Index("ix_photo_event_id_taken_at_id", Photo.event_id, photo_taken_at(), Photo.id)
+
+
+def event_stats():
+    """Correlated subqueries that recount an event's denormalized photo statistics, keyed by column."""
+
+    of_event = Photo.event_id == Event.id
+    return {
+        "photo_count": select(func.count(Photo.id)).where(of_event).scalar_subquery(),
+        "favorite_count": select(func.count(Photo.id)).where(of_event, Photo.is_favorite).scalar_subquery(),
+        "total_bytes": select(func.coalesce(func.sum(Photo.size), 0)).where(of_event).scalar_subquery(),
+    }
+
+
+class Blob(PhotoMetadata, table=True):
+    """Content-addressed original shared by every photo with the same bytes."""
+
+    digest: str = Field(primary_key=True)
+    filename: str
+    content_type: Optional[str] = None
+    width: int
+    height: int
+    size: int
+    thumbnail_filename: Optional[str] = None
+    web_filename: Optional[str] = None
+    ref_count: int = 0
+    created_at: int = Field(default_factory=timestamp_ms)
+
+
+class UploadSession(SQLModel, table=True):
+    """A resumable upload whose bytes arrive in ranged chunks before it becomes a photo."""
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True, index=True)
+    event_id: UUID = Field(foreign_key="event.id", index=True)
+    name: str
+    content_type: Optional[str] = None
+    size: int
+    received: int = 0
+    created_at: int = Field(default_factory=timestamp_ms)
+    updated_at: int = Field(default_factory=timestamp_ms, index=True)
+
+
+class Job(SQLModel, table=True):
+    """Persisted background job, e.g. post-upload processing of a photo."""
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True, index=True)
+    kind: str = Field(index=True)
+    event_id: Optional[UUID] = Field(default=None, index=True)
+    photo_id: Optional[UUID] = Field(default=None, index=True)
+    # Processing of content-addressed bytes belongs to their blob, which outlives the photo that queued it.
+    content_hash: Optional[str] = None
+    status: str = Field(default="queued", index=True)
+    attempts: int = 0
+    max_attempts: int = 5
+    last_error: Optional[str] = None
+    run_after: int = Field(default_factory=timestamp_ms, index=True)
+    locked_until: Optional[int] = None
+    created_at: int = Field(default_factory=timestamp_ms, index=True)
+    updated_at: int = Field(default_factory=timestamp_ms)
+
+
+class Tombstone(SQLModel, table=True):
+    """Files left behind by deleted rows, removed in the background by the reaper.
+
+    ``kind`` is ``blob`` (``target`` is a digest whose files go unless the blob
+    was re-created), ``tree`` (a directory removed bottom-up) or ``file``.
+    """
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str
+    target: str
+    created_at: int = Field(default_factory=timestamp_ms)
+
+
 class EventCreate(BaseModel):
     """Incoming payload to create an event."""
 
@@ -70,6 +187,28 @@ class EventRead(BaseModel):
     model_config = ConfigDict(from_attributes=True, populate_by_name=True)
 
 
+class EventSummary(EventRead):
+    """An event with the statistics and cover image the landing page shows."""
+
+    photoCount: int
+    favoriteCount: int
+    totalBytes: int
+    coverUrl: Optional[str] = None
+
+
+class SearchResult(BaseModel):
+    """A ranked full-text match; ``title`` and ``snippet`` are HTML with matches wrapped in ``<mark>``."""
+
+    kind: Literal["event", "photo"]
+    id: UUID
+    eventId: UUID
+    eventSlug: str
+    title: str
+    snippet: Optional[str] = None
+    score: float
+    thumbnailUrl: Optional[str] = None
+
+
 class PhotoRead(BaseModel):
     """API representation of a photo record."""
 
@@ -84,12 +223,99 @@ class PhotoRead(BaseModel):
     height: int
     size: int
     uploadedAt: int
+    capturedAt: Optional[int] = None
+    cameraMake: Optional[str] = None
+    cameraModel: Optional[str] = None
+    lens: Optional[str] = None
+    orientation: Optional[int] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    blurhash: Optional[str] = None
+    dominantColor: Optional[str] = None
     url: str
+    thumbnailUrl: str
+    webUrl: str
     isFavorite: bool
 
     model_config = ConfigDict(from_attributes=True, populate_by_name=True)
 
 
+class PhotoUpload(PhotoMetadata):
+    """A file on disk waiting to be registered as a photo.
+
+    Bytes new to the library wait at ``staged_path`` and are moved into the
+    blob store by the transaction that creates their blob.
+    """
+
+    filename: str
+    original_name: str
+    content_type: Optional[str] = None
+    width: int
+    height: int
+    size: int
+    content_hash: Optional[str] = None
+    thumbnail_filename: Optional[str] = None
+    web_filename: Optional[str] = None
+    staged_path: Optional[Path] = None
+
+
+class UploadSessionCreate(BaseModel):
+    """Incoming payload to start a resumable upload."""
+
+    filename: str
+    size: int
+    contentType: Optional[str] = None
+
+
+class UploadSessionRead(BaseModel):
+    """Progress of a resumable upload; ``received`` is the offset to resume from."""
+
+    id: UUID
+    eventId: UUID
+    filename: str
+    contentType: Optional[str] = None
+    size: int
+    received: int
+    createdAt: int
+    updatedAt: int
+
+
+class PhotoFilters(BaseModel):
+    """Optional constraints for photo listings; hashable so it can key cached pages."""
+
+    camera: Optional[str] = None
+    lens: Optional[str] = None
+    captured_after: Optional[int] = None
+    captured_before: Optional[int] = None
+    geotagged: Optional[bool] = None
+
+    model_config = ConfigDict(frozen=True)
+
+
+class JobRead(BaseModel):
+    """API representation of a background job."""
+
+    id: UUID
+    kind: str
+    eventId: Optional[UUID] = None
+    photoId: Optional[UUID] = None
+    status: str
+    attempts: int
+    maxAttempts: int
+    lastError: Optional[str] = None
+    createdAt: int
+    updatedAt: int
+
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+
+
+class JobStats(BaseModel):
+    queued: int = 0
+    running: int = 0
+    done: int = 0
+    failed: int = 0
+
+
 class PhotoCaptionUpdate(BaseModel):
     caption: str
 
@@ -98,10 +324,43 @@ class PhotoFavoriteUpdate(BaseModel):
     isFavorite: bool
 
 
+# Upper bound on ids per bulk request, well inside SQLite's bound-parameter limit.
+MAX_BULK_PHOTOS = 1000
+
+
+class PhotoBulkDelete(BaseModel):
+    ids: List[UUID] = PydanticField(min_length=1, max_length=MAX_BULK_PHOTOS)
+
+
+class PhotoBulkFavoriteUpdate(BaseModel):
+    ids: List[UUID] = PydanticField(min_length=1, max_length=MAX_BULK_PHOTOS)
+    isFavorite: bool
+
+
+class PhotoCaptionItem(BaseModel):
+    id: UUID
+    caption: str
+
+
+class PhotoBulkCaptionUpdate(BaseModel):
+    items: List[PhotoCaptionItem] = PydanticField(min_length=1, max_length=MAX_BULK_PHOTOS)
+
+
+class PhotoBulkResult(BaseModel):
+    """Outcome of a bulk photo operation; ids that matched no photo are listed in ``missing``."""
+
+    affected: List[UUID]
+    missing: List[UUID]
+
+
 class EventCoverUpdate(BaseModel):
     photoId: UUID
 
 
+class EventWatermarkUpdate(BaseModel):
+    watermarkText: Optional[str] = None
+
+
 class LoginRequest(BaseModel):
     password: str
 
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import math
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from PIL import Image, ImageOps
+
+# Images are shrunk to at most this many pixels per side before encoding; blurhash only keeps a few cosine terms.
+_SAMPLE_SIZE = 32
+_MAX_COMPONENTS = 4
+_BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+_SRGB_TO_LINEAR = [(value / 255 / 12.92) if value <= 10 else ((value / 255 + 0.055) / 1.055) ** 2.4 for value in range(256)]
+
+Color = Tuple[float, float, float]
+
+
+def _base83(value: int, length: int) -> str:
+    return "".join(_BASE83[(value // 83 ** (length - index)) % 83] for index in range(1, length + 1))
+
+
+def _linear_to_srgb(value: float) -> int:
+    value = min(1.0, max(0.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_sqrt(value: float) -> float:
+    return math.copysign(math.sqrt(abs(value)), value)
+
+
+def encode_blurhash(pixels: Sequence[Tuple[int, int, int]], width: int, height: int, components: Tuple[int, int]) -> str:
+    """Encode row-major RGB ``pixels`` as a blurhash with ``components`` (x, y) cosine terms."""
+
+    components_x, components_y = components
+    linear = [(_SRGB_TO_LINEAR[r], _SRGB_TO_LINEAR[g], _SRGB_TO_LINEAR[b]) for r, g, b in pixels]
+    cos_x = [[math.cos(math.pi * i * x / width) for x in range(width)] for i in range(components_x)]
+    cos_y = [[math.cos(math.pi * j * y / height) for y in range(height)] for j in range(components_y)]
+
+    factors: List[Color] = []
+    for j in range(components_y):
+        for i in range(components_x):
+            scale = (1 if i == 0 and j == 0 else 2) / (width * height)
+            r = g = b = 0.0
+            for y in range(height):
+                row = y * width
+                weight_y = cos_y[j][y]
+                for x in range(width):
+                    basis = cos_x[i][x] * weight_y
+                    pr, pg, pb = linear[row + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _base83((components_x - 1) + (components_y - 1) * 9, 1)
+    if ac:
+        quantised = max(0, min(82, int(max(abs(value) for factor in ac for value in factor) * 166 - 0.5)))
+        maximum = (quantised + 1) / 166
+        result += _base83(quantised, 1)
+    else:
+        maximum = 1.0
+        result += _base83(0, 1)
+    result += _base83((_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]), 4)
+    for factor in ac:
+        r, g, b = (max(0, min(18, int(_sign_sqrt(value / maximum) * 9 + 9.5))) for value in factor)
+        result += _base83(r * 19 * 19 + g * 19 + b, 2)
+    return result
+
+
+def dominant_color(image: Image.Image) -> str:
+    """Most common colour of a small RGB image after median-cut quantisation, as ``#rrggbb``."""
+
+    quantised = image.quantize(colors=5, method=Image.Quantize.MEDIANCUT)
+    palette = quantised.getpalette() or []
+    _, index = max(quantised.getcolors() or [(1, 0)])
+    red, green, blue = palette[index * 3 : index * 3 + 3] or (0, 0, 0)
+    return f"#{red:02x}{green:02x}{blue:02x}"
+
+
+def compute_placeholder(path: Path) -> Dict[str, str]:
+    """Blurhash and dominant colour for the image at ``path``, ideally an already downsized rendition."""
+
+    with Image.open(path) as opened:
+        opened.draft("RGB", (_SAMPLE_SIZE * 4, _SAMPLE_SIZE * 4))
+        image = ImageOps.exif_transpose(opened).convert("RGB")
+    image.thumbnail((_SAMPLE_SIZE, _SAMPLE_SIZE), Image.Resampling.BOX)
+    # The longer side gets more horizontal/vertical detail, as the blurhash reference encoder recommends.
+    if image.width >= image.height:
+        components = (_MAX_COMPONENTS, max(1, min(_MAX_COMPONENTS, round(_MAX_COMPONENTS * image.height / image.width))))
+    else:
+        components = (max(1, min(_MAX_COMPONENTS, round(_MAX_COMPONENTS * image.width / image.height))), _MAX_COMPONENTS)
+    return {
+        "blurhash": encode_blurhash(list(image.getdata()), image.width, image.height, components),
+        "dominant_color": dominant_color(image),
+    }
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import struct
+import warnings
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from PIL import Image
+from starlette.concurrency import run_in_threadpool
+
+from .image_worker import ImageWorkerPool
+
+Dimensions = Tuple[int, int]
+
+# JPEG start-of-frame markers carry the frame size; C4, C8 and CC share the range but are not frames.
+_JPEG_SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+_HEVC_BRANDS = frozenset({b"heic", b"heix", b"heim", b"heis", b"hevc", b"hevx"})
+_AVIF_BRANDS = frozenset({b"avif", b"avis"})
+_HEIF_BRANDS = _HEVC_BRANDS | _AVIF_BRANDS | {b"mif1", b"msf1"}
+# HEIF headers put ``meta`` right after ``ftyp``; anything needing more than this is left to Pillow.
+_HEIF_META_LIMIT = 1024 * 1024
+
+
+class ImageTooLarge(OSError):
+    """The image has more pixels than the configured ceiling."""
+
+
+def _jpeg(handle: BinaryIO) -> Optional[Dimensions]:
+    handle.seek(2)
+    while True:
+        byte = handle.read(1)
+        while byte and byte != b"\xff":
+            byte = handle.read(1)
+        while byte == b"\xff":
+            byte = handle.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker == 0xD9 or marker == 0xDA:
+            return None
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            continue
+        header = handle.read(2)
+        if len(header) < 2:
+            return None
+        (length,) = struct.unpack(">H", header)
+        if marker in _JPEG_SOF:
+            frame = handle.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">xHH", frame)
+            return (width, height) if width and height else None
+        handle.seek(length - 2, 1)
+
+
+def _png(head: bytes) -> Optional[Dimensions]:
+    if len(head) < 24 or head[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", head[16:24])
+
+
+def _gif(head: bytes) -> Optional[Dimensions]:
+    if len(head) < 10:
+        return None
+    return struct.unpack("<HH", head[6:10])
+
+
+def _webp(head: bytes) -> Optional[Dimensions]:
+    chunk = head[12:16]
+    if chunk == b"VP8 " and len(head) >= 30 and head[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(head) >= 25 and head[20] == 0x2F:
+        (bits,) = struct.unpack("<I", head[21:25])
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(head) >= 30:
+        width = int.from_bytes(head[24:27], "little") + 1
+        height = int.from_bytes(head[27:30], "little") + 1
+        return width, height
+    return None
+
+
+def _boxes(data: bytes, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """Yield ``(type, payload_start, payload_end)`` for the ISO-BMFF boxes in ``data[start:end]``."""
+
+    offset = start
+    while offset + 8 <= end:
+        size, kind = struct.unpack(">I4s", data[offset : offset + 8])
+        header = 8
+        if size == 1:
+            if offset + 16 > end:
+                return
+            (size,) = struct.unpack(">Q", data[offset + 8 : offset + 16])
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            return
+        yield kind, offset + header, offset + size
+        offset += size
+
+
+def _heif_primary(meta: bytes, *, rotate: bool) -> Optional[Dimensions]:
+    """Size of the primary item from a HEIF ``meta`` payload, with 90/270 degree ``irot`` applied if ``rotate``."""
+
+    children = {kind: (start, end) for kind, start, end in _boxes(meta, 4, len(meta))}
+    if b"iprp" not in children:
+        return None
+    primary = None
+    if b"pitm" in children:
+        start, _ = children[b"pitm"]
+        fmt, width = (">H", 2) if meta[start] == 0 else (">I", 4)
+        (primary,) = struct.unpack(fmt, meta[start + 4 : start + 4 + width])
+
+    properties: List[Tuple[bytes, int, int]] = []
+    associations: Dict[int, List[int]] = {}
+    iprp_start, iprp_end = children[b"iprp"]
+    for kind, start, end in _boxes(meta, iprp_start, iprp_end):
+        if kind == b"ipco":
+            properties = list(_boxes(meta, start, end))
+        elif kind == b"ipma":
+            version, flags = meta[start], int.from_bytes(meta[start + 1 : start + 4], "big")
+            (count,) = struct.unpack(">I", meta[start + 4 : start + 8])
+            offset = start + 8
+            for _ in range(count):
+                if version < 1:
+                    (item_id,) = struct.unpack(">H", meta[offset : offset + 2])
+                    offset += 2
+                else:
+                    (item_id,) = struct.unpack(">I", meta[offset : offset + 4])
+                    offset += 4
+                entries = meta[offset]
+                offset += 1
+                indexes = []
+                for _ in range(entries):
+                    if flags & 1:
+                        (value,) = struct.unpack(">H", meta[offset : offset + 2])
+                        indexes.append(value & 0x7FFF)
+                        offset += 2
+                    else:
+                        indexes.append(meta[offset] & 0x7F)
+                        offset += 1
+                associations[item_id] = indexes
+
+    indexes = associations.get(primary) if primary is not None else None
+    candidates = [properties[i - 1] for i in indexes if 0 < i <= len(properties)] if indexes else properties
+    size = None
+    crop = None
+    rotation = 0
+    for kind, start, end in candidates:
+        if kind == b"ispe" and end - start >= 12:
+            width, height = struct.unpack(">II", meta[start + 4 : start + 12])
+            # Without associations fall back to the largest extent, which is the full image rather than a tile or thumbnail.
+            if size is None or (indexes is None and width * height > size[0] * size[1]):
+                size = (width, height)
+        elif kind == b"clap" and end - start >= 16 and indexes:
+            # The clean aperture crops the coded extent, which encoders pad to whole chroma blocks.
+            width_n, width_d, height_n, height_d = struct.unpack(">IIII", meta[start : start + 16])
+            if width_d and height_d:
+                crop = (width_n // width_d, height_n // height_d)
+        elif kind == b"irot" and end > start and indexes:
+            rotation = meta[start] & 0x03
+    size = crop or size
+    if size is None or not all(size):
+        return None
+    return (size[1], size[0]) if rotate and rotation in (1, 3) else size
+
+
+def _heif(handle: BinaryIO, head: bytes) -> Optional[Dimensions]:
+    (ftyp_size,) = struct.unpack(">I", head[0:4])
+    brands = {head[8:12]} | {head[offset : offset + 4] for offset in range(16, min(ftyp_size, len(head)), 4)}
+    if not brands & _HEIF_BRANDS:
+        return None
+    handle.seek(ftyp_size)
+    while True:
+        header = handle.read(8)
+        if len(header) < 8:
+            return None
+        size, kind = struct.unpack(">I4s", header)
+        if size == 1:
+            (size,) = struct.unpack(">Q", handle.read(8))
+            header_size = 16
+        else:
+            header_size = 8
+        if size < header_size:
+            return None
+        if kind == b"meta":
+            if size > _HEIF_META_LIMIT:
+                return None
+            # pillow-heif reports HEIC sizes after ``irot``; Pillow's AVIF plugin reports them before it.
+            rotate = not (brands & _AVIF_BRANDS and not brands & _HEVC_BRANDS)
+            return _heif_primary(handle.read(size - header_size), rotate=rotate)
+        handle.seek(size - header_size, 1)
+
+
+def read_dimensions(path: Path) -> Optional[Dimensions]:
+    """Read ``(width, height)`` from the file header without decoding, or ``None`` if the format is unknown."""
+
+    with path.open("rb") as handle:
+        head = handle.read(64)
+        try:
+            if head[:3] == b"\xff\xd8\xff":
+                return _jpeg(handle)
+            if head[:8] == b"\x89PNG\r\n\x1a\n":
+                return _png(head)
+            if head[:6] in (b"GIF87a", b"GIF89a"):
+                return _gif(head)
+            if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+                return _webp(head)
+            if head[4:8] == b"ftyp":
+                return _heif(handle, head)
+        except (struct.error, IndexError, ValueError):
+            return None
+    return None
+
+
+def pillow_dimensions(path: Path) -> Dimensions:
+    """Slow path: let Pillow (and its plugins) identify the file.
+
+    Pillow's decompression-bomb guard (aligned with ``max_image_pixels`` by
+    ``configure_pillow``) is reported as ``ImageTooLarge``, like oversized
+    images caught by the header parsers.
+    """
+
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", Image.DecompressionBombWarning)
+            with Image.open(path) as image:
+                return image.size
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning) as exc:
+        raise ImageTooLarge(str(exc)) from exc
+
+
+def check_pixels(size: Dimensions, max_pixels: Optional[int]) -> Dimensions:
+    width, height = size
+    if max_pixels and width * height > max_pixels:
+        raise ImageTooLarge(f"Image is {width}x{height}, more than the {max_pixels} pixel limit")
+    return size
+
+
+async def probe_image(pool: ImageWorkerPool, path: Path, *, max_pixels: Optional[int]) -> Dimensions:
+    """Return the image's dimensions, parsing headers in a thread and decoding in the pool only when needed."""
+
+    size = await run_in_threadpool(read_dimensions, path)
+    if size is None:
+        size = await pool.run(pillow_dimensions, path)
+    return check_pixels(size, max_pixels)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from .config import get_settings
+
+CacheKey = Tuple[Optional[str], Hashable]
+
+
+@dataclass(frozen=True)
+class CachedPayload:
+    """A serialized JSON response body together with its validator.
+
+    Listings too large to hold as one body carry their unencoded
+    ``documents`` instead; those are streamed and never cached.
+    """
+
+    body: bytes
+    etag: str
+    next_cursor: Optional[str] = None
+    documents: Optional[List[Dict[str, Any]]] = None
+
+
+class ReadCache:
+    """Bounded, thread-safe TTL cache for pre-serialized API responses.
+
+    Keys are ``(event_slug, detail)`` tuples; cross-event listings use ``None`` as
+    the slug and are dropped whenever any event is invalidated. Entries expire
+    after ``ttl`` seconds, which bounds staleness for writes made by other
+    worker processes; writes made in this process invalidate immediately.
+    """
+
+    def __init__(self, *, ttl: float, max_entries: int, max_bytes: int) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[CacheKey, Tuple[float, CachedPayload]]" = OrderedDict()
+        self._bytes = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get_or_build(self, key: CacheKey, build: Callable[[], CachedPayload]) -> CachedPayload:
+        if not self.enabled:
+            return build()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, payload = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    return payload
+                self._remove(key)
+            generation = self._generation
+
+        payload = build()
+        with self._lock:
+            # Skip storing if a write invalidated the cache while we were building.
+            if generation == self._generation and payload.documents is None and len(payload.body) <= self.max_bytes:
+                self._remove(key)
+                self._entries[key] = (now + self.ttl, payload)
+                self._bytes += len(payload.body)
+                while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                    self._remove(next(iter(self._entries)))
+        return payload
+
+    def invalidate(self, slug: Optional[str] = None) -> None:
+        """Drop entries for ``slug`` and every cross-event listing."""
+
+        with self._lock:
+            self._generation += 1
+            for key in [key for key in self._entries if key[0] is None or key[0] == slug]:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1].body)
+
+
+@lru_cache()
+def get_read_cache() -> ReadCache:
+    """Return the process-wide read cache configured from settings."""
+
+    settings = get_settings()
+    return ReadCache(
+        ttl=settings.read_cache_ttl,
+        max_entries=settings.read_cache_max_entries,
+        max_bytes=settings.read_cache_max_bytes,
+    )
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import shutil
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from . import storage
+from .config import Settings, get_settings
+from .crud import lock_blob_store
+from .database import engine
+from .models import Blob, Tombstone
+from .variants import get_variant_cache
+
+logger = logging.getLogger(__name__)
+
+
+def _remove_tree(root: Path, budget: int) -> Tuple[int, bool]:
+    """Unlink up to ``budget`` files below ``root``, bottom-up; returns ``(removed, finished)``."""
+
+    removed = 0
+    for directory, subdirectories, names in os.walk(root, topdown=False):
+        for name in names:
+            if removed >= budget:
+                return removed, False
+            Path(directory, name).unlink(missing_ok=True)
+            removed += 1
+        for name in subdirectories:
+            path = Path(directory, name)
+            if path.is_symlink():
+                path.unlink(missing_ok=True)
+            else:
+                try:
+                    path.rmdir()
+                except FileNotFoundError:
+                    pass
+    shutil.rmtree(root, ignore_errors=True)
+    return removed, True
+
+
+class TombstoneReaper:
+    """Removes the files recorded in the ``tombstone`` table in the background.
+
+    Work is done in batches of at most ``reaper_batch_size`` files with
+    ``reaper_batch_interval`` seconds between them, so deleting a large event
+    does not monopolise the disk. A tombstone is only deleted once all of its
+    files are gone, which makes the reaper resume where it stopped after a
+    crash or restart. Several processes may reap the same table; removals are
+    idempotent.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._event_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._event_loop = asyncio.get_running_loop()
+            self._task = asyncio.create_task(self._loop(), name="tombstone-reaper")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def notify(self) -> None:
+        """Start reaping newly committed tombstones without waiting for the next poll; safe from any thread."""
+
+        if self._wakeup is not None and self._event_loop is not None:
+            self._event_loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _loop(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                while await run_in_threadpool(self.reap_batch):
+                    await asyncio.sleep(self.settings.reaper_batch_interval)
+            except Exception:  # pragma: no cover - keep the loop alive on database or disk hiccups
+                logger.exception("Tombstone reaper iteration failed")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.settings.reaper_poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _reap_blob(self, digest: str, budget: int) -> Tuple[int, bool]:
+        directory = storage.blob_dir(self.settings, digest)
+        paths = sorted(directory.glob(f"{digest}*"))
+        for path in paths[:budget]:
+            get_variant_cache().discard([path.relative_to(self.settings.uploads_dir).as_posix()])
+            path.unlink(missing_ok=True)
+        return min(len(paths), budget), len(paths) <= budget
+
+    def reap_batch(self) -> bool:
+        """Remove up to one batch of files; returns True when more tombstones may be waiting."""
+
+        budget = self.settings.reaper_batch_size
+        with Session(engine) as session:
+            tombstones = session.exec(select(Tombstone).order_by(Tombstone.id).limit(budget)).all()
+            if not tombstones:
+                return False
+            digests = [tombstone.target for tombstone in tombstones if tombstone.kind == "blob"]
+            recreated = set()
+            if digests:
+                # Held until the batch commits, so no upload can re-create one of these blobs while its files go.
+                lock_blob_store(session)
+                recreated = set(session.exec(select(Blob.digest).where(Blob.digest.in_(digests))).all())
+
+            finished: List[int] = []
+            removed = 0
+            for tombstone in tombstones:
+                remaining = budget - removed
+                if remaining <= 0:
+                    break
+                try:
+                    if tombstone.kind == "blob":
+                        # A later upload of the same bytes owns these files again.
+                        count, done = (0, True) if tombstone.target in recreated else self._reap_blob(tombstone.target, remaining)
+                    elif tombstone.kind == "tree":
+                        count, done = _remove_tree(Path(tombstone.target), remaining)
+                    else:
+                        Path(tombstone.target).unlink(missing_ok=True)
+                        count, done = 1, True
+                except OSError:
+                    logger.warning("Could not remove %s %s; will retry", tombstone.kind, tombstone.target, exc_info=True)
+                    continue
+                removed += count
+                if done:
+                    finished.append(tombstone.id)
+
+            if finished:
+                session.exec(delete(Tombstone).where(Tombstone.id.in_(finished)))
+                session.commit()
+        if removed:
+            logger.info("Reaped %s files (%s tombstones cleared)", removed, len(finished))
+        return removed >= budget or (len(tombstones) == budget and bool(finished))
+
+
+@lru_cache()
+def get_reaper() -> TombstoneReaper:
+    """Return the process-wide tombstone reaper."""
+
+    return TombstoneReaper(get_settings())
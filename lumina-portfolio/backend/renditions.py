@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+from PIL import Image, ImageOps
+
+from .config import Settings
+
+RENDITIONS_DIRNAME = "renditions"
+
+_FORMAT_EXTENSIONS = {"avif": ".avif", "webp": ".webp", "jpeg": ".jpg"}
+
+
+@dataclass(frozen=True)
+class RenditionSpec:
+    """A named, width-bounded derivative of an uploaded photo."""
+
+    name: str
+    max_width: int
+
+
+def rendition_specs(settings: Settings) -> Tuple[RenditionSpec, ...]:
+    """Return the rendition sizes configured for this deployment, largest first."""
+
+    return (
+        RenditionSpec("web", settings.max_image_width),
+        RenditionSpec("thumbnail", settings.thumbnail_width),
+    )
+
+
+def rendition_extension(image_format: str) -> str:
+    return _FORMAT_EXTENSIONS[image_format]
+
+
+def save_options(image_format: str, quality: int, icc_profile: bytes | None) -> dict:
+    """Pillow ``save`` keyword arguments for ``image_format``."""
+
+    kwargs: dict = {"quality": quality}
+    if icc_profile:
+        kwargs["icc_profile"] = icc_profile
+    if image_format == "jpeg":
+        kwargs.update(optimize=True, progressive=True)
+    elif image_format == "webp":
+        kwargs.update(method=4)
+    return kwargs
+
+
+def generate_renditions(
+    source: Path,
+    destination_dir: Path,
+    stem: str,
+    *,
+    specs: Iterable[RenditionSpec],
+    image_format: str = "webp",
+    quality: int = 82,
+) -> Dict[str, str]:
+    """Decode ``source`` once and write every rendition in ``specs``.
+
+    Renditions are produced largest first and each smaller size is resized from
+    the previous one, so the full-resolution pixels are only touched once.
+    Returns a mapping of rendition name to its filename inside ``destination_dir``.
+    """
+
+    ordered = sorted(specs, key=lambda spec: spec.max_width, reverse=True)
+    if not ordered:
+        return {}
+
+    destination_dir.mkdir(parents=True, exist_ok=True)
+    extension = rendition_extension(image_format)
+    created: Dict[str, str] = {}
+
+    with Image.open(source) as opened:
+        # Let the JPEG decoder downscale by DCT while decoding when the target is much smaller.
+        largest = ordered[0].max_width
+        opened.draft("RGB", (largest, largest))
+        icc_profile = opened.info.get("icc_profile")
+        image = ImageOps.exif_transpose(opened)
+        if image.mode not in ("RGB", "L") or (image_format == "jpeg" and image.mode != "RGB"):
+            image = image.convert("RGB")
+
+        for spec in ordered:
+            if image.width > spec.max_width:
+                height = max(1, round(image.height * spec.max_width / image.width))
+                image = image.resize((spec.max_width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+            filename = f"{stem}.{spec.name}{extension}"
+            image.save(
+                destination_dir / filename,
+                format=image_format.upper(),
+                **save_options(image_format, quality, icc_profile),
+            )
+            created[spec.name] = filename
+
+    return created
@@ -1,70 +1,85 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
-import mimetypes
-import tempfile
-import zipfile
-from pathlib import Path
-from typing import List
+from pathlib import Path, PurePath
+from typing import Dict, Iterable, Iterator, List, Literal, Optional, Tuple
 from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, File, HTTPException, Response, UploadFile, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
 from fastapi.responses import StreamingResponse
-from PIL import Image, UnidentifiedImageError
-
-logger = logging.getLogger(__name__)
-
-try:
-    from pillow_heif import register_heif_opener
-except ModuleNotFoundError:
-    register_heif_opener = None
-    logger.warning("pillow-heif is not installed; HEIC uploads will fail to process.")
-else:
-    register_heif_opener()
-
-# Allow very large images to be processed without Pillow raising DecompressionBombError.
-Image.MAX_IMAGE_PIXELS = None
-
 from sqlmodel import Session
 
-from .. import crud
+from .. import crud, storage
+from ..archive_cache import Archive, ArchiveCache, get_archive_cache, get_compression_executor
 from ..config import Settings, get_settings
 from ..database import get_session
-from ..models import EventCoverUpdate, EventCreate, EventRead, PhotoRead
+from ..http_cache import payload_response
+from ..image_worker import ImageWorkerPool, get_image_worker
+from ..jobs import JobWorker, get_job_worker
+from ..metrics import Metrics, get_metrics
+from ..models import (
+    Event,
+    EventCoverUpdate,
+    EventCreate,
+    EventRead,
+    EventSummary,
+    EventWatermarkUpdate,
+    Photo,
+    PhotoRead,
+    PhotoUpload,
+)
+from ..probe import probe_image
+from ..reaper import TombstoneReaper, get_reaper
+from ..watermark import WatermarkCache, get_watermark_cache, source_path
+from ..zipstream import ZipEntry, ZipStream
 from .dependencies import require_admin
+from .pagination import PhotoListParams, photo_list_params, photo_page_response
+
+logger = logging.getLogger(__name__)
 
 CHUNK_SIZE = 4 * 1024 * 1024  # 4MB streaming chunks
+# Selected ids travel in the query string, so keep selections well inside common URL length limits.
+MAX_ARCHIVE_IDS = 200
 
 router = APIRouter(prefix="/events", tags=["events"])
 
 
-def _event_directory(settings: Settings, slug: str) -> Path:
-    return Path(settings.uploads_dir) / slug
-
-
-async def _stream_upload_to_disk(upload: UploadFile, destination: Path) -> int:
-    """Write the incoming UploadFile to disk in chunks and return the total bytes written."""
+async def _stream_upload_to_disk(upload: UploadFile, destination: Path) -> Tuple[int, str]:
+    """Write the incoming UploadFile to disk in chunks and return its size and SHA-256 digest."""
     size = 0
+    digest = hashlib.sha256()
     with destination.open("wb") as buffer:
         while True:
             chunk = await upload.read(CHUNK_SIZE)
             if not chunk:
                 break
             size += len(chunk)
+            digest.update(chunk)
             buffer.write(chunk)
     await upload.close()
-    return size
+    return size, digest.hexdigest()
 
 
 @router.get("", response_model=List[EventRead])
-def list_events(session: Session = Depends(get_session)) -> List[EventRead]:
-    return crud.list_events(session)
+def list_events(request: Request, session: Session = Depends(get_session)):
+    payload = crud.list_events_payload(session)
+    return payload_response(request, payload.body, payload.etag)
+
+
+@router.get("/summary", response_model=List[EventSummary])
+def list_event_summaries(request: Request, session: Session = Depends(get_session)):
+    """Events with photo and favorite counts, total size and cover URL; the payload grows with events, not photos."""
+
+    payload = crud.event_summaries_payload(session)
+    return payload_response(request, payload.body, payload.etag)
 
 
 @router.get("/{slug}", response_model=EventRead)
-def get_event(slug: str, session: Session = Depends(get_session)) -> EventRead:
-    event = crud.get_event_or_404(session, slug=slug)
-    return crud.serialize_event(event)
+def get_event(slug: str, request: Request, session: Session = Depends(get_session)):
+    payload = crud.get_event_payload(session, slug)
+    return payload_response(request, payload.body, payload.etag)
 
 
 @router.post("", response_model=EventRead, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_admin)])
@@ -85,8 +100,10 @@ def delete_event(
     event_id: UUID,
     session: Session = Depends(get_session),
     settings: Settings = Depends(get_settings),
+    reaper: TombstoneReaper = Depends(get_reaper),
 ) -> Response:
     crud.delete_event(session, event_id, settings)
+    reaper.notify()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -103,10 +120,37 @@ def update_event_cover(
     return crud.set_event_cover(session, event_id, payload.photoId)
 
 
+@router.patch(
+    "/{event_id}/watermark",
+    response_model=EventRead,
+    dependencies=[Depends(require_admin)],
+)
+def update_event_watermark(
+    event_id: UUID,
+    payload: EventWatermarkUpdate,
+    session: Session = Depends(get_session),
+) -> EventRead:
+    return crud.set_event_watermark(session, event_id, payload.watermarkText)
+
+
 @router.get("/{slug}/photos", response_model=List[PhotoRead])
-def list_event_photos(slug: str, session: Session = Depends(get_session)) -> List[PhotoRead]:
-    event = crud.get_event_or_404(session, slug=slug)
-    return crud.list_photos_for_event(session, event=event)
+def list_event_photos(
+    slug: str,
+    request: Request,
+    params: PhotoListParams = Depends(photo_list_params),
+    session: Session = Depends(get_session),
+):
+    payload = crud.event_photos_payload(
+        session,
+        slug,
+        limit=params.limit,
+        cursor=params.cursor,
+        fields=params.fields,
+        sort=params.sort,
+        descending=params.descending,
+        filters=params.filters,
+    )
+    return photo_page_response(request, payload)
 
 
 @router.post(
@@ -120,94 +164,316 @@ async def upload_event_photos(
     files: List[UploadFile] = File(...),
     session: Session = Depends(get_session),
     settings: Settings = Depends(get_settings),
+    image_worker: ImageWorkerPool = Depends(get_image_worker),
+    job_worker: JobWorker = Depends(get_job_worker),
+    metrics: Metrics = Depends(get_metrics),
 ) -> List[PhotoRead]:
+    # The multipart body has been spooled to temporary files by the time the endpoint runs.
+    metrics.observe_since_request_start("upload.receive")
     event = crud.get_event_or_404(session, event_id=event_id)
-    event_dir = _event_directory(settings, event.slug)
-    event_dir.mkdir(parents=True, exist_ok=True)
 
     if not files:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No files uploaded")
 
-    created: List[PhotoRead] = []
+    incoming = storage.incoming_dir(settings)
+    # Uploads whose bytes are new to the library, keyed by digest, and uploads that repeat one of them.
+    fresh: Dict[str, PhotoUpload] = {}
+    fresh_paths: Dict[str, Path] = {}
+    repeats: List[PhotoUpload] = []
+    known: List[PhotoUpload] = []
+    # Every upload keeps its bytes staged until registration: a blob found here may be deleted before then.
+    staged: List[Path] = []
     for upload in files:
-        extension = Path(upload.filename or "").suffix.lower()
-        if not extension:
-            guessed = mimetypes.guess_extension(upload.content_type or "") or ".jpg"
-            extension = guessed
-        filename = f"{uuid4().hex}{extension}"
-        file_path = event_dir / filename
-        size = await _stream_upload_to_disk(upload, file_path)
+        extension = storage.upload_extension(upload.filename, upload.content_type)
+        temp_path = incoming / uuid4().hex
+        with metrics.stage("upload.stream_to_disk"):
+            size, digest = await _stream_upload_to_disk(upload, temp_path)
         if size == 0:
-            file_path.unlink(missing_ok=True)
+            temp_path.unlink(missing_ok=True)
+            continue
+        staged.append(temp_path)
+        original_name = upload.filename or f"{digest}{extension}"
+
+        blob = crud.find_blob(session, digest)
+        if blob is not None or digest in fresh:
+            # Same bytes are already stored: skip decoding and reuse the existing blob.
+            if blob is None:
+                repeats.append(fresh[digest].model_copy(update={"original_name": original_name, "staged_path": temp_path}))
+                continue
+            known.append(crud.blob_upload(blob, original_name, staged_path=temp_path))
             continue
 
-        try:
-            with Image.open(file_path) as image:
-                width, height = image.size
-        except UnidentifiedImageError as exc:
-            file_path.unlink(missing_ok=True)
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image file") from exc
-
-        created.append(
-            crud.register_photo(
-                session,
-                event=event,
-                filename=filename,
-                original_name=upload.filename or filename,
-                content_type=upload.content_type,
-                width=width,
-                height=height,
-                size=size,
-            )
+        fresh_paths[digest] = temp_path
+        fresh[digest] = PhotoUpload(
+            filename=f"{digest}{extension}",
+            original_name=original_name,
+            content_type=upload.content_type,
+            width=0,
+            height=0,
+            size=size,
+            content_hash=digest,
+            staged_path=temp_path,
+        )
+
+    with metrics.stage("upload.probe"):
+        probes = await asyncio.gather(
+            *(probe_image(image_worker, fresh_paths[digest], max_pixels=settings.max_image_pixels) for digest in fresh),
+            return_exceptions=True,
         )
+    valid: List[PhotoUpload] = list(known)
+    rejected: set[str] = set()
+    for (digest, item), probe in zip(list(fresh.items()), probes):
+        if isinstance(probe, BaseException):
+            fresh_paths[digest].unlink(missing_ok=True)
+            if not isinstance(probe, OSError):
+                for path in staged:
+                    path.unlink(missing_ok=True)
+                raise probe
+            logger.warning("Rejected upload %s: %s", item.original_name, probe)
+            rejected.add(digest)
+            continue
+        item.width, item.height = probe
+        valid.append(item)
+    for item in repeats:
+        if item.content_hash not in rejected:
+            original = fresh[item.content_hash]
+            valid.append(item.model_copy(update={"width": original.width, "height": original.height}))
+
+    if not valid:
+        for path in staged:
+            path.unlink(missing_ok=True)
+        detail = "Invalid image file" if fresh or known else "No valid images were uploaded"
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+    try:
+        with metrics.stage("upload.register"):
+            created = crud.register_photos(session, settings, event=event, uploads=valid)
+    finally:
+        # Registration moved or dropped every staged file; anything left belongs to a rejected row.
+        for path in staged:
+            path.unlink(missing_ok=True)
+    job_worker.notify()
 
     if not created:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No valid images were uploaded")
     return created
 
 
-def _zip_directory(path: Path):
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".zip") as tmp:
-        archive_path = Path(tmp.name)
+def _archive_name(photo: Photo, used: set[str], suffix: Optional[str] = None) -> str:
+    """A unique, path-free archive name for ``photo``; ``suffix`` replaces the extension of derived files."""
+
+    name = PurePath(photo.name.replace("\\", "/")).name or photo.filename
+    stem = PurePath(name).stem
+    if suffix is None:
+        suffix = PurePath(name).suffix
+    else:
+        name = f"{stem}{suffix}"
+    candidate, counter = name, 1
+    while candidate.lower() in used:
+        counter += 1
+        candidate = f"{stem} ({counter}){suffix}"
+    used.add(candidate.lower())
+    return candidate
 
-    with zipfile.ZipFile(archive_path, mode="w", compression=zipfile.ZIP_DEFLATED) as zip_file:
-        for file_path in path.rglob("*"):
-            if file_path.is_file():
-                zip_file.write(file_path, arcname=file_path.relative_to(path))
 
+def _archive_entries(settings: Settings, photos: List[Photo], paths: Optional[Dict[UUID, Path]] = None) -> List[ZipEntry]:
+    """Map registered photos to archive entries with unique, path-free names.
+
+    ``paths`` overrides the stored original for photos that should be shipped
+    as a derived file, e.g. a rendition.
+    """
+
+    entries: List[ZipEntry] = []
+    used: set[str] = set()
+    for photo in photos:
+        path = paths.get(photo.id) if paths is not None else storage.photo_path(settings, photo)
+        if path is None:
+            continue
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            logger.warning("Skipping missing file %s for photo %s", path, photo.id)
+            continue
+        # Derived files keep the photo's name but carry their own format's extension.
+        name = _archive_name(photo, used, path.suffix if paths is not None else None)
+        entries.append(ZipEntry(arcname=name, path=path, size=size, modified_ms=photo.uploaded_at))
+    return entries
+
+
+def _watermarked_entries(renders: Iterator[Tuple[Photo, Path]], names: Dict[UUID, str]) -> Iterator[ZipEntry]:
+    for photo, path in renders:
+        yield ZipEntry(arcname=names[photo.id], path=path, size=path.stat().st_size, modified_ms=photo.uploaded_at)
+
+
+def _archive_etag(parts: Iterable[Tuple[object, ...]]) -> str:
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(("\0".join(str(value) for value in part) + "\n").encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into an inclusive ``(start, end)`` pair.
+
+    Returns ``None`` for headers we do not support (which means "send everything")
+    and raises 416 when the range lies outside the archive.
+    """
+
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
     try:
-        with archive_path.open("rb") as archive:
-            while chunk := archive.read(1024 * 1024):
-                yield chunk
-    finally:
-        archive_path.unlink(missing_ok=True)
+        if first:
+            start, end = int(first), int(last) if last else size - 1
+        else:
+            start, end = max(0, size - int(last)), size - 1
+    except ValueError:
+        return None
+    end = min(end, size - 1)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+def _archive_response(request: Request, archive: Archive, etag: str, filename: str) -> StreamingResponse:
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    total = archive.size
+    if total is None:
+        return StreamingResponse(archive.iter_range(0, None), media_type="application/zip", headers=headers)
+
+    headers.update({"Accept-Ranges": "bytes", "ETag": etag})
+    byte_range = None
+    range_header = request.headers.get("range")
+    if range_header and request.headers.get("if-range", etag) == etag:
+        byte_range = _parse_range(range_header, total)
+    if byte_range is None:
+        headers["Content-Length"] = str(total)
+        return StreamingResponse(archive.iter_range(0, None), media_type="application/zip", headers=headers)
+
+    start, end = byte_range
+    headers.update({"Content-Length": str(end - start + 1), "Content-Range": f"bytes {start}-{end}/{total}"})
+    return StreamingResponse(
+        archive.iter_range(start, end + 1),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type="application/zip",
+        headers=headers,
+    )
+
+
+async def _event_archive(
+    request: Request,
+    event: Event,
+    photos: List[Photo],
+    size: str,
+    filename: str,
+    settings: Settings,
+    archive_cache: ArchiveCache,
+    image_worker: ImageWorkerPool,
+    watermark_cache: WatermarkCache,
+    metrics: Metrics,
+) -> StreamingResponse:
+    """Stream ``photos`` of ``event`` at ``size`` as a cached ZIP archive."""
+
+    entries: Iterable[ZipEntry]
+    if event.watermark_text:
+        # Ship watermarked copies, each rendered once per watermark version. They are rendered
+        # while the archive is written, so the first bytes do not wait for the whole selection.
+        if not photos:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No photos available for download")
+        used: set[str] = set()
+        targets = {photo.id: watermark_cache.path(event, photo, size, "jpeg") for photo in photos}
+        names = {photo.id: _archive_name(photo, used, targets[photo.id].suffix) for photo in photos}
+        etag = _archive_etag((names[photo.id], targets[photo.id], photo.uploaded_at) for photo in photos)
+        renders = watermark_cache.iter_rendered(asyncio.get_running_loop(), image_worker, event, photos, size)
+        entries = _watermarked_entries(renders, names)
+    else:
+        paths = {photo.id: source_path(settings, photo, size) for photo in photos} if size != "original" else None
+        with metrics.stage("zip.entries"):
+            entries = _archive_entries(settings, photos, paths)
+        if not entries:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No photos available for download")
+        etag = _archive_etag((entry.arcname, entry.path, entry.size, entry.modified_ms) for entry in entries)
+
+    archive = ZipStream(
+        entries, executor=get_compression_executor(), lookahead_bytes=settings.archive_compress_lookahead_bytes
+    )
+    return _archive_response(request, archive_cache.get(event.slug, etag.strip('"'), archive), etag, filename)
 
 
 @router.get("/{slug}/zip")
-def download_event_zip(
+async def download_event_zip(
     slug: str,
+    request: Request,
     session: Session = Depends(get_session),
     settings: Settings = Depends(get_settings),
+    archive_cache: ArchiveCache = Depends(get_archive_cache),
+    image_worker: ImageWorkerPool = Depends(get_image_worker),
+    watermark_cache: WatermarkCache = Depends(get_watermark_cache),
+    metrics: Metrics = Depends(get_metrics),
 ):
-    event = crud.get_event_or_404(session, slug=slug)
-    folder = _event_directory(settings, event.slug)
-    if not folder.exists() or not any(folder.iterdir()):
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No photos available for download")
+    with metrics.stage("zip.list"):
+        event = crud.get_event_or_404(session, slug=slug)
+        photos = crud.list_photo_records(session, event_id=event.id)
+    return await _event_archive(
+        request, event, photos, "original", f"{event.slug}.zip", settings, archive_cache, image_worker, watermark_cache, metrics
+    )
 
-    filename = f"{event.slug}.zip"
-    generator = _zip_directory(folder)
-    return StreamingResponse(
-        generator,
-        media_type="application/zip",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+
+def _parse_photo_ids(ids: Optional[str]) -> Optional[List[UUID]]:
+    if ids is None:
+        return None
+    try:
+        parsed = list(dict.fromkeys(UUID(value.strip()) for value in ids.split(",") if value.strip()))
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid photo id") from exc
+    if not parsed or len(parsed) > MAX_ARCHIVE_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Select between 1 and {MAX_ARCHIVE_IDS} photos",
+        )
+    return parsed
+
+
+@router.get("/{slug}/archive")
+async def download_event_selection(
+    slug: str,
+    request: Request,
+    favorites: bool = Query(default=False, description="Only photos marked as favorites"),
+    ids: Optional[str] = Query(default=None, description=f"Comma-separated photo ids (at most {MAX_ARCHIVE_IDS})"),
+    size: Literal["original", "web", "thumbnail"] = Query(default="original", description="Rendition to ship for each photo"),
+    session: Session = Depends(get_session),
+    settings: Settings = Depends(get_settings),
+    archive_cache: ArchiveCache = Depends(get_archive_cache),
+    image_worker: ImageWorkerPool = Depends(get_image_worker),
+    watermark_cache: WatermarkCache = Depends(get_watermark_cache),
+    metrics: Metrics = Depends(get_metrics),
+):
+    """Archive part of an event: its favorites, hand-picked photos or both, at any stored size."""
+
+    photo_ids = _parse_photo_ids(ids)
+    with metrics.stage("zip.list"):
+        event = crud.get_event_or_404(session, slug=slug)
+        photos = crud.list_photo_records(session, event_id=event.id, ids=photo_ids, favorites_only=favorites)
+    parts = [event.slug, "favorites" if favorites else "", "selection" if photo_ids else "", "" if size == "original" else size]
+    filename = "-".join(part for part in parts if part) + ".zip"
+    return await _event_archive(
+        request, event, photos, size, filename, settings, archive_cache, image_worker, watermark_cache, metrics
     )
 
 
 @router.get("/{slug}/download")
-def download_event_alias(
+async def download_event_alias(
     slug: str,
+    request: Request,
     session: Session = Depends(get_session),
     settings: Settings = Depends(get_settings),
+    archive_cache: ArchiveCache = Depends(get_archive_cache),
+    image_worker: ImageWorkerPool = Depends(get_image_worker),
+    watermark_cache: WatermarkCache = Depends(get_watermark_cache),
+    metrics: Metrics = Depends(get_metrics),
 ):
-    return download_event_zip(slug, session, settings)
-
+    return await download_event_zip(slug, request, session, settings, archive_cache, image_worker, watermark_cache, metrics)
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import Literal, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import FileResponse, RedirectResponse
+from sqlmodel import Session
+
+from .. import crud, variants
+from ..database import get_session
+from ..http_cache import IMMUTABLE, REVALIDATE, not_modified, weak_etag
+from ..image_worker import ImageWorkerPool, get_image_worker
+from ..variants import VariantCache, get_variant_cache
+from ..watermark import WatermarkCache, get_watermark_cache
+
+router = APIRouter(prefix="/images", tags=["images"])
+# Mounted at the root: ``/static`` predates the API prefix.
+static_router = APIRouter(tags=["images"])
+
+
+@router.get("/{photo_id}/{size}")
+async def get_image(
+    photo_id: UUID,
+    size: Literal["thumbnail", "web", "original"],
+    request: Request,
+    version: Optional[int] = Query(default=None, alias="v"),
+    session: Session = Depends(get_session),
+    image_worker: ImageWorkerPool = Depends(get_image_worker),
+    variant_cache: VariantCache = Depends(get_variant_cache),
+    watermark_cache: WatermarkCache = Depends(get_watermark_cache),
+) -> Response:
+    """Serve a photo at ``size`` in the best format the client accepts (AVIF, WebP, then JPEG).
+
+    Variants are encoded on first request and kept on disk; images of
+    watermarked events are stamped with the event's watermark.
+    """
+
+    photo, event = crud.get_photo_with_event_or_404(session, photo_id)
+    image_format = variants.negotiate(request.headers.get("accept"))
+    try:
+        if event.watermark_text:
+            path = await watermark_cache.get(image_worker, event, photo, size, image_format)
+        else:
+            path = await variant_cache.get(image_worker, photo, size, image_format)
+        stat = path.stat()
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found") from exc
+
+    # Versioned URLs never change content; anything else may start or stop being watermarked.
+    headers = {
+        "Cache-Control": IMMUTABLE if version == event.watermark_version else REVALIDATE,
+        "Vary": "Accept",
+    }
+    etag = weak_etag(path.name, stat.st_mtime_ns, stat.st_size)
+    cached = not_modified(request, etag, headers)
+    if cached is not None:
+        return cached
+    return FileResponse(path, media_type=variants.media_type(path), headers={**headers, "ETag": etag}, stat_result=stat)
+
+
+@static_router.get("/static/{relpath:path}", include_in_schema=False)
+def redirect_static_file(relpath: str, session: Session = Depends(get_session)) -> RedirectResponse:
+    """Send old ``/static`` file URLs through ``get_image`` so stored originals are never served as-is.
+
+    Files of watermarked events would otherwise be reachable unwatermarked.
+    """
+
+    photo, event, size = crud.find_photo_by_file_or_404(session, relpath)
+    return RedirectResponse(variants.image_url(photo.id, size, event.watermark_version), status_code=status.HTTP_307_TEMPORARY_REDIRECT)
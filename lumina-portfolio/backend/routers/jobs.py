@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from typing import List, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session
+
+from .. import crud
+from ..database import get_session
+from ..models import JobRead, JobStats
+from .dependencies import require_admin
+
+router = APIRouter(prefix="/jobs", tags=["jobs"], dependencies=[Depends(require_admin)])
+
+
+@router.get("", response_model=List[JobRead])
+def list_jobs(
+    event_id: Optional[UUID] = Query(default=None, alias="eventId"),
+    job_status: Optional[str] = Query(default=None, alias="status"),
+    limit: int = Query(default=100, ge=1, le=1000),
+    session: Session = Depends(get_session),
+) -> List[JobRead]:
+    return crud.list_jobs(session, event_id=event_id, job_status=job_status, limit=limit)
+
+
+@router.get("/stats", response_model=JobStats)
+def job_stats(
+    event_id: Optional[UUID] = Query(default=None, alias="eventId"),
+    session: Session = Depends(get_session),
+) -> JobStats:
+    return crud.job_stats(session, event_id=event_id)
+
+
+@router.get("/{job_id}", response_model=JobRead)
+def get_job(job_id: UUID, session: Session = Depends(get_session)) -> JobRead:
+    return crud.get_job_or_404(session, job_id)
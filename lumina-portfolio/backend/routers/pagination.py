@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import FrozenSet, Literal, Optional
+
+from fastapi import HTTPException, Query, Request, Response, status
+
+from .. import fastjson
+from ..http_cache import payload_response
+from ..models import PhotoFilters, PhotoRead
+from ..read_cache import CachedPayload
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class PhotoListParams:
+    """Keyset pagination, ordering, filtering and projection options shared by the photo listing routes."""
+
+    limit: Optional[int]
+    cursor: Optional[str]
+    fields: Optional[FrozenSet[str]]
+    sort: str = "uploaded"
+    descending: bool = False
+    filters: Optional[PhotoFilters] = None
+
+
+def photo_list_params(
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(default=None, description=f"Opaque value from a previous {NEXT_CURSOR_HEADER} header"),
+    fields: Optional[str] = Query(default=None, description="Comma-separated PhotoRead fields to return"),
+    sort: Literal["uploaded", "captured"] = Query(
+        default="uploaded", description="Order by upload time or by capture time (falling back to upload time)"
+    ),
+    order: Literal["asc", "desc"] = Query(default="asc"),
+    camera: Optional[str] = Query(default=None, description="Only photos taken with this camera model"),
+    lens: Optional[str] = Query(default=None, description="Only photos taken with this lens model"),
+    captured_after: Optional[int] = Query(default=None, alias="capturedAfter", description="Capture time lower bound (ms, inclusive)"),
+    captured_before: Optional[int] = Query(default=None, alias="capturedBefore", description="Capture time upper bound (ms, exclusive)"),
+    geotagged: Optional[bool] = Query(default=None, description="Only photos with (true) or without (false) a GPS position"),
+) -> PhotoListParams:
+    projection = None
+    if fields:
+        projection = frozenset(name.strip() for name in fields.split(",") if name.strip())
+        unknown = projection - PhotoRead.model_fields.keys()
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+            )
+    filters = PhotoFilters(
+        camera=camera,
+        lens=lens,
+        captured_after=captured_after,
+        captured_before=captured_before,
+        geotagged=geotagged,
+    )
+    return PhotoListParams(
+        limit=limit,
+        cursor=cursor,
+        fields=projection,
+        sort=sort,
+        descending=order == "desc",
+        filters=filters if filters != PhotoFilters() else None,
+    )
+
+
+def photo_page_response(request: Request, payload: CachedPayload) -> Response:
+    """Send a photo page built by ``crud`` with its next-page cursor, or a 304 when it is unchanged.
+
+    Pages too long to encode at once arrive as documents and are streamed in chunks.
+    """
+
+    headers = {NEXT_CURSOR_HEADER: payload.next_cursor} if payload.next_cursor else None
+    body = fastjson.iter_array(payload.documents) if payload.documents is not None else payload.body
+    return payload_response(request, body, payload.etag, headers)
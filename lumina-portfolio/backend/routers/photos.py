@@ -3,21 +3,77 @@ from __future__ import annotations
 from typing import List
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Response, status
+from fastapi import APIRouter, Depends, Request, Response, status
 from sqlmodel import Session
 
 from .. import crud
 from ..config import Settings, get_settings
 from ..database import get_session
-from ..models import PhotoCaptionUpdate, PhotoFavoriteUpdate, PhotoRead
+from ..models import (
+    PhotoBulkCaptionUpdate,
+    PhotoBulkDelete,
+    PhotoBulkFavoriteUpdate,
+    PhotoBulkResult,
+    PhotoCaptionUpdate,
+    PhotoFavoriteUpdate,
+    PhotoRead,
+)
 from .dependencies import require_admin
+from .pagination import PhotoListParams, photo_list_params, photo_page_response
 
 router = APIRouter(prefix="/photos", tags=["photos"])
 
 
 @router.get("", response_model=List[PhotoRead])
-def list_photos(session: Session = Depends(get_session)) -> List[PhotoRead]:
-    return crud.list_all_photos(session)
+def list_photos(
+    request: Request,
+    params: PhotoListParams = Depends(photo_list_params),
+    session: Session = Depends(get_session),
+):
+    payload = crud.all_photos_payload(
+        session,
+        limit=params.limit,
+        cursor=params.cursor,
+        fields=params.fields,
+        sort=params.sort,
+        descending=params.descending,
+        filters=params.filters,
+    )
+    return photo_page_response(request, payload)
+
+
+# Batch routes are registered before the ``/{photo_id}`` ones so "batch" is never parsed as an id.
+@router.post(
+    "/batch/delete",
+    response_model=PhotoBulkResult,
+    dependencies=[Depends(require_admin)],
+)
+def remove_photos(
+    payload: PhotoBulkDelete,
+    session: Session = Depends(get_session),
+    settings: Settings = Depends(get_settings),
+) -> PhotoBulkResult:
+    return crud.delete_photos(session, settings, payload.ids)
+
+
+@router.patch("/batch/favorite", response_model=PhotoBulkResult)
+def update_photos_favorite(
+    payload: PhotoBulkFavoriteUpdate,
+    session: Session = Depends(get_session),
+) -> PhotoBulkResult:
+    return crud.set_photos_favorite(session, payload.ids, payload.isFavorite)
+
+
+@router.patch(
+    "/batch/caption",
+    response_model=PhotoBulkResult,
+    dependencies=[Depends(require_admin)],
+)
+def update_photo_captions(
+    payload: PhotoBulkCaptionUpdate,
+    session: Session = Depends(get_session),
+) -> PhotoBulkResult:
+    return crud.set_photo_captions(session, {item.id: item.caption for item in payload.items})
 
 
 @router.patch(
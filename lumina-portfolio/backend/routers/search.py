@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlmodel import Session
+
+from .. import crud, search
+from ..database import get_session
+from ..http_cache import conditional_response, weak_etag
+from ..models import SearchResult
+from .pagination import NEXT_CURSOR_HEADER
+
+MAX_SEARCH_RESULTS = 100
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("", response_model=List[SearchResult])
+def search_library(
+    request: Request,
+    response: Response,
+    q: str = Query(min_length=1, max_length=200, description="Words to find in event titles, descriptions, photo names and captions"),
+    kind: Optional[Literal["event", "photo"]] = Query(default=None),
+    limit: int = Query(default=20, ge=1, le=MAX_SEARCH_RESULTS),
+    cursor: Optional[str] = Query(default=None, description=f"Opaque value from a previous {NEXT_CURSOR_HEADER} header"),
+    session: Session = Depends(get_session),
+):
+    """Ranked full-text search; every word has to match the start of a word, in any order."""
+
+    not_modified = conditional_response(request, response, weak_etag(crud.events_etag(session), "search", request.url.query))
+    if not_modified:
+        return not_modified
+    results, next_cursor = search.search(session, q, limit=limit, cursor=cursor, kind=kind)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return results
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import logging
+import os
+import re
+from typing import Tuple
+from uuid import UUID, uuid4
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+
+from .. import crud, storage
+from ..config import Settings, get_settings
+from ..database import get_session
+from ..image_worker import ImageWorkerPool, get_image_worker
+from ..jobs import JobWorker, get_job_worker
+from ..metrics import Metrics, get_metrics
+from ..models import PhotoRead, PhotoUpload, UploadSessionCreate, UploadSessionRead
+from ..probe import ImageTooLarge, probe_image
+from .dependencies import require_admin
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_OFFSET_HEADER = "Upload-Offset"
+
+_CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+router = APIRouter(tags=["uploads"], dependencies=[Depends(require_admin)])
+
+
+def _parse_content_range(header: str | None, size: int) -> Tuple[int, int]:
+    """Parse ``bytes start-end/total`` into an inclusive ``(start, end)`` pair."""
+
+    match = _CONTENT_RANGE.match(header or "")
+    if not match:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="A Content-Range header is required")
+    start, end, total = (int(value) for value in match.groups())
+    if total != size or start > end or end >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+@router.post("/events/{event_id}/uploads", response_model=UploadSessionRead, status_code=status.HTTP_201_CREATED)
+def create_upload(
+    event_id: UUID,
+    payload: UploadSessionCreate,
+    session: Session = Depends(get_session),
+    settings: Settings = Depends(get_settings),
+) -> UploadSessionRead:
+    event = crud.get_event_or_404(session, event_id=event_id)
+    return crud.create_upload_session(session, settings, event=event, payload=payload)
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadSessionRead)
+def get_upload(upload_id: UUID, response: Response, session: Session = Depends(get_session)) -> UploadSessionRead:
+    upload = crud.serialize_upload_session(crud.get_upload_session_or_404(session, upload_id))
+    response.headers[UPLOAD_OFFSET_HEADER] = str(upload.received)
+    return upload
+
+
+@router.put("/uploads/{upload_id}", response_model=UploadSessionRead)
+async def upload_chunk(
+    upload_id: UUID,
+    request: Request,
+    response: Response,
+    session: Session = Depends(get_session),
+    settings: Settings = Depends(get_settings),
+) -> UploadSessionRead:
+    """Write one byte range of the file in place.
+
+    A chunk may overlap bytes already received (e.g. a retry after a dropped
+    connection) but must not leave a gap. Whatever arrived before a disconnect
+    is kept, so the client resumes from ``received`` instead of starting over.
+    """
+
+    upload = crud.get_upload_session_or_404(session, upload_id)
+    start, end = _parse_content_range(request.headers.get("content-range"), upload.size)
+    if start > upload.received:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Chunk starts at byte {start} but only {upload.received} bytes have been received",
+            headers={UPLOAD_OFFSET_HEADER: str(upload.received)},
+        )
+
+    position = start
+    try:
+        with storage.upload_part_path(settings, upload.id).open("r+b") as handle:
+            handle.seek(start)
+            async for chunk in request.stream():
+                if position + len(chunk) > end + 1:
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Chunk is larger than its Content-Range")
+                handle.write(chunk)
+                position += len(chunk)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found") from exc
+    except ClientDisconnect:
+        logger.info("Upload %s interrupted at byte %s", upload.id, position)
+        raise
+    finally:
+        if position > upload.received:
+            crud.record_upload_progress(session, upload, position)
+
+    if position != end + 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Chunk is shorter than its Content-Range",
+            headers={UPLOAD_OFFSET_HEADER: str(upload.received)},
+        )
+    response.headers[UPLOAD_OFFSET_HEADER] = str(upload.received)
+    return crud.serialize_upload_session(upload)
+
+
+@router.post("/uploads/{upload_id}/finalize", response_model=PhotoRead, status_code=status.HTTP_201_CREATED)
+async def finalize_upload(
+    upload_id: UUID,
+    session: Session = Depends(get_session),
+    settings: Settings = Depends(get_settings),
+    image_worker: ImageWorkerPool = Depends(get_image_worker),
+    job_worker: JobWorker = Depends(get_job_worker),
+    metrics: Metrics = Depends(get_metrics),
+) -> PhotoRead:
+    """Turn a fully received upload into a photo through the regular registration path."""
+
+    upload = crud.get_upload_session_or_404(session, upload_id)
+    if upload.received < upload.size:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload is incomplete: {upload.received} of {upload.size} bytes received",
+            headers={UPLOAD_OFFSET_HEADER: str(upload.received)},
+        )
+    event = crud.get_event_or_404(session, event_id=upload.event_id)
+    # Claiming the part file makes a concurrent finalize of the same upload fail fast.
+    part = storage.upload_part_path(settings, upload.id)
+    staged = storage.incoming_dir(settings) / uuid4().hex
+    try:
+        os.replace(part, staged)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload is already being finalized") from exc
+    try:
+        with metrics.stage("upload.hash"):
+            digest = await run_in_threadpool(storage.file_digest, staged)
+
+        blob = crud.find_blob(session, digest)
+        if blob is not None:
+            # Keep the bytes staged: the blob may be deleted before the registering transaction begins.
+            photo = crud.complete_upload_session(
+                session, settings, upload=upload, event=event, stored=crud.blob_upload(blob, upload.name, staged_path=staged)
+            )
+            staged.unlink(missing_ok=True)
+            return photo
+
+        try:
+            with metrics.stage("upload.probe"):
+                width, height = await probe_image(image_worker, staged, max_pixels=settings.max_image_pixels)
+        except OSError as exc:
+            staged.unlink(missing_ok=True)
+            crud.delete_upload_session(session, settings, upload.id)
+            if isinstance(exc, ImageTooLarge):
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc)) from exc
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image file") from exc
+
+        stored = PhotoUpload(
+            filename=f"{digest}{storage.upload_extension(upload.name, upload.content_type)}",
+            original_name=upload.name,
+            content_type=upload.content_type,
+            width=width,
+            height=height,
+            size=upload.size,
+            content_hash=digest,
+            staged_path=staged,
+        )
+        with metrics.stage("upload.register"):
+            photo = crud.complete_upload_session(session, settings, upload=upload, event=event, stored=stored)
+    except BaseException:
+        # Put the bytes back so the upload can be finalized again; a rejected file is already gone with its session.
+        session.rollback()
+        try:
+            os.replace(staged, part)
+        except FileNotFoundError:
+            pass
+        raise
+    job_worker.notify()
+    return photo
+
+
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+def cancel_upload(
+    upload_id: UUID,
+    session: Session = Depends(get_session),
+    settings: Settings = Depends(get_settings),
+) -> Response:
+    crud.delete_upload_session(session, settings, upload_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import html
+import re
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlmodel import Session
+
+from . import variants
+from .models import SearchResult
+
+SEARCH_TABLE = "search_index"
+
+# Name and title matches count four times as much as caption and description matches.
+_RANK = f"bm25({SEARCH_TABLE}, 0.0, 0.0, 0.0, 4.0, 1.0)"
+# Control characters cannot occur in indexed text, so they mark highlights until the text has been escaped.
+_OPEN, _CLOSE = "\x02", "\x03"
+_SNIPPET_TOKENS = 12
+
+_DDL = (
+    # ``ref`` is indexed only so rows can be found by id without a scan; queries never search it.
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        kind UNINDEXED, ref, event_id UNINDEXED, title, body,
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_event_insert AFTER INSERT ON event BEGIN
+        INSERT INTO {SEARCH_TABLE} (kind, ref, event_id, title, body)
+        VALUES ('event', new.id, new.id, new.title, coalesce(new.description, ''));
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_event_update AFTER UPDATE OF title, description ON event BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid IN (SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH 'ref:"' || old.id || '"');
+        INSERT INTO {SEARCH_TABLE} (kind, ref, event_id, title, body)
+        VALUES ('event', new.id, new.id, new.title, coalesce(new.description, ''));
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_event_delete AFTER DELETE ON event BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid IN (SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH 'ref:"' || old.id || '"');
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_photo_insert AFTER INSERT ON photo BEGIN
+        INSERT INTO {SEARCH_TABLE} (kind, ref, event_id, title, body)
+        VALUES ('photo', new.id, new.event_id, new.name, coalesce(new.caption, ''));
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_photo_update AFTER UPDATE OF name, caption, event_id ON photo BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid IN (SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH 'ref:"' || old.id || '"');
+        INSERT INTO {SEARCH_TABLE} (kind, ref, event_id, title, body)
+        VALUES ('photo', new.id, new.event_id, new.name, coalesce(new.caption, ''));
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_photo_delete AFTER DELETE ON photo BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid IN (SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH 'ref:"' || old.id || '"');
+    END
+    """,
+)
+
+_BACKFILL = (
+    f"""
+    INSERT INTO {SEARCH_TABLE} (kind, ref, event_id, title, body)
+    SELECT 'event', id, id, title, coalesce(description, '') FROM event
+    """,
+    f"""
+    INSERT INTO {SEARCH_TABLE} (kind, ref, event_id, title, body)
+    SELECT 'photo', id, event_id, name, coalesce(caption, '') FROM photo
+    """,
+)
+
+
+def install_search_index(connection: Connection) -> None:
+    """Create the full-text index and the triggers that keep it in step with events and photos.
+
+    Triggers fire for every write, including the set-based statements in
+    ``crud``, so no mutator has to maintain the index itself. The index is
+    filled from existing rows the first time it is created.
+    """
+
+    if connection.dialect.name != "sqlite":
+        return
+    exists = connection.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SEARCH_TABLE,)).first()
+    for statement in _DDL:
+        connection.exec_driver_sql(statement)
+    if not exists:
+        for statement in _BACKFILL:
+            connection.exec_driver_sql(statement)
+
+
+def match_expression(query: str) -> Optional[str]:
+    """Turn free text into an FTS5 query: every word must match the start of a word in a title or body.
+
+    Words are quoted, so FTS5 operators typed by users are searched for
+    literally. ``IMG_4411`` becomes the phrase ``img 4411``, as indexed.
+    """
+
+    words = re.findall(r"\w+", query)
+    if not words:
+        return None
+    return "{title body} : (" + " ".join(f'"{word}"*' for word in words) + ")"
+
+
+def _markup(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    return html.escape(value).replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>")
+
+
+def encode_cursor(score: float, rowid: int) -> str:
+    return base64.urlsafe_b64encode(f"{score!r}:{rowid}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        score, rowid = raw.split(":", 1)
+        return float(score), int(rowid)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+
+
+def search(
+    session: Session,
+    query: str,
+    *,
+    limit: int,
+    cursor: str | None = None,
+    kind: str | None = None,
+) -> Tuple[List[SearchResult], Optional[str]]:
+    """Return one page of events and photos matching ``query``, best matches first, and the next cursor.
+
+    Titles are returned with every match wrapped in ``<mark>``; bodies as a
+    short snippet around the best match. Both are HTML-escaped.
+    """
+
+    if session.get_bind().dialect.name != "sqlite":
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="Search requires SQLite")
+    expression = match_expression(query)
+    if expression is None:
+        return [], None
+
+    params = {"match": expression, "kind": kind, "limit": limit + 1}
+    after = ""
+    if cursor:
+        params["score"], params["rowid"] = decode_cursor(cursor)
+        after = f"AND ({_RANK} > :score OR ({_RANK} = :score AND {SEARCH_TABLE}.rowid > :rowid))"
+    statement = text(
+        f"""
+        SELECT {SEARCH_TABLE}.rowid, kind, ref, e.id, e.slug, e.watermark_version,
+               highlight({SEARCH_TABLE}, 3, :open, :close),
+               snippet({SEARCH_TABLE}, 4, :open, :close, '…', {_SNIPPET_TOKENS}),
+               {_RANK} AS score
+        FROM {SEARCH_TABLE} JOIN event AS e ON e.id = {SEARCH_TABLE}.event_id
+        WHERE {SEARCH_TABLE} MATCH :match AND (:kind IS NULL OR kind = :kind) {after}
+        ORDER BY score, {SEARCH_TABLE}.rowid
+        LIMIT :limit
+        """
+    )
+    rows = session.execute(statement, {**params, "open": _OPEN, "close": _CLOSE}).all()
+
+    results = []
+    for rowid, row_kind, ref, event_id, slug, version, title, snippet, score in rows[:limit]:
+        ref = UUID(hex=ref)
+        results.append(
+            SearchResult(
+                kind=row_kind,
+                id=ref,
+                eventId=UUID(hex=event_id),
+                eventSlug=slug,
+                title=_markup(title) or "",
+                snippet=_markup(snippet),
+                score=-score,
+                thumbnailUrl=variants.image_url(ref, "thumbnail", version) if row_kind == "photo" else None,
+            )
+        )
+    next_cursor = encode_cursor(rows[limit - 1][-1], rows[limit - 1][0]) if len(rows) > limit else None
+    return results, next_cursor
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+from pathlib import Path
+from typing import List
+from uuid import UUID
+
+from .config import Settings
+from .models import Photo
+
+# Content-addressed originals and their renditions live under uploads/_blobs/<first two hex digits>/.
+BLOBS_DIRNAME = "_blobs"
+INCOMING_DIRNAME = "incoming"
+
+
+def blob_dir(settings: Settings, digest: str) -> Path:
+    return Path(settings.uploads_dir) / BLOBS_DIRNAME / digest[:2]
+
+
+def incoming_dir(settings: Settings) -> Path:
+    """Scratch folder for uploads that are still being hashed."""
+
+    path = Path(settings.uploads_dir) / BLOBS_DIRNAME / INCOMING_DIRNAME
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def upload_part_path(settings: Settings, upload_id: UUID) -> Path:
+    """File a resumable upload is assembled in before it is finalized."""
+
+    return incoming_dir(settings) / f"{upload_id.hex}.part"
+
+
+def upload_extension(filename: str | None, content_type: str | None) -> str:
+    extension = Path(filename or "").suffix.lower()
+    return extension or mimetypes.guess_extension(content_type or "") or ".jpg"
+
+
+def file_digest(path: Path, chunk_size: int = 4 * 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while chunk := handle.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def photo_relpath(photo: Photo, filename: str | None = None) -> str:
+    """Path of one of the photo's files relative to the uploads root.
+
+    Photos uploaded before content addressing keep their files in the event folder.
+    """
+
+    name = filename or photo.filename
+    if photo.content_hash:
+        return f"{BLOBS_DIRNAME}/{photo.content_hash[:2]}/{name}"
+    return f"{photo.event_slug}/{name}"
+
+
+def photo_path(settings: Settings, photo: Photo, filename: str | None = None) -> Path:
+    return Path(settings.uploads_dir) / photo_relpath(photo, filename)
+
+
+def blob_files(settings: Settings, digest: str, *filenames: str | None) -> List[Path]:
+    directory = blob_dir(settings, digest)
+    return [directory / name for name in filenames if name]
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+import pytest
+
+# Settings are read once at import, so the environment has to be in place before the app is.
+_ROOT = Path(tempfile.mkdtemp(prefix="lumina-tests-"))
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{(_ROOT / 'lumina.db').as_posix()}",
+    UPLOADS_DIR=str(_ROOT / "uploads"),
+    ARCHIVE_CACHE_DIR=str(_ROOT / "archives"),
+    WATERMARK_CACHE_DIR=str(_ROOT / "watermarks"),
+    VARIANT_CACHE_DIR=str(_ROOT / "variants"),
+    PROFILE_DIR=str(_ROOT / "profiles"),
+    SLOW_REQUEST_SECONDS="0",
+    MAX_IMAGE_PIXELS="1000000",
+    READ_CACHE_TTL="0",
+)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from backend.config import get_settings  # noqa: E402
+from backend.main import app  # noqa: E402
+
+ADMIN_HEADERS = {"x-admin-password": get_settings().admin_password}
+
+
+@pytest.fixture(scope="session")
+def client() -> Iterator[TestClient]:
+    with TestClient(app) as test_client:
+        yield test_client
+    shutil.rmtree(_ROOT, ignore_errors=True)
+
+
+@pytest.fixture
+def event(client: TestClient) -> dict:
+    slug = f"event-{os.urandom(4).hex()}"
+    response = client.post("/api/events", json={"title": slug, "slug": slug, "date": "2024-01-01"}, headers=ADMIN_HEADERS)
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def wait_for_jobs(client: TestClient, event_id: Optional[str], timeout: float = 30.0) -> None:
+    """Block until the event's (or, without one, every) background jobs have finished, so photos stop changing."""
+
+    deadline = time.monotonic() + timeout
+    params = {"eventId": event_id} if event_id else {}
+    while True:
+        stats = client.get("/api/jobs/stats", params=params, headers=ADMIN_HEADERS).json()
+        if stats["queued"] + stats["running"] == 0:
+            return
+        assert time.monotonic() < deadline, stats
+        time.sleep(0.05)
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import io
+import zipfile
+
+import pytest
+from PIL import Image
+
+from backend.archive_cache import ArchiveCache, get_archive_cache
+from backend.main import app
+
+from .conftest import ADMIN_HEADERS
+
+
+def _jpeg(color: str) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (320, 240), color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("cached", [True, False])
+def test_watermarked_archive_is_rendered_while_streaming(client, event, tmp_path, cached):
+    if not cached:
+        app.dependency_overrides[get_archive_cache] = lambda: ArchiveCache(tmp_path, 0)
+    try:
+        originals = {f"{color}.jpg": _jpeg(color) for color in ("red", "green", "blue", "white", "black")}
+        files = [("files", (name, data, "image/jpeg")) for name, data in originals.items()]
+        assert client.post(f"/api/events/{event['id']}/photos", files=files, headers=ADMIN_HEADERS).status_code == 201
+        watermark = client.patch(f"/api/events/{event['id']}/watermark", json={"watermarkText": "PROOF"}, headers=ADMIN_HEADERS)
+        assert watermark.status_code == 200
+
+        response = client.get(f"/api/events/{event['slug']}/zip")
+        again = client.get(f"/api/events/{event['slug']}/zip")
+    finally:
+        app.dependency_overrides.pop(get_archive_cache, None)
+
+    assert response.status_code == 200
+    assert again.content == response.content
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert archive.testzip() is None
+    assert sorted(archive.namelist()) == sorted(originals)
+    for name, data in originals.items():
+        assert archive.read(name) != data
+        assert Image.open(io.BytesIO(archive.read(name))).size == (320, 240)
+
+
+def test_archive_serves_byte_ranges(client, event):
+    files = [("files", (f"{color}.jpg", _jpeg(color), "image/jpeg")) for color in ("red", "green", "blue")]
+    assert client.post(f"/api/events/{event['id']}/photos", files=files, headers=ADMIN_HEADERS).status_code == 201
+    url = f"/api/events/{event['slug']}/zip"
+
+    full = client.get(url)
+    assert full.status_code == 200
+    assert int(full.headers["content-length"]) == len(full.content)
+    assert zipfile.ZipFile(io.BytesIO(full.content)).testzip() is None
+    etag, total = full.headers["etag"], len(full.content)
+
+    for spec, start, stop in [("10-99", 10, 100), ("-64", total - 64, total), (f"{total - 5}-", total - 5, total)]:
+        part = client.get(url, headers={"Range": f"bytes={spec}", "If-Range": etag})
+        assert part.status_code == 206
+        assert part.headers["content-range"] == f"bytes {start}-{stop - 1}/{total}"
+        assert part.content == full.content[start:stop]
+
+    stale = client.get(url, headers={"Range": "bytes=10-99", "If-Range": '"stale"'})
+    assert stale.status_code == 200
+    assert stale.content == full.content
+
+    outside = client.get(url, headers={"Range": f"bytes={total}-"})
+    assert outside.status_code == 416
+    assert outside.headers["content-range"] == f"bytes */{total}"
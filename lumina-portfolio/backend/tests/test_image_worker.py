@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from backend.image_worker import ImageWorkerPool
+
+
+def test_pool_recovers_from_a_dead_worker():
+    async def scenario():
+        pool = ImageWorkerPool(max_workers=1, max_pending=4, queue_timeout=30)
+        try:
+            with pytest.raises(BrokenProcessPool):
+                await pool.run(os._exit, 1)
+            return await pool.run(pow, 2, 10)
+        finally:
+            pool.shutdown()
+
+    assert asyncio.run(scenario()) == 1024
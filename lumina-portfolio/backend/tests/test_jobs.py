@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import io
+import os
+import time
+from uuid import UUID
+
+import pytest
+from PIL import Image
+from sqlmodel import Session
+
+from backend import crud, storage
+from backend.config import get_settings
+from backend.database import engine
+from backend.models import Event, Photo, PhotoUpload
+
+from .conftest import ADMIN_HEADERS
+
+
+def _create_event(client) -> UUID:
+    slug = f"event-{os.urandom(4).hex()}"
+    response = client.post("/api/events", json={"title": slug, "slug": slug, "date": "2024-01-01"}, headers=ADMIN_HEADERS)
+    assert response.status_code == 201
+    return UUID(response.json()["id"])
+
+
+def _upload(tmp_path, name: str) -> PhotoUpload:
+    buffer = io.BytesIO()
+    Image.frombytes("RGB", (64, 48), os.urandom(64 * 48 * 3)).save(buffer, "JPEG")
+    staged = tmp_path / name
+    staged.write_bytes(buffer.getvalue())
+    digest = storage.file_digest(staged)
+    return PhotoUpload(
+        filename=f"{digest}.jpg",
+        original_name=name,
+        content_type="image/jpeg",
+        width=64,
+        height=48,
+        size=staged.stat().st_size,
+        content_hash=digest,
+        staged_path=staged,
+    )
+
+
+@pytest.mark.parametrize("remove", ["event", "photo"])
+def test_shared_blob_is_processed_after_its_first_photo_is_gone(client, tmp_path, remove):
+    settings = get_settings()
+    first_event, second_event = _create_event(client), _create_event(client)
+    upload = _upload(tmp_path, "shared.jpg")
+    # Registered directly so the job worker only sees the job on its next poll, after the removal.
+    with Session(engine) as session:
+        [first] = crud.register_photos(session, settings, event=session.get(Event, first_event), uploads=[upload])
+        blob = crud.find_blob(session, upload.content_hash)
+        [second] = crud.register_photos(
+            session, settings, event=session.get(Event, second_event), uploads=[crud.blob_upload(blob, "copy.jpg")]
+        )
+        if remove == "event":
+            crud.delete_event(session, first_event, settings)
+        else:
+            crud.delete_photo(session, settings, first.id)
+
+    deadline = time.monotonic() + 30
+    while True:
+        with Session(engine) as session:
+            photo = session.get(Photo, second.id)
+        if photo.thumbnail_filename or time.monotonic() > deadline:
+            break
+        time.sleep(0.1)
+    assert photo.thumbnail_filename and photo.web_filename
+    assert client.get(f"/api/images/{second.id}/thumbnail").status_code == 200
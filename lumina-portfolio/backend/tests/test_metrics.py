@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from backend.config import get_settings
+
+
+def test_sync_endpoint_is_profiled(client):
+    profiles = get_settings().profile_dir
+
+    response = client.get("/api/events")
+
+    assert response.status_code == 200
+    assert any(path.name.endswith(".prof") and "-get-api-events-" in path.name for path in profiles.iterdir())
+
+
+def test_sync_endpoint_survives_busy_profiler(client, monkeypatch):
+    """From Python 3.12 a second cProfile cannot start while another is active."""
+
+    import cProfile
+
+    def refuse(self, *args, **kwargs):
+        raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(cProfile.Profile, "enable", refuse)
+
+    assert client.get("/api/events").status_code == 200
+    assert client.get("/health").json() == {"status": "ok"}
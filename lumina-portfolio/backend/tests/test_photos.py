@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import io
+
+import pytest
+from PIL import Image
+
+from backend import crud, fastjson
+from backend.read_cache import ReadCache
+
+from .conftest import ADMIN_HEADERS, wait_for_jobs
+
+
+def _jpeg(color: str) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 24), color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("across_events", [False, True])
+def test_large_photo_page_is_streamed_and_not_cached(client, event, monkeypatch, across_events):
+    files = [("files", (f"{color}.jpg", _jpeg(color), "image/jpeg")) for color in ("red", "green", "blue")]
+    assert client.post(f"/api/events/{event['id']}/photos", files=files, headers=ADMIN_HEADERS).status_code == 201
+    wait_for_jobs(client, None if across_events else event["id"])
+    url = "/api/photos" if across_events else f"/api/events/{event['slug']}/photos"
+    cache = ReadCache(ttl=60, max_entries=10, max_bytes=1024**2)
+    monkeypatch.setattr(crud, "get_read_cache", lambda: cache)
+    encoded = client.get(url)
+    assert cache._entries
+    assert client.get(url, headers={"If-None-Match": encoded.headers["etag"]}).status_code == 304
+    cache.clear()
+
+    monkeypatch.setattr(fastjson, "STREAM_THRESHOLD", 2)
+    streamed = client.get(url)
+
+    assert streamed.status_code == 200
+    assert "content-length" not in streamed.headers
+    assert streamed.json() == encoded.json()
+    assert streamed.headers["etag"] == encoded.headers["etag"]
+    assert not cache._entries
+    assert client.get(url, headers={"If-None-Match": streamed.headers["etag"]}).status_code == 304
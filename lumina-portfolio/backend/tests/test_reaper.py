@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+
+from PIL import Image
+
+from backend import storage
+from backend.config import get_settings
+from backend.reaper import get_reaper
+
+from .conftest import ADMIN_HEADERS, wait_for_jobs
+
+
+def _reap() -> None:
+    while get_reaper().reap_batch():
+        pass
+
+
+def _blob_files(digest: str):
+    return sorted(storage.blob_dir(get_settings(), digest).glob(f"{digest}*"))
+
+
+def test_shared_blob_outlives_all_but_its_last_reference(client, event):
+    buffer = io.BytesIO()
+    Image.frombytes("RGB", (32, 32), os.urandom(32 * 32 * 3)).save(buffer, "JPEG")
+    data = buffer.getvalue()
+    digest = hashlib.sha256(data).hexdigest()
+    slug = f"event-{os.urandom(4).hex()}"
+    other = client.post("/api/events", json={"title": slug, "slug": slug, "date": "2024-01-01"}, headers=ADMIN_HEADERS).json()
+
+    photo_ids = []
+    for target in (event, other):
+        response = client.post(
+            f"/api/events/{target['id']}/photos", files=[("files", ("shared.jpg", data, "image/jpeg"))], headers=ADMIN_HEADERS
+        )
+        assert response.status_code == 201, response.text
+        photo_ids.append(response.json()[0]["id"])
+        wait_for_jobs(client, target["id"])
+
+    stored = _blob_files(digest)
+    assert stored
+
+    assert client.delete(f"/api/photos/{photo_ids[0]}", headers=ADMIN_HEADERS).status_code == 204
+    assert client.delete(f"/api/events/{event['id']}", headers=ADMIN_HEADERS).status_code == 204
+    _reap()
+    assert _blob_files(digest) == stored
+    assert client.get(f"/api/images/{photo_ids[1]}/original").status_code == 200
+
+    assert client.delete(f"/api/events/{other['id']}", headers=ADMIN_HEADERS).status_code == 204
+    _reap()
+    assert _blob_files(digest) == []
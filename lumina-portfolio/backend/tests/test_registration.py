@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+from uuid import UUID
+
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, select
+
+from backend import crud, storage
+from backend.config import get_settings
+from backend.database import engine
+from backend.models import Event, Photo, PhotoUpload
+
+from .conftest import ADMIN_HEADERS
+
+
+def _jpeg() -> bytes:
+    buffer = io.BytesIO()
+    Image.frombytes("RGB", (16, 16), os.urandom(16 * 16 * 3)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def _staged_uploads(tmp_path, count):
+    uploads = []
+    for index in range(count):
+        data = os.urandom(64)
+        digest = hashlib.sha256(data).hexdigest()
+        staged = tmp_path / digest
+        staged.write_bytes(data)
+        uploads.append(
+            PhotoUpload(
+                filename=f"{digest}.jpg",
+                original_name=f"{index}.jpg",
+                content_type="image/jpeg",
+                width=1,
+                height=1,
+                size=len(data),
+                content_hash=digest,
+                staged_path=staged,
+            )
+        )
+    return uploads
+
+
+def _stored(event_id):
+    with Session(engine) as session:
+        photos = session.exec(select(Photo).where(Photo.event_id == event_id)).all()
+        return photos, session.get(Event, event_id)
+
+
+def test_batch_is_one_transaction(event, tmp_path, monkeypatch):
+    event_id = UUID(event["id"])
+    uploads = _staged_uploads(tmp_path, 3)
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("crashed before the counters were updated")
+
+    monkeypatch.setattr(crud, "_adjust_event_stats", crash)
+    with Session(engine) as session, pytest.raises(RuntimeError):
+        crud.register_photos(session, get_settings(), event=session.get(Event, event_id), uploads=uploads)
+
+    photos, stored_event = _stored(event_id)
+    assert photos == []
+    assert stored_event.photo_count == 0
+
+
+def test_bad_row_does_not_roll_back_the_batch(event, tmp_path, monkeypatch):
+    event_id = UUID(event["id"])
+    uploads = _staged_uploads(tmp_path, 3)
+    store = crud._store_staged_file
+
+    def flaky_store(settings, upload, created):
+        if upload is uploads[1]:
+            raise SQLAlchemyError("rejected")
+        store(settings, upload, created)
+
+    monkeypatch.setattr(crud, "_store_staged_file", flaky_store)
+    with Session(engine) as session:
+        created = crud.register_photos(session, get_settings(), event=session.get(Event, event_id), uploads=uploads)
+
+    photos, stored_event = _stored(event_id)
+    assert sorted(photo.name for photo in created) == ["0.jpg", "2.jpg"]
+    assert sorted(photo.name for photo in photos) == ["0.jpg", "2.jpg"]
+    assert stored_event.photo_count == 2
+
+
+def test_blob_deleted_before_registration_is_restored_from_the_upload(client, event, tmp_path):
+    event_id = UUID(event["id"])
+    data = _jpeg()
+    first = client.post(f"/api/events/{event['id']}/photos", files=[("files", ("a.jpg", data, "image/jpeg"))], headers=ADMIN_HEADERS)
+    assert first.status_code == 201
+    with Session(engine) as session:
+        blob = crud.find_blob(session, hashlib.sha256(data).hexdigest())
+    staged = tmp_path / "upload"
+    staged.write_bytes(data)
+    # The route matched the upload to this blob; its last reference goes away before registration.
+    upload = crud.blob_upload(blob, "b.jpg", staged_path=staged)
+    assert client.delete(f"/api/photos/{first.json()[0]['id']}", headers=ADMIN_HEADERS).status_code == 204
+
+    with Session(engine) as session:
+        [photo] = crud.register_photos(session, get_settings(), event=session.get(Event, event_id), uploads=[upload])
+
+    with Session(engine) as session:
+        stored = session.get(Photo, photo.id)
+        assert storage.photo_path(get_settings(), stored).read_bytes() == data
+        assert stored.thumbnail_filename is None
+    assert client.get(f"/api/images/{photo.id}/original").status_code == 200
+
+
+def test_blob_without_staged_bytes_is_not_recreated(client, event):
+    data = _jpeg()
+    first = client.post(f"/api/events/{event['id']}/photos", files=[("files", ("a.jpg", data, "image/jpeg"))], headers=ADMIN_HEADERS)
+    digest = hashlib.sha256(data).hexdigest()
+    with Session(engine) as session:
+        upload = crud.blob_upload(crud.find_blob(session, digest), "b.jpg")
+    assert client.delete(f"/api/photos/{first.json()[0]['id']}", headers=ADMIN_HEADERS).status_code == 204
+
+    with Session(engine) as session, pytest.raises(HTTPException) as raised:
+        crud.register_photos(session, get_settings(), event=session.get(Event, UUID(event["id"])), uploads=[upload])
+
+    assert raised.value.status_code == 409
+    with Session(engine) as session:
+        assert crud.find_blob(session, digest) is None
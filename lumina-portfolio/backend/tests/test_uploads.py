@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import io
+import os
+import struct
+
+import pytest
+from PIL import Image
+
+from backend import crud
+
+from .conftest import ADMIN_HEADERS
+
+
+def _bmp_header(width: int, height: int) -> bytes:
+    """A BMP that declares ``width`` x ``height`` pixels but carries no pixel data."""
+
+    info = struct.pack("<IiiHHIIiiII", 40, width, height, 1, 24, 0, 0, 2835, 2835, 0, 0)
+    return struct.pack("<2sIHHI", b"BM", 14 + len(info), 0, 0, 14 + len(info)) + info
+
+
+def test_upload_rejects_decompression_bomb(client, event):
+    # Twice the pixel limit: Pillow raises DecompressionBombError while reading the header.
+    response = client.post(
+        f"/api/events/{event['id']}/photos",
+        files=[("files", ("bomb.bmp", _bmp_header(1500, 1500), "image/bmp"))],
+        headers=ADMIN_HEADERS,
+    )
+
+    assert response.status_code == 400
+
+
+def _received_upload(client, event, filename: str, body: bytes, content_type: str) -> str:
+    created = client.post(
+        f"/api/events/{event['id']}/uploads",
+        json={"filename": filename, "size": len(body), "contentType": content_type},
+        headers=ADMIN_HEADERS,
+    )
+    assert created.status_code == 201, created.text
+    upload_id = created.json()["id"]
+    sent = client.put(
+        f"/api/uploads/{upload_id}",
+        content=body,
+        headers={**ADMIN_HEADERS, "Content-Range": f"bytes 0-{len(body) - 1}/{len(body)}"},
+    )
+    assert sent.status_code < 300, sent.text
+    return upload_id
+
+
+def test_finalize_rejects_oversized_image(client, event):
+    upload_id = _received_upload(client, event, "large.bmp", _bmp_header(1500, 1500), "image/bmp")
+
+    response = client.post(f"/api/uploads/{upload_id}/finalize", headers=ADMIN_HEADERS)
+
+    assert response.status_code == 413
+
+
+@pytest.mark.parametrize("known", [False, True])
+def test_failed_finalize_can_be_retried(client, event, monkeypatch, known):
+    buffer = io.BytesIO()
+    Image.frombytes("RGB", (16, 16), os.urandom(16 * 16 * 3)).save(buffer, "JPEG")
+    body = buffer.getvalue()
+    if known:
+        files = [("files", ("first.jpg", body, "image/jpeg"))]
+        assert client.post(f"/api/events/{event['id']}/photos", files=files, headers=ADMIN_HEADERS).status_code == 201
+    upload_id = _received_upload(client, event, "retry.jpg", body, "image/jpeg")
+    register = crud.register_photo
+
+    def fail_once(*args, **kwargs):
+        monkeypatch.setattr(crud, "register_photo", register)
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(crud, "register_photo", fail_once)
+    with pytest.raises(RuntimeError):
+        client.post(f"/api/uploads/{upload_id}/finalize", headers=ADMIN_HEADERS)
+
+    assert client.get(f"/api/uploads/{upload_id}", headers=ADMIN_HEADERS).json()["received"] == len(body)
+    response = client.post(f"/api/uploads/{upload_id}/finalize", headers=ADMIN_HEADERS)
+    assert response.status_code == 201, response.text
+    assert client.get(f"/api/images/{response.json()['id']}/original").content == body
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import io
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.zipstream import ZipEntry, ZipStream
+
+
+def _entries(tmp_path, names):
+    entries = []
+    for name in names:
+        path = tmp_path / name
+        # Text compresses; the random half keeps the stored entries honest about their sizes.
+        path.write_bytes(b"lumina " * 4000 + os.urandom(2048))
+        entries.append(ZipEntry(arcname=name, path=path, size=path.stat().st_size, modified_ms=1_700_000_000_000))
+    return entries
+
+
+def _read_back(data, entries):
+    archive = zipfile.ZipFile(io.BytesIO(data))
+    assert archive.testzip() is None
+    assert archive.namelist() == [entry.arcname for entry in entries]
+    for entry in entries:
+        assert archive.read(entry.arcname) == entry.path.read_bytes()
+    return archive
+
+
+@pytest.mark.parametrize("threads", [0, 2])
+def test_stored_and_deflated_entries(tmp_path, threads):
+    entries = _entries(tmp_path, ["a.jpg", "notes.txt", "b.png", "raw.tiff", "c.JPG"])
+    executor = ThreadPoolExecutor(threads) if threads else None
+    try:
+        stream = ZipStream(entries, executor=executor, lookahead_bytes=20_000)
+        data = b"".join(stream)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    archive = _read_back(data, entries)
+    methods = {info.filename: info.compress_type for info in archive.infolist()}
+    assert methods == {
+        "a.jpg": zipfile.ZIP_STORED,
+        "notes.txt": zipfile.ZIP_DEFLATED,
+        "b.png": zipfile.ZIP_STORED,
+        "raw.tiff": zipfile.ZIP_DEFLATED,
+        "c.JPG": zipfile.ZIP_STORED,
+    }
+    assert stream.size is None
+
+
+def test_stored_archive_size_and_ranges(tmp_path):
+    entries = _entries(tmp_path, ["a.jpg", "b.heic", "ünïcode.webp"])
+    stream = ZipStream(entries)
+    data = b"".join(stream)
+
+    _read_back(data, entries)
+    assert stream.size == len(data)
+    for start, stop in [(0, 1), (0, 30), (17, 9000), (len(data) - 22, None), (5000, len(data))]:
+        assert b"".join(stream.iter_range(start, stop)) == data[start:stop]
+
+
+@pytest.mark.parametrize("names", [["a.jpg", "b.jpg"], ["a.jpg", "notes.txt"]])
+def test_forced_zip64(tmp_path, monkeypatch, names):
+    monkeypatch.setattr(ZipStream, "_needs_zip64", staticmethod(lambda size, offset: True))
+    entries = _entries(tmp_path, names)
+    stream = ZipStream(entries)
+    data = b"".join(stream)
+
+    archive = _read_back(data, entries)
+    for info in archive.infolist():
+        assert info.extract_version >= 45
+        assert int.from_bytes(info.extra[:2], "little") == 0x0001
+    if stream.size is not None:
+        assert stream.size == len(data)
+
+
+def test_iterator_entries_are_streamed_once(tmp_path):
+    entries = _entries(tmp_path, ["a.jpg", "notes.txt"])
+    stream = ZipStream(iter(entries))
+
+    assert stream.size is None
+    _read_back(b"".join(stream), entries)
@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import mimetypes
+import os
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from uuid import UUID, uuid4
+
+from PIL import Image, ImageOps, features
+from starlette.concurrency import run_in_threadpool
+
+from . import storage
+from .config import Settings, get_settings
+from .image_worker import ImageWorkerPool
+from .models import Photo
+from .renditions import rendition_extension, save_options
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {"avif": "image/avif", "webp": "image/webp", "jpeg": "image/jpeg"}
+# Originals in these formats are sent as uploaded; anything else (HEIC, TIFF, ...) is transcoded for the browser.
+BROWSER_SAFE_TYPES = frozenset({"image/jpeg", "image/png", "image/gif", "image/webp"})
+
+# Hits refresh a file's access time at most this often; eviction removes the least recently served files first.
+_TOUCH_INTERVAL = 600
+# Sweeps trim the cache to this share of its budget so a full cache is not swept again on the very next render.
+_SWEEP_TARGET = 0.9
+_STALE_PARTIAL_SECONDS = 3600
+
+
+@lru_cache()
+def available_formats() -> Tuple[str, ...]:
+    """Encodable output formats in order of preference; AVIF and WebP depend on how Pillow was built."""
+
+    return tuple(name for name in ("avif", "webp") if features.check(name)) + ("jpeg",)
+
+
+def _accepted(accept: str) -> Dict[str, float]:
+    qualities: Dict[str, float] = {}
+    for item in accept.split(","):
+        media_type, *params = (part.strip() for part in item.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type:
+            qualities[media_type.lower()] = quality
+    return qualities
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Pick the output format for an ``Accept`` header: AVIF, then WebP, then JPEG.
+
+    AVIF and WebP are only chosen when named explicitly, because wildcards are
+    sent by clients that cannot decode them. Higher ``q`` values win; ties go
+    to the smaller format.
+    """
+
+    qualities = _accepted(accept or "")
+    wildcard = max(qualities.get("image/*", 0.0), qualities.get("*/*", 0.0)) if qualities else 1.0
+    candidates = []
+    for rank, name in enumerate(available_formats()):
+        media_type = MEDIA_TYPES[name]
+        quality = qualities.get(media_type, wildcard if name == "jpeg" else 0.0)
+        if quality > 0:
+            candidates.append((quality, -rank, name))
+    return max(candidates)[2] if candidates else "jpeg"
+
+
+def image_url(photo_id: UUID, size: str, version: int) -> str:
+    """URL of the negotiating image endpoint; ``version`` is the event's watermark version."""
+
+    return f"{get_settings().api_prefix}/images/{photo_id}/{size}?v={version}"
+
+
+def media_type(path: Path) -> str:
+    return mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+
+
+def encode_variant(
+    source: Path,
+    destination: Path,
+    *,
+    max_width: Optional[int],
+    image_format: str,
+    quality: int,
+    stamp: Optional[Callable[[Image.Image], Image.Image]] = None,
+) -> None:
+    """Decode ``source``, fit it to ``max_width``, optionally ``stamp`` it and write ``destination`` atomically."""
+
+    with Image.open(source) as opened:
+        if max_width:
+            opened.draft("RGB", (max_width, max_width))
+        icc_profile = opened.info.get("icc_profile")
+        image = ImageOps.exif_transpose(opened)
+        needs_rgb = stamp is not None or image_format == "jpeg"
+        if image.mode not in ("RGB", "L") or (needs_rgb and image.mode != "RGB"):
+            image = image.convert("RGB")
+        if max_width and image.width > max_width:
+            height = max(1, round(image.height * max_width / image.width))
+            image = image.resize((max_width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        if stamp is not None:
+            image = stamp(image)
+
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        partial = destination.with_name(f"{destination.name}.{uuid4().hex}.partial")
+        image.save(partial, format=image_format.upper(), **save_options(image_format, quality, icc_profile))
+    os.replace(partial, destination)
+
+
+class RenderCache:
+    """Files rendered on demand under ``root`` and kept within ``max_bytes``.
+
+    Renders of the same target are single-flight within the process. The
+    least recently served files are evicted once the budget is exceeded; a
+    ``max_bytes`` of zero disables eviction.
+    """
+
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._inflight: Dict[Path, asyncio.Future] = {}
+        self._bytes: Optional[int] = None
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def _hit(self, path: Path) -> bool:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return False
+        now = time.time()
+        if now - stat.st_atime > _TOUCH_INTERVAL:
+            # Only the access time moves, so Last-Modified and ETag of the served file stay stable.
+            try:
+                os.utime(path, (now, stat.st_mtime))
+            except FileNotFoundError:
+                return False
+        return True
+
+    async def _render(self, target: Path, pool: ImageWorkerPool, *args, **kwargs) -> Path:
+        """Return ``target``, producing it with ``pool.run(*args, **kwargs)`` on a miss."""
+
+        if self._hit(target):
+            return target
+        pending = self._inflight.get(target)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[target] = future
+        try:
+            await pool.run(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()  # Mark retrieved; waiters re-raise it themselves.
+            raise
+        else:
+            future.set_result(target)
+            self._added(target)
+            return target
+        finally:
+            self._inflight.pop(target, None)
+
+    def _added(self, path: Path) -> None:
+        if self.max_bytes <= 0:
+            return
+        if self._bytes is not None:
+            try:
+                self._bytes += path.stat().st_size
+            except FileNotFoundError:
+                pass
+        if (self._bytes is None or self._bytes > self.max_bytes) and (self._sweeper is None or self._sweeper.done()):
+            self._sweeper = asyncio.get_running_loop().create_task(run_in_threadpool(self.sweep))
+
+    def sweep(self) -> int:
+        """Evict least recently served files until the cache fits its budget; returns the bytes freed."""
+
+        now = time.time()
+        files = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = Path(directory, name)
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                if name.endswith(".partial"):
+                    if now - stat.st_mtime > _STALE_PARTIAL_SECONDS:
+                        path.unlink(missing_ok=True)
+                    continue
+                files.append((stat.st_atime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        freed = 0
+        if self.max_bytes > 0 and total > self.max_bytes:
+            target = self.max_bytes * _SWEEP_TARGET
+            for _, size, path in sorted(files):
+                if total - freed <= target:
+                    break
+                path.unlink(missing_ok=True)
+                freed += size
+            for directory, subdirectories, names in os.walk(self.root, topdown=False):
+                if directory != str(self.root) and not subdirectories and not names:
+                    try:
+                        os.rmdir(directory)
+                    except OSError:
+                        pass
+            logger.info("Evicted %s bytes from %s", freed, self.root)
+        self._bytes = total - freed
+        return freed
+
+
+class VariantCache(RenderCache):
+    """Photos re-encoded into the format a browser asked for, made once per source file, size and format.
+
+    Variants are keyed by the stored original, so every photo sharing a blob
+    shares its variants too. Stored files already in the requested format are
+    served as they are.
+    """
+
+    def __init__(self, root: Path, settings: Settings) -> None:
+        super().__init__(root, settings.variant_cache_max_bytes)
+        self.settings = settings
+
+    def path(self, photo: Photo, size: str, image_format: str) -> Path:
+        return self.root / f"{storage.photo_relpath(photo)}.{size}{rendition_extension(image_format)}"
+
+    def quality(self, image_format: str) -> int:
+        return self.settings.avif_quality if image_format == "avif" else self.settings.rendition_quality
+
+    async def get(self, pool: ImageWorkerPool, photo: Photo, size: str, image_format: str) -> Path:
+        """Return a file showing ``photo`` at ``size``, in ``image_format`` unless the stored file can be sent as is."""
+
+        if size == "original":
+            original = storage.photo_path(self.settings, photo)
+            if media_type(original) in BROWSER_SAFE_TYPES:
+                if not original.exists():
+                    raise FileNotFoundError(original)
+                return original
+            source, max_width = original, None
+        else:
+            rendition = {"thumbnail": photo.thumbnail_filename, "web": photo.web_filename}[size]
+            source = storage.photo_path(self.settings, photo, rendition)
+            if rendition and media_type(source) == MEDIA_TYPES[image_format] and source.exists():
+                return source
+            max_width = self.settings.thumbnail_width if size == "thumbnail" else self.settings.max_image_width
+
+        return await self._render(
+            self.path(photo, size, image_format),
+            pool,
+            encode_variant,
+            source,
+            self.path(photo, size, image_format),
+            max_width=max_width,
+            image_format=image_format,
+            quality=self.quality(image_format),
+        )
+
+    def discard(self, relpaths: Iterable[str]) -> None:
+        """Drop the variants of stored originals that have been deleted."""
+
+        for relpath in relpaths:
+            source = self.root / relpath
+            for path in source.parent.glob(f"{source.name}.*"):
+                path.unlink(missing_ok=True)
+
+
+@lru_cache()
+def get_variant_cache() -> VariantCache:
+    """Return the process-wide variant cache configured from settings."""
+
+    settings = get_settings()
+    return VariantCache(settings.variant_cache_dir, settings)
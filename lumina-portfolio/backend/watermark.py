@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+import shutil
+from collections import deque
+from concurrent.futures import Future
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Deque, Iterable, Iterator, Optional, Tuple
+from uuid import UUID
+
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+from . import storage
+from .config import Settings, get_settings
+from .image_worker import ImageWorkerPool
+from .models import Event, Photo
+from .renditions import rendition_extension
+from .variants import RenderCache, encode_variant
+
+IMAGE_SIZES = ("thumbnail", "web", "original")
+
+# Opacity of the text and its soft shadow, matching the overlay the gallery used to draw in CSS.
+_TEXT_OPACITY = 0.7
+_SHADOW_OPACITY = 0.45
+
+
+def source_path(settings: Settings, photo: Photo, size: str) -> Path:
+    """Best stored file to derive ``size`` from: its rendition if ready, else the original."""
+
+    filename = {"thumbnail": photo.thumbnail_filename, "web": photo.web_filename}.get(size)
+    return storage.photo_path(settings, photo, filename)
+
+
+@lru_cache(maxsize=64)
+def _text_masks(text: str, font_size: int, font_path: Optional[str]) -> Tuple[Image.Image, Image.Image, int]:
+    """Render ``text`` once into alpha masks for the glyphs and their shadow.
+
+    Returns ``(text_mask, shadow_mask, padding)``; worker processes reuse the
+    masks for every image of the same size class, so compositing only costs a
+    couple of small pastes.
+    """
+
+    font = ImageFont.truetype(font_path, font_size) if font_path else ImageFont.load_default(size=font_size)
+    left, top, right, bottom = font.getbbox(text)
+    padding = max(2, font_size // 4)
+    canvas = (right - left + 2 * padding, bottom - top + 2 * padding)
+    glyphs = Image.new("L", canvas, 0)
+    ImageDraw.Draw(glyphs).text((padding - left, padding - top), text, font=font, fill=255)
+    shadow = glyphs.filter(ImageFilter.GaussianBlur(max(1, font_size // 8)))
+    text_mask = glyphs.point(lambda value: int(value * _TEXT_OPACITY))
+    shadow_mask = shadow.point(lambda value: int(value * _SHADOW_OPACITY))
+    return text_mask, shadow_mask, padding
+
+
+def apply_watermark(image: Image.Image, text: str, *, font_path: Optional[str] = None) -> Image.Image:
+    """Draw ``text`` in the bottom-right corner of an RGB image, in place."""
+
+    # Quantize the font size so galleries with mixed dimensions share a handful of cached masks.
+    font_size = max(10, round(min(image.size) * 0.035 / 2) * 2)
+    text_mask, shadow_mask, padding = _text_masks(text, font_size, font_path)
+    margin = font_size
+    x = max(0, image.width - text_mask.width - margin + padding)
+    y = max(0, image.height - text_mask.height - margin + padding)
+    offset = max(1, font_size // 12)
+    image.paste((0, 0, 0), (x + offset, y + offset), shadow_mask)
+    image.paste((255, 255, 255), (x, y), text_mask)
+    return image
+
+
+class WatermarkCache(RenderCache):
+    """Watermarked copies of delivered images, composited once per (photo, watermark version, format).
+
+    Files live under ``root/<event id>/<watermark version>/``, so changing an
+    event's watermark only needs the old version folders removed.
+    """
+
+    def __init__(self, root: Path, settings: Settings) -> None:
+        super().__init__(root, settings.watermark_cache_max_bytes)
+        self.settings = settings
+
+    def _format(self, size: str, image_format: str) -> Tuple[str, int]:
+        # Watermarked originals are downloads, so they stay JPEG whatever the browser prefers.
+        if size == "original":
+            return "jpeg", self.settings.watermark_original_quality
+        return image_format, self.settings.avif_quality if image_format == "avif" else self.settings.rendition_quality
+
+    def path(self, event: Event, photo: Photo, size: str, image_format: str) -> Path:
+        image_format, _ = self._format(size, image_format)
+        name = f"{photo.id.hex}.{size}{rendition_extension(image_format)}"
+        return self.root / event.id.hex / str(event.watermark_version) / name
+
+    async def get(self, pool: ImageWorkerPool, event: Event, photo: Photo, size: str, image_format: str = "jpeg") -> Path:
+        """Return the watermarked file for ``photo`` at ``size``, rendering it on a miss."""
+
+        target = self.path(event, photo, size, image_format)
+        image_format, quality = self._format(size, image_format)
+        font_path = str(self.settings.watermark_font) if self.settings.watermark_font else None
+        return await self._render(
+            target,
+            pool,
+            encode_variant,
+            source_path(self.settings, photo, size),
+            target,
+            max_width={"thumbnail": self.settings.thumbnail_width, "web": self.settings.max_image_width}.get(size),
+            image_format=image_format,
+            quality=quality,
+            stamp=partial(apply_watermark, text=event.watermark_text, font_path=font_path),
+        )
+
+    def iter_rendered(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        pool: ImageWorkerPool,
+        event: Event,
+        photos: Iterable[Photo],
+        size: str,
+        image_format: str = "jpeg",
+    ) -> Iterator[Tuple[Photo, Path]]:
+        """Yield ``(photo, watermarked file)`` in order, rendering one pool's worth ahead of the consumer.
+
+        Meant for a consumer thread such as an archive build: renders are
+        scheduled on ``loop`` and awaited from the iterating thread, so it must
+        not be iterated on the loop itself. Photos whose source file is gone
+        are skipped.
+        """
+
+        photos = iter(photos)
+        pending: Deque[Tuple[Photo, "Future[Path]"]] = deque()
+
+        def schedule() -> None:
+            while len(pending) < max(1, pool.max_workers) and (photo := next(photos, None)) is not None:
+                render = self.get(pool, event, photo, size, image_format)
+                pending.append((photo, asyncio.run_coroutine_threadsafe(render, loop)))
+
+        try:
+            schedule()
+            while pending:
+                photo, render = pending.popleft()
+                schedule()
+                try:
+                    path = render.result()
+                except FileNotFoundError:
+                    continue
+                yield photo, path
+        finally:
+            for _, render in pending:
+                render.cancel()
+
+    def purge(self, event_id: UUID, *, keep_version: Optional[int] = None) -> None:
+        """Remove cached renders for an event, optionally keeping the current version."""
+
+        event_root = self.root / event_id.hex
+        if not event_root.exists():
+            return
+        if keep_version is None:
+            shutil.rmtree(event_root, ignore_errors=True)
+            return
+        for version_dir in event_root.iterdir():
+            if version_dir.name != str(keep_version):
+                shutil.rmtree(version_dir, ignore_errors=True)
+
+    def discard(self, event_id: UUID, photo_ids: Iterable[UUID]) -> None:
+        event_root = self.root / event_id.hex
+        for photo_id in photo_ids:
+            for path in event_root.glob(f"*/{photo_id.hex}.*"):
+                path.unlink(missing_ok=True)
+
+
+@lru_cache()
+def get_watermark_cache() -> WatermarkCache:
+    """Return the process-wide watermark cache configured from settings."""
+
+    settings = get_settings()
+    return WatermarkCache(settings.watermark_cache_dir, settings)
+
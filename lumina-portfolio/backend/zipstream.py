@@ -0,0 +1,356 @@
+from __future__ import annotations
+
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
+
+READ_SIZE = 1024 * 1024
+
+# Formats that are already compressed gain nothing from DEFLATE and are stored as-is.
+STORED_EXTENSIONS = frozenset({".jpg", ".jpeg", ".heic", ".heif", ".png", ".webp", ".avif", ".gif"})
+
+_ZIP32_LIMIT = 0xFFFFFFFF
+_ZIP16_LIMIT = 0xFFFF
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+_METHOD_STORED = 0
+_METHOD_DEFLATED = 8
+
+
+@dataclass(frozen=True)
+class ZipEntry:
+    """A file to be written into a streamed archive."""
+
+    arcname: str
+    path: Path
+    size: int
+    modified_ms: int
+
+    @property
+    def compress(self) -> bool:
+        return self.path.suffix.lower() not in STORED_EXTENSIONS
+
+
+@dataclass
+class _Lookahead:
+    """An entry queued behind the one being written, with its deflate job if one was started."""
+
+    entry: ZipEntry
+    future: Optional["Future[Tuple[int, List[bytes]]]"] = None
+
+
+@dataclass
+class _Record:
+    entry: ZipEntry
+    name: bytes
+    method: int
+    offset: int
+    zip64: bool
+    crc: int = 0
+    compressed_size: int = 0
+
+
+def _deflate(path: Path, level: int) -> Tuple[int, List[bytes]]:
+    """Compress a whole file into raw DEFLATE chunks and return them with its CRC-32."""
+
+    crc = 0
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    chunks: List[bytes] = []
+    with path.open("rb") as source:
+        while chunk := source.read(READ_SIZE):
+            crc = zlib.crc32(chunk, crc)
+            chunk = compressor.compress(chunk)
+            if chunk:
+                chunks.append(chunk)
+    chunks.append(compressor.flush())
+    return crc, chunks
+
+
+def _dos_datetime(modified_ms: int) -> Tuple[int, int]:
+    moment = time.gmtime(modified_ms / 1000)
+    year = max(moment.tm_year, 1980)
+    dos_time = (moment.tm_hour << 11) | (moment.tm_min << 5) | (moment.tm_sec // 2)
+    dos_date = ((year - 1980) << 9) | (moment.tm_mon << 5) | moment.tm_mday
+    return dos_time, dos_date
+
+
+class ZipStream:
+    """Produces a ZIP archive incrementally, one entry at a time, without temp files.
+
+    Every entry is written with a data descriptor so its local header can be sent
+    before the file has been read. When all entries are stored (the usual case for
+    photos) the archive layout and total size are known in advance, which lets
+    callers advertise ``Content-Length`` and serve byte ranges. ZIP64 structures
+    are emitted only for entries or offsets that need them.
+
+    With an ``executor``, deflated entries following the one being written are
+    compressed in parallel (zlib releases the GIL, so a thread pool is enough)
+    as long as their combined input fits in ``lookahead_bytes``; their output
+    is buffered until its turn. An entry too large for the budget is deflated
+    inline while it streams. Output is still produced strictly in entry order.
+
+    ``entries`` may also be a one-shot iterator whose entries are produced
+    while the archive is written (e.g. files rendered on demand); the
+    archive's size is then unknown and it can only be iterated once.
+    """
+
+    def __init__(
+        self,
+        entries: Iterable[ZipEntry],
+        *,
+        compress_level: int = 6,
+        executor: Optional[Executor] = None,
+        lookahead_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        self.entries: Iterable[ZipEntry] = entries if isinstance(entries, Iterator) else list(entries)
+        self.compress_level = compress_level
+        self.executor = executor
+        self.lookahead_bytes = lookahead_bytes
+
+    @property
+    def size(self) -> Optional[int]:
+        """Total archive size, or ``None`` when any entry is deflated or the entries are not known yet."""
+
+        if isinstance(self.entries, Iterator) or any(entry.compress for entry in self.entries):
+            return None
+        offset = 0
+        central_size = 0
+        for entry in self.entries:
+            name_length = len(entry.arcname.encode("utf-8"))
+            zip64 = self._needs_zip64(entry.size, offset)
+            offset += 30 + name_length + (20 if zip64 else 0)
+            offset += entry.size
+            offset += 24 if zip64 else 16
+            central_size += 46 + name_length + (28 if zip64 else 0)
+        return offset + central_size + self._end_size(offset, central_size)
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self.iter_range(0, None)
+
+    def iter_range(self, start: int, stop: Optional[int]) -> Iterator[bytes]:
+        """Yield the bytes in ``[start, stop)`` of the archive."""
+
+        position = 0
+        for chunk in self._generate():
+            chunk_end = position + len(chunk)
+            if stop is not None and position >= stop:
+                return
+            if chunk_end > start:
+                yield chunk[max(0, start - position) : None if stop is None else stop - position]
+            position = chunk_end
+
+    @staticmethod
+    def _needs_zip64(size: int, offset: int) -> bool:
+        return size >= _ZIP32_LIMIT or offset >= _ZIP32_LIMIT
+
+    def _end_size(self, central_offset: int, central_size: int) -> int:
+        needs_zip64 = (
+            len(self.entries) >= _ZIP16_LIMIT
+            or central_offset >= _ZIP32_LIMIT
+            or central_size >= _ZIP32_LIMIT
+        )
+        return 22 + (56 + 20 if needs_zip64 else 0)
+
+    def _generate(self) -> Iterator[bytes]:
+        upcoming = iter(self.entries)
+        window: Deque[_Lookahead] = deque()
+        try:
+            yield from self._generate_entries(upcoming, window)
+        finally:
+            for ahead in window:
+                if ahead.future is not None:
+                    ahead.future.cancel()
+            close = getattr(upcoming, "close", None)
+            if close is not None:
+                close()
+
+    def _schedule(self, upcoming: Iterator[ZipEntry], window: Deque[_Lookahead]) -> None:
+        """Top up ``window`` with the next entries, deflating ahead those that fit in the byte budget.
+
+        Entries are only pulled past the current one while everything before
+        them is being deflated ahead, so a lazy ``entries`` iterator is not
+        advanced further than the writer needs.
+        """
+
+        while True:
+            buffered = 0
+            for ahead in window:
+                if not ahead.entry.compress:
+                    continue
+                if ahead.future is None:
+                    if buffered and buffered + ahead.entry.size > self.lookahead_bytes:
+                        return
+                    if ahead.entry.size > self.lookahead_bytes:
+                        # Streamed inline when its turn comes rather than buffered whole.
+                        return
+                    ahead.future = self.executor.submit(_deflate, ahead.entry.path, self.compress_level)
+                buffered += ahead.entry.size
+            if window and (not window[-1].entry.compress or buffered >= self.lookahead_bytes):
+                return
+            entry = next(upcoming, None)
+            if entry is None:
+                return
+            window.append(_Lookahead(entry))
+
+    def _generate_entries(self, upcoming: Iterator[ZipEntry], window: Deque[_Lookahead]) -> Iterator[bytes]:
+        parallel = self.executor is not None
+        records: List[_Record] = []
+        offset = 0
+        while True:
+            if parallel:
+                self._schedule(upcoming, window)
+                ahead = window.popleft() if window else None
+            else:
+                entry = next(upcoming, None)
+                ahead = _Lookahead(entry) if entry is not None else None
+            if ahead is None:
+                break
+            entry = ahead.entry
+            record = _Record(
+                entry=entry,
+                name=entry.arcname.encode("utf-8"),
+                method=_METHOD_DEFLATED if entry.compress else _METHOD_STORED,
+                offset=offset,
+                # A deflated stream can exceed its input slightly, so leave headroom when deciding.
+                zip64=self._needs_zip64(entry.size + (entry.size >> 8) + 64 if entry.compress else entry.size, offset),
+            )
+            header = self._local_header(record)
+            yield header
+            offset += len(header)
+
+            if ahead.future is not None:
+                record.crc, chunks = ahead.future.result()
+                record.compressed_size = sum(len(chunk) for chunk in chunks)
+            else:
+                chunks = self._entry_data(record)
+            for chunk in chunks:
+                offset += len(chunk)
+                yield chunk
+            # Drop the buffered output before deflating further ahead.
+            del ahead, chunks
+
+            descriptor = self._data_descriptor(record)
+            yield descriptor
+            offset += len(descriptor)
+            records.append(record)
+
+        central_offset = offset
+        central_size = 0
+        for record in records:
+            header = self._central_header(record)
+            central_size += len(header)
+            yield header
+        yield self._end_records(len(records), central_offset, central_size)
+
+    def _entry_data(self, record: _Record) -> Iterator[bytes]:
+        crc = 0
+        compressor = (
+            zlib.compressobj(self.compress_level, zlib.DEFLATED, -15) if record.method == _METHOD_DEFLATED else None
+        )
+        with record.entry.path.open("rb") as source:
+            while chunk := source.read(READ_SIZE):
+                crc = zlib.crc32(chunk, crc)
+                if compressor is not None:
+                    chunk = compressor.compress(chunk)
+                    if not chunk:
+                        continue
+                record.compressed_size += len(chunk)
+                yield chunk
+        if compressor is not None:
+            tail = compressor.flush()
+            record.compressed_size += len(tail)
+            yield tail
+        record.crc = crc
+
+    @staticmethod
+    def _version(record: _Record) -> int:
+        return 45 if record.zip64 else 20
+
+    def _local_header(self, record: _Record) -> bytes:
+        dos_time, dos_date = _dos_datetime(record.entry.modified_ms)
+        extra = struct.pack("<HHQQ", 0x0001, 16, 0, 0) if record.zip64 else b""
+        placeholder = _ZIP32_LIMIT if record.zip64 else 0
+        return (
+            struct.pack(
+                "<IHHHHHIIIHH",
+                0x04034B50,
+                self._version(record),
+                _FLAG_DATA_DESCRIPTOR | _FLAG_UTF8,
+                record.method,
+                dos_time,
+                dos_date,
+                0,
+                placeholder,
+                placeholder,
+                len(record.name),
+                len(extra),
+            )
+            + record.name
+            + extra
+        )
+
+    @staticmethod
+    def _data_descriptor(record: _Record) -> bytes:
+        if record.zip64:
+            return struct.pack("<IIQQ", 0x08074B50, record.crc, record.compressed_size, record.entry.size)
+        return struct.pack("<IIII", 0x08074B50, record.crc, record.compressed_size, record.entry.size)
+
+    def _central_header(self, record: _Record) -> bytes:
+        dos_time, dos_date = _dos_datetime(record.entry.modified_ms)
+        if record.zip64:
+            extra = struct.pack("<HHQQQ", 0x0001, 24, record.entry.size, record.compressed_size, record.offset)
+            compressed_size = size = offset = _ZIP32_LIMIT
+        else:
+            extra = b""
+            compressed_size, size, offset = record.compressed_size, record.entry.size, record.offset
+        return (
+            struct.pack(
+                "<IHHHHHHIIIHHHHHII",
+                0x02014B50,
+                (3 << 8) | self._version(record),
+                self._version(record),
+                _FLAG_DATA_DESCRIPTOR | _FLAG_UTF8,
+                record.method,
+                dos_time,
+                dos_date,
+                record.crc,
+                compressed_size,
+                size,
+                len(record.name),
+                len(extra),
+                0,
+                0,
+                0,
+                0o100644 << 16,
+                offset,
+            )
+            + record.name
+            + extra
+        )
+
+    def _end_records(self, count: int, central_offset: int, central_size: int) -> bytes:
+        needs_zip64 = count >= _ZIP16_LIMIT or central_offset >= _ZIP32_LIMIT or central_size >= _ZIP32_LIMIT
+        trailer = b""
+        if needs_zip64:
+            zip64_end_offset = central_offset + central_size
+            trailer += struct.pack(
+                "<IQHHIIQQQQ", 0x06064B50, 44, 45, 45, 0, 0, count, count, central_size, central_offset
+            )
+            trailer += struct.pack("<IIQI", 0x07064B50, 0, zip64_end_offset, 1)
+        trailer += struct.pack(
+            "<IHHHHIIH",
+            0x06054B50,
+            0,
+            0,
+            min(count, _ZIP16_LIMIT),
+            min(count, _ZIP16_LIMIT),
+            min(central_size, _ZIP32_LIMIT),
+            min(central_offset, _ZIP32_LIMIT),
+            0,
+        )
+        return trailer
@@ -0,0 +1,299 @@
+"""Load-test the API's hot paths against a synthetic gallery.
+
+Seeds a throw-away SQLite database and uploads tree with ``--events`` events
+of ``--photos`` photos each (every original about ``--file-kb`` KB), starts
+the real FastAPI app in-process and drives it through httpx's ASGI transport
+with ``--concurrency`` requests in flight. Each scenario reports latency
+percentiles and throughput; ``--output`` writes them as JSON together with
+the run's configuration, so two runs can be compared directly.
+
+Seeded photos are inserted straight into the database, bypassing the
+processing queue, so only requests made by the scenarios load the image
+workers.
+
+Run from the ``lumina-portfolio`` folder (httpx is required)::
+
+    python -m benchmarks.api_bench [--events 5] [--photos 100] [--output before.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+from uuid import uuid4
+
+from PIL import Image
+
+SCENARIOS = ("list_events", "event_summaries", "list_event_photos", "all_photos", "search", "upload", "zip")
+# A JPEG comment segment holds at most this many payload bytes.
+_COM_LIMIT = 65533
+
+
+def _base_jpeg(seed: int) -> bytes:
+    rng = random.Random(seed)
+    image = Image.effect_noise((640, 480), 48).convert("RGB")
+    tint = Image.new("RGB", image.size, tuple(rng.randrange(256) for _ in range(3)))
+    buffer = io.BytesIO()
+    Image.blend(image, tint, 0.5).save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def _padded_jpeg(base: bytes, target_size: int, tag: str) -> bytes:
+    """Grow ``base`` to about ``target_size`` bytes with comment segments; ``tag`` makes the bytes unique."""
+
+    segments = []
+    remaining = max(len(tag), target_size - len(base))
+    payload = tag.encode()
+    while remaining > 0:
+        chunk = payload[:_COM_LIMIT] if payload else b"\0" * min(remaining, _COM_LIMIT)
+        payload = payload[len(chunk) :]
+        segments.append(b"\xff\xfe" + (len(chunk) + 2).to_bytes(2, "big") + chunk)
+        remaining -= len(chunk) + 4
+    return base[:2] + b"".join(segments) + base[2:]
+
+
+def _seed(args: argparse.Namespace) -> Dict[str, object]:
+    """Write events, blobs and photo rows directly; returns a summary of what was created."""
+
+    from sqlalchemy import insert
+    from sqlmodel import Session
+
+    from backend import storage
+    from backend.config import get_settings
+    from backend.database import engine, init_db
+    from backend.models import Blob, Event, Photo, timestamp_ms
+
+    started = time.perf_counter()
+    settings = get_settings()
+    init_db()
+    base = _base_jpeg(args.seed)
+    width, height = Image.open(io.BytesIO(base)).size
+    rng = random.Random(args.seed)
+    now = timestamp_ms()
+    total_bytes = 0
+    slugs = []
+
+    with Session(engine) as session:
+        for event_index in range(args.events):
+            event = Event(
+                title=f"Benchmark event {event_index}",
+                slug=f"bench-{event_index}",
+                date=date(2024, 1, 1) + timedelta(days=event_index),
+            )
+            session.add(event)
+            session.flush()
+            slugs.append(event.slug)
+            blobs, photos = [], []
+            for photo_index in range(args.photos):
+                data = _padded_jpeg(base, args.file_kb * 1024, f"{event_index}:{photo_index}")
+                digest = hashlib.sha256(data).hexdigest()
+                filename = f"{digest}.jpg"
+                directory = storage.blob_dir(settings, digest)
+                directory.mkdir(parents=True, exist_ok=True)
+                (directory / filename).write_bytes(data)
+                total_bytes += len(data)
+                uploaded_at = now - rng.randrange(90 * 24 * 3600 * 1000)
+                captured_at = uploaded_at - rng.randrange(3600 * 1000) if rng.random() < 0.7 else None
+                common = {"filename": filename, "content_type": "image/jpeg", "width": width, "height": height, "size": len(data)}
+                blobs.append({"digest": digest, "ref_count": 1, "created_at": uploaded_at, "captured_at": captured_at, **common})
+                photos.append(
+                    {
+                        "id": uuid4(),
+                        "event_id": event.id,
+                        "event_slug": event.slug,
+                        "name": f"IMG_{photo_index:05d}.jpg",
+                        "content_hash": digest,
+                        "uploaded_at": uploaded_at,
+                        "captured_at": captured_at,
+                        "camera_model": rng.choice(("R5", "R6", "Z8", None)),
+                        "is_favorite": rng.random() < 0.1,
+                        **common,
+                    }
+                )
+            if blobs:
+                session.execute(insert(Blob), blobs)
+                session.execute(insert(Photo), photos)
+        upload_event = Event(title="Benchmark uploads", slug="bench-uploads", date=date(2024, 1, 1))
+        session.add(upload_event)
+        session.commit()
+        upload_event_id = str(upload_event.id)
+
+    return {
+        "events": args.events,
+        "photos": args.events * args.photos,
+        "bytes": total_bytes,
+        "seconds": round(time.perf_counter() - started, 3),
+        "slugs": slugs,
+        "upload_event_id": upload_event_id,
+        "base": base,
+    }
+
+
+def _summarize(latencies: List[float], errors: int, wall: float, transferred: int) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    cuts = statistics.quantiles(ordered, n=100, method="inclusive") if len(ordered) > 1 else ordered * 99
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / wall, 2) if wall else 0.0,
+        "mean_ms": round(statistics.fmean(ordered) * 1e3, 3),
+        "p50_ms": round(cuts[49] * 1e3, 3),
+        "p90_ms": round(cuts[89] * 1e3, 3),
+        "p95_ms": round(cuts[94] * 1e3, 3),
+        "p99_ms": round(cuts[98] * 1e3, 3),
+        "max_ms": round(ordered[-1] * 1e3, 3),
+        "mean_response_bytes": round(transferred / len(ordered)),
+    }
+
+
+async def _measure(
+    request: Callable[[int], Awaitable["httpx.Response"]], *, count: int, concurrency: int, warmup: int
+) -> Dict[str, float]:
+    for index in range(warmup):
+        await request(-1 - index)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+    transferred = 0
+
+    async def one(index: int) -> None:
+        nonlocal errors, transferred
+        async with semaphore:
+            start = time.perf_counter()
+            response = await request(index)
+            latencies.append(time.perf_counter() - start)
+        transferred += len(response.content)
+        if response.status_code >= 400:
+            errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(count)))
+    return _summarize(latencies, errors, time.perf_counter() - started, transferred)
+
+
+async def _run(args: argparse.Namespace, seeded: Dict[str, object]) -> Dict[str, Dict[str, float]]:
+    import httpx
+
+    from backend.main import app
+
+    headers = {"x-admin-password": os.environ.get("ADMIN_PASSWORD", "admin")}
+    slugs: List[str] = seeded["slugs"]  # type: ignore[assignment]
+    rng = random.Random(args.seed)
+    page = f"?limit={args.page_size}" if args.page_size else ""
+    upload_size = args.file_kb * 1024
+
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+
+            def upload(index: int) -> Awaitable[httpx.Response]:
+                files = [
+                    ("files", (f"upload-{index}-{n}.jpg", _padded_jpeg(seeded["base"], upload_size, f"upload:{index}:{n}:{time.time_ns()}"), "image/jpeg"))
+                    for n in range(args.upload_files)
+                ]
+                return client.post(f"/api/events/{seeded['upload_event_id']}/photos", files=files, headers=headers)
+
+            requests: Dict[str, Callable[[int], Awaitable[httpx.Response]]] = {
+                "list_events": lambda index: client.get("/api/events"),
+                "event_summaries": lambda index: client.get("/api/events/summary"),
+                "list_event_photos": lambda index: client.get(f"/api/events/{rng.choice(slugs)}/photos{page}"),
+                "all_photos": lambda index: client.get(f"/api/photos{page}"),
+                "search": lambda index: client.get("/api/search", params={"q": f"IMG_{rng.randrange(args.photos or 1):03d}"}),
+                "upload": upload,
+                "zip": lambda index: client.get(f"/api/events/{rng.choice(slugs)}/zip"),
+            }
+            heavy = {"upload", "zip"}
+            results = {}
+            for name in args.scenarios:
+                if name in ("list_event_photos", "zip") and not slugs:
+                    continue
+                count = args.heavy_requests if name in heavy else args.requests
+                results[name] = await _measure(requests[name], count=count, concurrency=args.concurrency, warmup=args.warmup)
+                row = results[name]
+                print(
+                    f"{name:<20}{row['requests']:>6}{row['errors']:>6}{row['throughput_rps']:>10.1f}"
+                    f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}{row['max_ms']:>10.2f}"
+                )
+            return results
+    finally:
+        await app.router.shutdown()
+
+
+def _revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5)
+    parser.add_argument("--photos", type=int, default=100, help="photos per event")
+    parser.add_argument("--file-kb", type=int, default=200, help="approximate size of each original")
+    parser.add_argument("--requests", type=int, default=200, help="requests per listing scenario")
+    parser.add_argument("--heavy-requests", type=int, default=10, help="requests for the upload and zip scenarios")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--page-size", type=int, default=0, help="limit for the listing scenarios; 0 lists everything")
+    parser.add_argument("--upload-files", type=int, default=1, help="files per upload request")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--database-profile", choices=("default", "production"), default="default")
+    parser.add_argument("--no-read-cache", action="store_true", help="build every listing from the database instead of the read cache")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workdir", type=Path, help="keep the seeded data here instead of a temporary folder")
+    parser.add_argument("--output", type=Path, help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="lumina-bench-") as scratch:
+        workdir = args.workdir or Path(scratch)
+        workdir.mkdir(parents=True, exist_ok=True)
+        # Settings are read once on import, so the environment must point at the scratch tree first.
+        os.environ.update(
+            DATABASE_URL=f"sqlite:///{(workdir / 'bench.db').as_posix()}",
+            DATABASE_PROFILE=args.database_profile,
+            UPLOADS_DIR=str(workdir / "uploads"),
+            ARCHIVE_CACHE_DIR=str(workdir / "archives"),
+            WATERMARK_CACHE_DIR=str(workdir / "watermarks"),
+            VARIANT_CACHE_DIR=str(workdir / "variants"),
+            FRONTEND_DIST=str(workdir / "no-frontend"),
+        )
+        if args.no_read_cache:
+            os.environ["READ_CACHE_TTL"] = "0"
+        seeded = _seed(args)
+        print(f"seeded {seeded['photos']} photos in {seeded['events']} events ({seeded['bytes'] / 1024**2:.1f} MB) in {seeded['seconds']} s")
+        print(f"{'scenario':<20}{'reqs':>6}{'errs':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        results = asyncio.run(_run(args, seeded))
+
+    if args.output:
+        report = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "revision": _revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "config": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items() if key != "output"},
+            "seed": {key: seeded[key] for key in ("events", "photos", "bytes", "seconds")},
+            "scenarios": results,
+        }
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Compare header-only probing against opening each file with Pillow.
+
+The first table times the parsers alone. The second times a batch upload
+the way the API runs it: the previous path sent every file to the image
+worker pool, while ``probe_image`` parses headers in a thread and only
+falls back to the pool for unknown formats.
+
+Run from the ``lumina-portfolio`` folder::
+
+    python -m benchmarks.probe_bench [--repeat 200] [FILE ...]
+
+Without files, sample images are generated in a temporary folder for every
+format the local Pillow build can write.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from PIL import Image
+
+from backend.image_worker import ImageWorkerPool
+from backend.probe import pillow_dimensions, probe_image, read_dimensions
+
+SAMPLE_SIZE = (6000, 4000)
+SAMPLE_FORMATS = {"jpeg": ".jpg", "png": ".png", "webp": ".webp", "heif": ".heic", "avif": ".avif"}
+
+
+def _generate_samples(directory: Path) -> List[Path]:
+    image = Image.linear_gradient("L").resize(SAMPLE_SIZE).convert("RGB")
+    exif = Image.Exif()
+    exif[0x010F] = "Benchmark"
+    # A large APP1 segment pushes the JPEG frame header well past the first few KB.
+    exif[0x927C] = b"\0" * 60000
+    samples = []
+    for image_format, extension in SAMPLE_FORMATS.items():
+        path = directory / f"sample{extension}"
+        try:
+            kwargs = {"exif": exif.tobytes()} if image_format == "jpeg" else {}
+            image.save(path, format=image_format.upper(), **kwargs)
+        except (KeyError, OSError, ValueError):
+            print(f"skipping {image_format}: not supported by this Pillow build")
+            continue
+        samples.append(path)
+    return samples
+
+
+def _time(fn: Callable[[Path], object], path: Path, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(path)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e6
+
+
+async def _batch(files: List[Path], batches: int) -> None:
+    pool = ImageWorkerPool(max_workers=2, max_pending=len(files) * 2, queue_timeout=60)
+    pool.start()
+    try:
+        await asyncio.gather(*(pool.run(pillow_dimensions, path) for path in files))  # warm up the workers
+        for label, probe in (
+            ("pool + Pillow (previous)", lambda path: pool.run(pillow_dimensions, path)),
+            ("probe_image", lambda path: probe_image(pool, path, max_pixels=None)),
+        ):
+            timings = []
+            for _ in range(batches):
+                start = time.perf_counter()
+                await asyncio.gather(*(probe(path) for path in files))
+                timings.append(time.perf_counter() - start)
+            print(f"{label:<28}{statistics.median(timings) * 1e3:>10.2f} ms per batch of {len(files)}")
+    finally:
+        pool.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", type=Path)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        files = args.files or _generate_samples(Path(scratch))
+        print(f"{'file':<28}{'header µs':>12}{'pillow µs':>12}{'speedup':>10}  size")
+        for path in files:
+            header = read_dimensions(path)
+            pillow = pillow_dimensions(path)
+            if header is not None and header != pillow:
+                print(f"{path.name:<28}MISMATCH header={header} pillow={pillow}")
+                continue
+            pillow_us = _time(pillow_dimensions, path, args.repeat)
+            if header is None:
+                print(f"{path.name:<28}{'fallback':>12}{pillow_us:>12.1f}{'-':>10}  {pillow}")
+                continue
+            header_us = _time(read_dimensions, path, args.repeat)
+            print(f"{path.name:<28}{header_us:>12.1f}{pillow_us:>12.1f}{pillow_us / header_us:>9.1f}x  {header}")
+
+        print()
+        asyncio.run(_batch(list(files) * 10, max(1, args.repeat // 10)))
+
+
+if __name__ == "__main__":
+    main()
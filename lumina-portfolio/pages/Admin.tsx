@@ -1,11 +1,13 @@
 import React, { useState, useRef, useEffect } from 'react';
 import { Routes, Route, Link, useNavigate, useParams } from 'react-router-dom';
 import { useAppStore } from '../App';
-import { Plus, Trash2, Upload, ExternalLink, Sparkles, AlertTriangle, Copyright, Star, CheckSquare, Square } from 'lucide-react';
+import { Plus, Trash2, Upload, ExternalLink, Sparkles, AlertTriangle, Copyright, Star, CheckSquare, Square, Loader2 } from 'lucide-react';
 import { generateEventDescription } from '../services/geminiService';
-import { Event, UploadProgress } from '../types';
+import { getJobStats } from '../services/db';
+import { Event, JobStats, UploadProgress } from '../types';
 
 const ADMIN_PASSCODE = 'admin';
+const JOB_POLL_INTERVAL_MS = 2000;
 
 // --- Components for Admin Section ---
 
@@ -221,7 +223,7 @@ const CreateEventModal: React.FC<{ onClose: () => void }> = ({ onClose }) => {
                 />
                 <Copyright className="w-4 h-4 text-secondary absolute left-3 top-2.5" />
             </div>
-            <p className="text-[10px] text-secondary mt-1">This text will be overlayed on all photos in this gallery.</p>
+            <p className="text-[10px] text-secondary mt-1">The server stamps this text on every image it delivers from this gallery.</p>
           </div>
           <div>
             <div className="flex justify-between items-center mb-1">
@@ -262,16 +264,56 @@ const CreateEventModal: React.FC<{ onClose: () => void }> = ({ onClose }) => {
 
 const EventManager: React.FC = () => {
   const { id } = useParams<{ id: string }>();
-  const { events, photos, addPhotos, deletePhoto, deletePhotos, setCoverPhoto } = useAppStore();
+  const { events, photos, loadEventPhotos, addPhotos, deletePhoto, deletePhotos, setCoverPhoto, setWatermark } = useAppStore();
   const fileInputRef = useRef<HTMLInputElement>(null);
   const [uploadStatus, setUploadStatus] = useState<UploadProgress | null>(null);
   const [isUploading, setIsUploading] = useState(false);
   const [selectedPhotoIds, setSelectedPhotoIds] = useState<Set<string>>(new Set());
   const [isBulkDeleting, setIsBulkDeleting] = useState(false);
+  const [jobStats, setJobStats] = useState<JobStats | null>(null);
+  const [isWatchingJobs, setIsWatchingJobs] = useState(true);
+  const [watermarkDraft, setWatermarkDraft] = useState('');
+  const [isSavingWatermark, setIsSavingWatermark] = useState(false);
 
   const event = events.find(e => e.id === id);
   const eventPhotos = photos.filter(p => p.eventId === id);
 
+  useEffect(() => {
+    setWatermarkDraft(event?.watermarkText ?? '');
+  }, [event?.id, event?.watermarkText]);
+
+  useEffect(() => {
+    if (event) loadEventPhotos(event.slug).catch(err => console.error('Failed to load photos', err));
+  }, [event?.slug, loadEventPhotos]);
+
+  // Follow background processing (renditions, metadata, placeholders) until the event's queue drains.
+  useEffect(() => {
+    if (!event || !isWatchingJobs) return;
+    let cancelled = false;
+    let timer: ReturnType<typeof setTimeout> | undefined;
+    const poll = async () => {
+      try {
+        const stats = await getJobStats(event.id);
+        if (cancelled) return;
+        setJobStats(stats);
+        if (stats.queued + stats.running > 0) {
+          timer = setTimeout(poll, JOB_POLL_INTERVAL_MS);
+          return;
+        }
+        setIsWatchingJobs(false);
+        await loadEventPhotos(event.slug);
+      } catch (err) {
+        console.error('Failed to load processing status', err);
+        if (!cancelled) setIsWatchingJobs(false);
+      }
+    };
+    poll();
+    return () => {
+      cancelled = true;
+      if (timer) clearTimeout(timer);
+    };
+  }, [event?.id, event?.slug, isWatchingJobs, loadEventPhotos]);
+
   useEffect(() => {
     setSelectedPhotoIds(prev => {
       const valid = new Set(eventPhotos.map(photo => photo.id));
@@ -357,6 +399,21 @@ const EventManager: React.FC = () => {
 
   if (!event) return <div>Event not found</div>;
 
+  const watermarkChanged = watermarkDraft.trim() !== (event.watermarkText ?? '');
+
+  const handleWatermarkSave = async (e: React.FormEvent) => {
+    e.preventDefault();
+    setIsSavingWatermark(true);
+    try {
+      await setWatermark(event.id, watermarkDraft.trim() || null);
+    } catch (error) {
+      console.error('Failed to update watermark', error);
+      alert('Could not update the watermark. Please try again.');
+    } finally {
+      setIsSavingWatermark(false);
+    }
+  };
+
   const handleFileChange = async (e: React.ChangeEvent<HTMLInputElement>) => {
     const selectedFiles = e.target.files ? Array.from(e.target.files) : [];
     if (!selectedFiles.length) return;
@@ -366,6 +423,7 @@ const EventManager: React.FC = () => {
        await addPhotos(event.id, selectedFiles, (progress) => {
          setUploadStatus(progress);
        });
+       setIsWatchingJobs(true);
     } catch (error) {
        console.error('Failed to upload photos', error);
        alert('Upload failed. Please try again.');
@@ -387,11 +445,31 @@ const EventManager: React.FC = () => {
           <p className="text-xs uppercase tracking-[0.4em] text-secondary">Managing</p>
           <h1 className="text-3xl font-display font-semibold">{event.title}</h1>
           <p className="text-secondary text-sm">/event/{event.slug}</p>
-          {event.watermarkText && (
-            <p className="text-xs text-accent mt-2 flex items-center gap-1">
-              <Copyright className="w-3 h-3" /> Watermark: {event.watermarkText}
+          <form onSubmit={handleWatermarkSave} className="pt-2 space-y-1">
+            <label className="block text-xs font-medium text-secondary uppercase">Watermark Text</label>
+            <div className="flex gap-2">
+              <div className="relative flex-1">
+                <input
+                  type="text"
+                  value={watermarkDraft}
+                  onChange={e => setWatermarkDraft(e.target.value)}
+                  className="w-full bg-background border border-primary/10 rounded-lg px-3 py-2 pl-9 text-sm text-primary focus:outline-none focus:border-accent"
+                  placeholder="No watermark"
+                />
+                <Copyright className="w-4 h-4 text-secondary absolute left-3 top-2.5" />
+              </div>
+              <button
+                type="submit"
+                disabled={!watermarkChanged || isSavingWatermark}
+                className="inline-flex items-center gap-2 px-4 py-2 rounded-lg bg-primary text-background text-sm font-semibold hover:opacity-90 transition disabled:opacity-50"
+              >
+                {isSavingWatermark && <Loader2 className="w-4 h-4 animate-spin" />} Save
+              </button>
+            </div>
+            <p className="text-[10px] text-secondary">
+              Stamped by the server on every image it delivers from this gallery. Leave empty to remove it.
             </p>
-          )}
+          </form>
         </div>
         <div className="glass-panel rounded-2xl p-4 space-y-3 border border-primary/10">
           <input
@@ -418,6 +496,7 @@ const EventManager: React.FC = () => {
             )}
           </button>
           {uploadStatus && <UploadProgressCard status={uploadStatus} />}
+          {jobStats && (isWatchingJobs || jobStats.failed > 0) && <ProcessingCard stats={jobStats} />}
         </div>
       </div>
 
@@ -497,12 +576,7 @@ const EventManager: React.FC = () => {
                   >
                     {isSelected ? <CheckSquare className="w-4 h-4" /> : <Square className="w-4 h-4" />}
                   </button>
-                  <img src={photo.url} className="w-full h-auto object-cover block" loading="lazy" />
-                  {event.watermarkText && (
-                    <div className="absolute bottom-2 right-3 text-[10px] text-white/60 font-bold pointer-events-none select-none drop-shadow-md">
-                      {event.watermarkText}
-                    </div>
-                  )}
+                  <img src={photo.thumbnailUrl} className="w-full h-auto object-cover block" loading="lazy" />
                   <div className="absolute inset-0 bg-black/60 opacity-0 group-hover:opacity-100 transition-opacity flex flex-col items-center justify-center gap-2 p-2">
                     <button
                       onClick={() => setCoverPhoto(event.id, photo.id)}
@@ -576,6 +650,34 @@ const UploadProgressCard: React.FC<{ status: UploadProgress }> = ({ status }) =>
   );
 };
 
+const ProcessingCard: React.FC<{ stats: JobStats }> = ({ stats }) => {
+  const pending = stats.queued + stats.running;
+  const total = pending + stats.done + stats.failed;
+  const percent = total ? Math.min(((stats.done + stats.failed) / total) * 100, 100) : 100;
+  return (
+    <div className="text-xs text-secondary bg-primary/5 border border-primary/10 rounded-2xl p-4 space-y-2">
+      <div className="flex items-center justify-between">
+        <span className="flex items-center gap-1">
+          {pending > 0 && <Loader2 className="w-3 h-3 animate-spin" />}
+          {pending > 0 ? `Processing ${pending} photo${pending > 1 ? 's' : ''}` : 'Processing finished'}
+        </span>
+        <span>{stats.done}/{total} ready</span>
+      </div>
+      {stats.failed > 0 && (
+        <p className="flex items-center gap-1 text-red-500">
+          <AlertTriangle className="w-3 h-3" /> {stats.failed} failed to process
+        </p>
+      )}
+      <div className="h-1.5 bg-primary/10 rounded-full overflow-hidden">
+        <div
+          className="h-full bg-primary transition-all duration-300"
+          style={{ width: `${percent}%` }}
+        />
+      </div>
+    </div>
+  );
+};
+
 export const Admin: React.FC = () => {
   const [isAuthenticated, setIsAuthenticated] = useState(false);
 
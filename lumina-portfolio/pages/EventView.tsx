@@ -1,18 +1,34 @@
-import React, { useMemo, useState } from 'react';
+import React, { useEffect, useMemo, useState } from 'react';
 import { useParams, Link } from 'react-router-dom';
 import { useAppStore } from '../App';
 import { Download, X, ChevronLeft, ChevronRight, Calendar, ZoomIn, Loader2, Heart, Sparkles } from 'lucide-react';
 import { Photo } from '../types';
 import { API_URL } from '../services/db';
+import { blurhashToDataUrl } from '../services/blurhash';
+
+// Paint the grid from the listing alone: dominant colour first, then the decoded blurhash behind the lazy image.
+const placeholderStyle = (photo: Photo): React.CSSProperties => {
+  const aspectRatio = photo.width && photo.height ? photo.width / photo.height : 1;
+  const blur = photo.blurhash ? blurhashToDataUrl(photo.blurhash, aspectRatio) : null;
+  return {
+    backgroundColor: photo.dominantColor,
+    backgroundImage: blur ? `url(${blur})` : undefined,
+    backgroundSize: 'cover',
+  };
+};
 
 export const EventView: React.FC = () => {
   const { slug } = useParams<{ slug: string }>();
-  const { events, photos, loading, togglePhotoFavorite } = useAppStore();
+  const { events, photos, loading, loadEventPhotos, togglePhotoFavorite } = useAppStore();
   const [lightboxIndex, setLightboxIndex] = useState<number | null>(null);
   const [isZipping, setIsZipping] = useState(false);
 
   const event = events.find(e => e.slug === slug);
-  
+
+  useEffect(() => {
+    if (event) loadEventPhotos(event.slug).catch(err => console.error('Failed to load photos', err));
+  }, [event?.slug, loadEventPhotos]);
+
   const eventPhotos = useMemo(() => {
     if (!event) return [];
     return photos.filter(p => p.eventId === event.id);
@@ -50,12 +66,12 @@ export const EventView: React.FC = () => {
     }
   };
 
-  const downloadAll = async () => {
-    if (!event || eventPhotos.length === 0) return;
+  const downloadArchive = async (path: string, filename: string) => {
+    if (!event) return;
     setIsZipping(true);
 
     try {
-      const response = await fetch(`${API_URL}/events/${event.slug}/zip`);
+      const response = await fetch(`${API_URL}/events/${event.slug}/${path}`);
       if (!response.ok) {
         throw new Error('Failed to download album');
       }
@@ -64,7 +80,7 @@ export const EventView: React.FC = () => {
       const url = window.URL.createObjectURL(blob);
       const a = document.createElement('a');
       a.href = url;
-      a.download = `${event.slug}-album.zip`;
+      a.download = filename;
       document.body.appendChild(a);
       a.click();
       window.URL.revokeObjectURL(url);
@@ -77,6 +93,16 @@ export const EventView: React.FC = () => {
     }
   };
 
+  const downloadAll = () => {
+    if (!event || eventPhotos.length === 0) return;
+    return downloadArchive('zip', `${event.slug}-album.zip`);
+  };
+
+  const downloadFavorites = () => {
+    if (!event || favoritePhotos.length === 0) return;
+    return downloadArchive('archive?favorites=true', `${event.slug}-favorites.zip`);
+  };
+
   const handleFavoriteToggle = async (photo: Photo, nextState?: boolean) => {
     await togglePhotoFavorite(photo.id, nextState ?? !photo.isFavorite);
   };
@@ -89,9 +115,14 @@ export const EventView: React.FC = () => {
         key={photo.id}
         className="group relative mb-5 break-inside-avoid rounded-[26px] overflow-hidden border border-primary/10 bg-surface cursor-zoom-in shadow-xl shadow-black/5"
         onClick={() => openLightbox(photoIndex)}
+        style={placeholderStyle(photo)}
       >
         <img
-          src={photo.url}
+          src={photo.thumbnailUrl}
+          width={photo.width}
+          height={photo.height}
+          srcSet={`${photo.thumbnailUrl} 480w, ${photo.webUrl} 2000w`}
+          sizes="(min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw"
           alt={photo.name}
           className="w-full h-auto object-cover transition-transform duration-500 group-hover:scale-[1.03]"
           loading="lazy"
@@ -110,11 +141,6 @@ export const EventView: React.FC = () => {
         >
           <Heart className="w-4 h-4" fill={photo.isFavorite ? 'currentColor' : 'none'} />
         </button>
-        {event.watermarkText && (
-          <div className="absolute bottom-2 right-2 text-[10px] text-white/70 font-bold pointer-events-none select-none drop-shadow-md z-10">
-            {event.watermarkText}
-          </div>
-        )}
         <div className="absolute inset-0 bg-black/0 group-hover:bg-black/20 transition-colors" />
         <div className="absolute inset-0 flex items-center justify-center opacity-0 group-hover:opacity-100 transition-opacity">
           <ZoomIn className="w-8 h-8 text-white drop-shadow-lg" />
@@ -148,6 +174,16 @@ export const EventView: React.FC = () => {
                     {isZipping ? 'Bundling...' : 'Download full set'}
                   </button>
                 )}
+                {favoritePhotos.length > 0 && (
+                  <button
+                    onClick={downloadFavorites}
+                    disabled={isZipping}
+                    className="inline-flex items-center gap-2 px-5 py-3 rounded-2xl border border-primary/10 text-sm font-semibold disabled:opacity-50"
+                  >
+                    <Heart className="w-4 h-4 text-accent" />
+                    Download favorites
+                  </button>
+                )}
                 <Link
                   to="/"
                   className="inline-flex items-center gap-2 px-5 py-3 rounded-2xl border border-primary/10 text-sm font-semibold"
@@ -246,15 +282,10 @@ export const EventView: React.FC = () => {
             <div className="w-full h-full p-4 md:p-12 flex flex-col items-center justify-center relative">
                 <div className="relative max-w-full max-h-[85vh]">
                     <img 
-                        src={eventPhotos[lightboxIndex].url} 
+                        src={eventPhotos[lightboxIndex].webUrl} 
                         alt="Lightbox view" 
                         className="max-w-full max-h-[85vh] object-contain shadow-2xl rounded-sm"
                     />
-                    {event.watermarkText && (
-                        <div className="absolute bottom-4 right-4 text-sm text-white/50 font-bold pointer-events-none select-none drop-shadow-lg">
-                            {event.watermarkText}
-                        </div>
-                    )}
                 </div>
                  {/* Caption & Info */}
                 <div className="mt-4 flex items-center gap-4 text-center">
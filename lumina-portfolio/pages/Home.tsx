@@ -4,8 +4,9 @@ import { useAppStore } from '../App';
 import { Calendar, ArrowRight, Image as ImageIcon, Sparkles, Star, Camera } from 'lucide-react';
 
 export const Home: React.FC = () => {
-  const { events, photos, loading } = useAppStore();
-  const totalFavorites = photos.filter((p) => p.isFavorite).length;
+  const { events, loading } = useAppStore();
+  const totalPhotos = events.reduce((sum, event) => sum + event.photoCount, 0);
+  const totalFavorites = events.reduce((sum, event) => sum + event.favoriteCount, 0);
 
   if (loading) {
     return (
@@ -15,13 +16,6 @@ export const Home: React.FC = () => {
     );
   }
 
-  const getCoverPhoto = (event: any) => {
-    if (event.coverPhotoId) {
-      return photos.find((p) => p.id === event.coverPhotoId)?.url;
-    }
-    return photos.find((p) => p.eventId === event.id)?.url;
-  };
-
   return (
     <div className="max-w-6xl mx-auto px-4 sm:px-6 lg:px-8 py-12 space-y-16">
       <section className="grid lg:grid-cols-[1.2fr_0.8fr] gap-10 items-center aurora-wrap">
@@ -57,7 +51,7 @@ export const Home: React.FC = () => {
               <p className="text-xs uppercase tracking-wider text-secondary">Events</p>
             </div>
             <div className="glass-panel py-4 rounded-2xl">
-              <p className="text-3xl font-display font-semibold">{photos.length}</p>
+              <p className="text-3xl font-display font-semibold">{totalPhotos}</p>
               <p className="text-xs uppercase tracking-wider text-secondary">Photographs</p>
             </div>
             <div className="glass-panel py-4 rounded-2xl">
@@ -115,7 +109,7 @@ export const Home: React.FC = () => {
         ) : (
           <div className="grid grid-cols-1 md:grid-cols-2 gap-8">
             {events.map((event) => {
-              const coverUrl = getCoverPhoto(event);
+              const coverUrl = event.coverUrl;
               return (
                 <Link
                   key={event.id}
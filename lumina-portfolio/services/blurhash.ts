@@ -0,0 +1,84 @@
+const BASE83 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~';
+const SIZE = 32;
+
+const cache = new Map<string, string>();
+
+const decode83 = (value: string): number => {
+  let result = 0;
+  for (const char of value) {
+    result = result * 83 + BASE83.indexOf(char);
+  }
+  return result;
+};
+
+const srgbToLinear = (value: number): number => {
+  const v = value / 255;
+  return v <= 0.04045 ? v / 12.92 : Math.pow((v + 0.055) / 1.055, 2.4);
+};
+
+const linearToSrgb = (value: number): number => {
+  const v = Math.max(0, Math.min(1, value));
+  return v <= 0.0031308 ? Math.round(v * 12.92 * 255) : Math.round((1.055 * Math.pow(v, 1 / 2.4) - 0.055) * 255);
+};
+
+const signPow = (value: number, exponent: number): number => Math.sign(value) * Math.pow(Math.abs(value), exponent);
+
+/** Decode a blurhash into a small PNG data URL, or null when it is malformed or there is no canvas. */
+export const blurhashToDataUrl = (hash: string, aspectRatio = 1): string | null => {
+  const key = `${hash}:${aspectRatio.toFixed(2)}`;
+  const cached = cache.get(key);
+  if (cached) return cached;
+  if (hash.length < 6 || typeof document === 'undefined') return null;
+
+  const sizeFlag = decode83(hash[0]);
+  const componentsX = (sizeFlag % 9) + 1;
+  const componentsY = Math.floor(sizeFlag / 9) + 1;
+  if (hash.length !== 4 + 2 * componentsX * componentsY) return null;
+
+  const maximum = (decode83(hash[1]) + 1) / 166;
+  const colors: [number, number, number][] = [];
+  const dc = decode83(hash.slice(2, 6));
+  colors.push([srgbToLinear(dc >> 16), srgbToLinear((dc >> 8) & 255), srgbToLinear(dc & 255)]);
+  for (let i = 1; i < componentsX * componentsY; i += 1) {
+    const value = decode83(hash.slice(4 + i * 2, 6 + i * 2));
+    colors.push([
+      signPow((Math.floor(value / (19 * 19)) - 9) / 9, 2) * maximum,
+      signPow((Math.floor(value / 19) % 19 - 9) / 9, 2) * maximum,
+      signPow((value % 19 - 9) / 9, 2) * maximum,
+    ]);
+  }
+
+  const width = aspectRatio >= 1 ? SIZE : Math.max(1, Math.round(SIZE * aspectRatio));
+  const height = aspectRatio >= 1 ? Math.max(1, Math.round(SIZE / aspectRatio)) : SIZE;
+  const canvas = document.createElement('canvas');
+  canvas.width = width;
+  canvas.height = height;
+  const context = canvas.getContext('2d');
+  if (!context) return null;
+  const image = context.createImageData(width, height);
+  for (let y = 0; y < height; y += 1) {
+    for (let x = 0; x < width; x += 1) {
+      let r = 0;
+      let g = 0;
+      let b = 0;
+      for (let j = 0; j < componentsY; j += 1) {
+        for (let i = 0; i < componentsX; i += 1) {
+          const basis = Math.cos((Math.PI * x * i) / width) * Math.cos((Math.PI * y * j) / height);
+          const color = colors[i + j * componentsX];
+          r += color[0] * basis;
+          g += color[1] * basis;
+          b += color[2] * basis;
+        }
+      }
+      const offset = 4 * (x + y * width);
+      image.data[offset] = linearToSrgb(r);
+      image.data[offset + 1] = linearToSrgb(g);
+      image.data[offset + 2] = linearToSrgb(b);
+      image.data[offset + 3] = 255;
+    }
+  }
+  context.putImageData(image, 0, 0);
+  const url = canvas.toDataURL('image/png');
+  cache.set(key, url);
+  return url;
+};
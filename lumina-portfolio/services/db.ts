@@ -1,4 +1,4 @@
-import { Event, Photo } from '../types';
+import { Event, EventSummary, JobStats, Photo } from '../types';
 
 const DEFAULT_API_URL = import.meta.env.DEV ? 'http://localhost:8000/api' : '/api';
 export const API_URL = import.meta.env.VITE_API_URL ?? DEFAULT_API_URL;
@@ -19,9 +19,13 @@ const toJson = async <T>(response: Response): Promise<T> => {
 
 type EventPayload = Omit<Event, 'id' | 'createdAt' | 'coverPhotoId'>;
 
+const toAssetUrl = (url: string): string => (url.startsWith('http') ? url : `${API_ORIGIN}${url}`);
+
 const withAssetUrl = (photo: Photo): Photo => ({
   ...photo,
-  url: photo.url.startsWith('http') ? photo.url : `${API_ORIGIN}${photo.url}`,
+  url: toAssetUrl(photo.url),
+  thumbnailUrl: toAssetUrl(photo.thumbnailUrl ?? photo.url),
+  webUrl: toAssetUrl(photo.webUrl ?? photo.url),
 });
 
 export const getEvents = async (): Promise<Event[]> => {
@@ -29,6 +33,12 @@ export const getEvents = async (): Promise<Event[]> => {
   return toJson<Event[]>(res);
 };
 
+export const getEventSummaries = async (): Promise<EventSummary[]> => {
+  const res = await fetch(`${API_URL}/events/summary`);
+  const events = await toJson<EventSummary[]>(res);
+  return events.map((event) => ({ ...event, coverUrl: event.coverUrl ? toAssetUrl(event.coverUrl) : undefined }));
+};
+
 export const saveEvent = async (payload: EventPayload): Promise<Event> => {
   const res = await fetch(`${API_URL}/events`, {
     method: 'POST',
@@ -53,7 +63,7 @@ export const removeEvent = async (id: string): Promise<void> => {
 };
 
 export const getPhotosByEvent = async (slug: string): Promise<Photo[]> => {
-  const res = await fetch(`${API_URL}/events/${slug}/photos`);
+  const res = await fetch(`${API_URL}/events/${slug}/photos?sort=captured`);
   const photos = await toJson<Photo[]>(res);
   return photos.map(withAssetUrl);
 };
@@ -93,9 +103,23 @@ export const deletePhoto = async (id: string): Promise<void> => {
   }
 };
 
+// Mirrors MAX_BULK_PHOTOS on the backend.
+const BULK_LIMIT = 1000;
+
 export const deletePhotos = async (ids: string[]): Promise<void> => {
-  for (const id of ids) {
-    await deletePhoto(id);
+  for (let start = 0; start < ids.length; start += BULK_LIMIT) {
+    const res = await fetch(`${API_URL}/photos/batch/delete`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        ...adminHeaders,
+      },
+      body: JSON.stringify({ ids: ids.slice(start, start + BULK_LIMIT) }),
+    });
+    if (!res.ok) {
+      const message = await res.text();
+      throw new Error(message || 'Failed to delete photos');
+    }
   }
 };
 
@@ -124,6 +148,18 @@ export const setEventCoverPhoto = async (eventId: string, photoId: string): Prom
   return toJson<Event>(res);
 };
 
+export const setEventWatermark = async (eventId: string, watermarkText: string | null): Promise<Event> => {
+  const res = await fetch(`${API_URL}/events/${eventId}/watermark`, {
+    method: 'PATCH',
+    headers: {
+      'Content-Type': 'application/json',
+      ...adminHeaders,
+    },
+    body: JSON.stringify({ watermarkText }),
+  });
+  return toJson<Event>(res);
+};
+
 export const setPhotoFavorite = async (photoId: string, isFavorite: boolean): Promise<Photo> => {
   const res = await fetch(`${API_URL}/photos/${photoId}/favorite`, {
     method: 'PATCH',
@@ -134,4 +170,12 @@ export const setPhotoFavorite = async (photoId: string, isFavorite: boolean): Pr
   });
   const photo = await toJson<Photo>(res);
   return withAssetUrl(photo);
-};
\ No newline at end of file
+};
+
+export const getJobStats = async (eventId?: string): Promise<JobStats> => {
+  const query = eventId ? `?eventId=${encodeURIComponent(eventId)}` : '';
+  const res = await fetch(`${API_URL}/jobs/stats${query}`, {
+    headers: adminHeaders,
+  });
+  return toJson<JobStats>(res);
+};
@@ -4,6 +4,8 @@ export interface Photo {
   eventSlug: string;
   filename: string;
   url: string;
+  thumbnailUrl: string;
+  webUrl: string;
   name: string;
   type?: string;
   size: number;
@@ -12,6 +14,15 @@ export interface Photo {
   caption?: string;
   uploadedAt: number;
   isFavorite: boolean;
+  capturedAt?: number;
+  cameraMake?: string;
+  cameraModel?: string;
+  lens?: string;
+  orientation?: number;
+  latitude?: number;
+  longitude?: number;
+  blurhash?: string;
+  dominantColor?: string;
 }
 
 export interface UploadProgress {
@@ -22,6 +33,13 @@ export interface UploadProgress {
   totalBytes: number;
 }
 
+export interface JobStats {
+  queued: number;
+  running: number;
+  done: number;
+  failed: number;
+}
+
 export interface Event {
   id: string;
   title: string;
@@ -29,15 +47,23 @@ export interface Event {
   date: string; // YYYY-MM-DD
   coverPhotoId?: string;
   description?: string;
-  watermarkText?: string; // Text to overlay on photos
+  watermarkText?: string; // Stamped by the server on delivered images
   createdAt: number;
 }
 
+export interface EventSummary extends Event {
+  photoCount: number;
+  favoriteCount: number;
+  totalBytes: number;
+  coverUrl?: string;
+}
+
 export interface AppState {
-  events: Event[];
+  events: EventSummary[];
   photos: Photo[];
   loading: boolean;
   refreshData: () => Promise<void>;
+  loadEventPhotos: (slug: string) => Promise<void>;
   addEvent: (event: Omit<Event, 'id' | 'createdAt'>) => Promise<Event>;
   deleteEvent: (id: string) => Promise<void>;
   addPhotos: (eventId: string, files: File[], onProgress?: (progress: UploadProgress) => void) => Promise<void>;
@@ -45,5 +71,6 @@ export interface AppState {
   deletePhotos: (photoIds: string[]) => Promise<void>;
   updatePhotoCaption: (photoId: string, caption: string) => Promise<void>;
   setCoverPhoto: (eventId: string, photoId: string) => Promise<void>;
+  setWatermark: (eventId: string, watermarkText: string | null) => Promise<void>;
   togglePhotoFavorite: (photoId: string, isFavorite: boolean) => Promise<void>;
 }
\ No newline at end of file